@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Benchmark fluid-handling throughput of every job against the simulated
+instrument and save the results as JSON."""
+
+from device_spinner.config import Config
+from device_spinner.device_spinner import DeviceSpinner
+from functools import wraps
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import argparse
+import json
+import logging
+import shutil
+import traceback
+
+BIN_DIR = Path(__file__).parent
+PRIMITIVES = ["dispense_solution_to_vessel", "dispense_to_vessel",
+              "drain_vessel", "purge_pump_line", "prime_pump_line"]
+
+
+def create_simulated_instrument(config_path: Path):
+    """Create a simulated instrument that fast-forwards with a virtual clock."""
+    device_specs = dict(Config(config_path).cfg)["devices"]
+    device_specs["clock"]["class"] = "brainwasher.clock.VirtualClock"
+    return DeviceSpinner().create_devices_from_specs(device_specs)["brainwasher"]
+
+
+def get_counts(instrument):
+    """Snapshot the simulated device activity counters."""
+    valves = [instrument.rv_source_valve, instrument.rv_exhaust_valve,
+              *instrument.output_bypass_valves, *instrument.waste_drain_valves]
+    return {
+        "selector_moves": getattr(instrument.selector, "move_count", 0),
+        "selector_moves_skipped": getattr(instrument.selector,
+                                          "skipped_move_count", 0),
+        "pump_strokes": getattr(instrument.pump, "stroke_count", 0),
+        "valve_actuations": sum(v.write_count for v in valves),
+        "valve_writes_skipped": sum(v.skipped_write_count for v in valves),
+        "valve_bank_writes": getattr(instrument.valve_bank, "write_count", 0),
+    }
+
+
+class JobProfiler:
+    """Record instrument time spent in each fluid-handling primitive and the
+    device activity within each wash step.
+
+    .. note::
+       Primitive times are inclusive, i.e: `dispense_to_vessel` includes the
+       `prime_pump_line` and `purge_pump_line` calls it makes, and
+       `dispense_solution_to_vessel` includes any `dispense_to_vessel` calls.
+
+    """
+
+    def __init__(self, instrument):
+        self.instrument = instrument
+        self.clock = instrument.clock
+        self.steps = []
+        self._step_primitives = None
+        for name in PRIMITIVES:
+            setattr(instrument, name, self._profile_primitive(name))
+        instrument.run_wash_step = self._profile_step(instrument.run_wash_step)
+
+    def _profile_primitive(self, name: str):
+        func = getattr(self.instrument, name)
+
+        @wraps(func)
+        def inner(*args, **kwds):
+            start_time_s = self.clock.now()
+            try:
+                return func(*args, **kwds)
+            finally:
+                if self._step_primitives is not None:
+                    stats = self._step_primitives.setdefault(
+                        name, {"count": 0, "time_s": 0})
+                    stats["count"] += 1
+                    stats["time_s"] += self.clock.now() - start_time_s
+        return inner
+
+    def _profile_step(self, func):
+
+        @wraps(func)
+        def inner(*args, **kwds):
+            self._step_primitives = {}
+            start_counts = get_counts(self.instrument)
+            start_time_s = self.clock.now()
+            try:
+                return func(*args, **kwds)
+            finally:
+                elapsed_time_s = self.clock.now() - start_time_s
+                duration_s = kwds.get("duration_s", 0) or 0
+                end_counts = get_counts(self.instrument)
+                self.steps.append({
+                    "index": len(self.steps),
+                    "duration_s": duration_s,
+                    "elapsed_s": elapsed_time_s,
+                    "overhead_s": elapsed_time_s - duration_s,
+                    **{k: end_counts[k] - start_counts[k] for k in end_counts},
+                    "primitives": self._step_primitives})
+                self._step_primitives = None
+        return inner
+
+    def summarize(self) -> dict:
+        primitives = {}
+        for step in self.steps:
+            for name, stats in step["primitives"].items():
+                totals = primitives.setdefault(name, {"count": 0, "time_s": 0})
+                totals["count"] += stats["count"]
+                totals["time_s"] += stats["time_s"]
+        for totals in primitives.values():
+            totals["mean_s"] = totals["time_s"] / totals["count"]
+        summary = {"step_count": len(self.steps),
+                   "primitives": primitives,
+                   "total_overhead_s": sum(s["overhead_s"] for s in self.steps)}
+        for key in ["selector_moves", "selector_moves_skipped", "pump_strokes",
+                    "valve_actuations", "valve_writes_skipped",
+                    "valve_bank_writes"]:
+            summary[key] = sum(s[key] for s in self.steps)
+        return summary
+
+
+def benchmark_job(job_path: Path, config_path: Path, work_dir: Path) -> dict:
+    """Run one job to completion on a fresh simulated instrument."""
+    # Run a copy since running a job writes progress back to the job file.
+    job_copy_path = work_dir / job_path.name
+    shutil.copy(job_path, job_copy_path)
+    instrument = create_simulated_instrument(config_path)
+    profiler = JobProfiler(instrument)
+    start_time_s = perf_counter()
+    instrument.run(job_copy_path)
+    instrument.job_worker.join()
+    result = {"job": job_path.name,
+              "runtime_s": perf_counter() - start_time_s,
+              "instrument_time_s": instrument.clock.now(),
+              **profiler.summarize(),
+              "steps": profiler.steps}
+    if instrument._load_job(job_copy_path).resume_state is not None:
+        result["error"] = "Job did not finish."
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("jobs", type=str, nargs="*",
+                        default=sorted(str(p) for p in (BIN_DIR / "jobs").glob("*.yaml")),
+                        help="Job files to benchmark. Defaults to bin/jobs/*.yaml.")
+    parser.add_argument("--config", type=str,
+                        default=str(BIN_DIR / "sim_instrument_config.yaml"))
+    parser.add_argument("--output", type=str, default="benchmark_results.json")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    results = []
+    with TemporaryDirectory() as work_dir:
+        for job_path in args.jobs:
+            job_path = Path(job_path)
+            print(f"Benchmarking {job_path.name}.")
+            try:
+                results.append(benchmark_job(job_path, Path(args.config),
+                                             Path(work_dir)))
+            except Exception as e:
+                traceback.print_exc()
+                results.append({"job": job_path.name, "error": repr(e)})
+    with open(args.output, "w") as output_file:
+        json.dump({"config": Path(args.config).name, "jobs": results},
+                  output_file, indent=2)
+    print(f"Saved results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
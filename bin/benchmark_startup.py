@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Benchmark how long `main.py --simulated` takes to start up and save the
+results as JSON."""
+
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+
+BIN_DIR = Path(__file__).parent
+
+
+def time_startup(work_dir: Path, python_args: list[str] = None):
+    """Run the simulated instrument startup once.
+
+    :return: (wall time in seconds, stderr output)
+    """
+    cmd = [sys.executable, *(python_args or []), str(BIN_DIR / "main.py"),
+           "--simulated", "--startup_only"]
+    start_time_s = perf_counter()
+    result = subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True)
+    elapsed_time_s = perf_counter() - start_time_s
+    if result.returncode:
+        raise RuntimeError(f"Startup failed:\n{result.stderr}")
+    return elapsed_time_s, result.stderr
+
+
+def get_slowest_imports(importtime_output: str, count: int):
+    """Top-level imports with the highest cumulative import time."""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if not name.startswith("  "):  # Top-level imports only.
+            imports.append({"module": name.strip(),
+                            "cumulative_s": int(cumulative_us) / 1e6})
+    return sorted(imports, key=lambda i: -i["cumulative_s"])[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=str, default="startup_benchmark.json")
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as work_dir:
+        # main.py loads the simulated config (and writes logs) in its cwd.
+        shutil.copy(BIN_DIR / "sim_instrument_config.yaml", work_dir)
+        times_s = []
+        for run in range(args.runs):
+            elapsed_time_s, _ = time_startup(Path(work_dir))
+            print(f"Run {run + 1}/{args.runs}: {elapsed_time_s:.3f}[s].")
+            times_s.append(elapsed_time_s)
+        _, importtime_output = time_startup(Path(work_dir), ["-X", "importtime"])
+    results = {"runs": times_s,
+               "min_s": min(times_s),
+               "median_s": median(times_s),
+               "slowest_imports": get_slowest_imports(importtime_output, 10)}
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Median startup time: {results['median_s']:.3f}[s].")
+    print(f"Saved results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
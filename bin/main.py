@@ -43,6 +43,12 @@ def main():
 
     parser.add_argument("--simulated", default=False, action="store_true",
                         help="Simulate hardware device connections.")
+    parser.add_argument("--fast_forward", default=False, action="store_true",
+                        help="In simulation, skip through waits with a "
+                             "virtual clock.")
+    parser.add_argument("--startup_only", default=False, action="store_true",
+                        help="Exit once the instrument is reset instead of "
+                             "launching the prompt (i.e: to time startup).")
 
     args = parser.parse_args()
     if args.simulated:
@@ -64,6 +70,9 @@ def main():
 
     # Create the instrument.
     device_specs = dict(device_config.cfg)
+    if args.simulated and args.fast_forward:
+        logger.warning("Simulation will fast-forward through all waits!")
+        device_specs["devices"]["clock"]["class"] = "brainwasher.clock.VirtualClock"
 
     factory = DeviceSpinner()
     device_trees = factory.create_devices_from_specs(device_specs["devices"])
@@ -72,6 +81,8 @@ def main():
     #cam = device_trees['vessel_cam']
     #cam.start_recording("test
     instrument.reset()
+    if args.startup_only:
+        return
 
     #protocol = args.protocol if args.protocol is not None else StringIO(demo_protocol_csv_str)
     #if args.protocol is None:
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Propose a selector port layout that minimizes rotation for a job by
+tracing the job's selector moves on the simulated instrument."""
+
+from brainwasher.port_layout import optimize_port_layout, trace_selector_moves
+from benchmark_jobs import create_simulated_instrument
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import argparse
+import logging
+import shutil
+
+BIN_DIR = Path(__file__).parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("job", type=str)
+    parser.add_argument("--config", type=str,
+                        default=str(BIN_DIR / "sim_instrument_config.yaml"))
+    parser.add_argument("--position_time_s", type=float, default=None,
+                        help="Time to rotate one selector position. Defaults "
+                             "to the simulated selector's value.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    instrument = create_simulated_instrument(Path(args.config))
+    selector = instrument.selector
+    position_time_s = args.position_time_s or selector.position_time_s
+    with TemporaryDirectory() as work_dir:
+        # Run a copy since running a job writes progress back to the job file.
+        job_path = Path(work_dir) / Path(args.job).name
+        shutil.copy(args.job, job_path)
+        print(f"Tracing selector moves for {Path(args.job).name}.")
+        moves = trace_selector_moves(instrument, job_path)
+    proposal = optimize_port_layout(moves, selector.port_map,
+                                    selector.port_count, position_time_s)
+    print(f"Selector moves: {proposal.move_count}")
+    print(f"Positions rotated: {proposal.positions_rotated} (current) -> "
+          f"{proposal.proposed_positions_rotated} (proposed)")
+    print(f"Predicted time saved: {proposal.time_saved_s:.1f}[s]")
+    print("Proposed port map:")
+    for name, port in sorted(proposal.proposed_port_map.items(),
+                             key=lambda item: item[1]):
+        current_port = proposal.port_map[name]
+        note = "" if port == current_port else f"  (was {current_port})"
+        print(f"    {name}: {port}{note}")
+
+
+if __name__ == "__main__":
+    main()
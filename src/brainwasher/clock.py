@@ -0,0 +1,121 @@
+"""Timekeeping shared by the instrument and its (simulated) devices."""
+
+from math import inf, nextafter
+from threading import Condition, Event, Thread, current_thread
+from time import perf_counter, sleep
+
+
+class Clock:
+    """Wall clock. Default timekeeper for the instrument and its devices."""
+
+    def now(self) -> float:
+        """Monotonic time in seconds."""
+        return perf_counter()
+
+    def sleep(self, seconds: float, background: bool = False):
+        """Block the calling thread for the specified time.
+
+        :param seconds: time to sleep in seconds.
+        :param background: True if the caller is a periodic background worker
+            (i.e: a sensor monitor) rather than a thread driving the
+            instrument. Ignored by the wall clock.
+        """
+        sleep(max(seconds, 0))
+
+    def wait(self, event: Event, timeout: float,
+             background: bool = False) -> bool:
+        """Block until the event is set or the timeout elapses.
+
+        :param background: True if the caller is a periodic background
+            worker. Ignored by the wall clock.
+        :return: True if the event was set; False on timeout.
+        """
+        return event.wait(max(timeout, 0))
+
+
+class VirtualClock(Clock):
+    """Discrete-event clock for fast-forwarding simulations.
+
+    Time only advances when a foreground thread sleeps or waits. Rather than
+    blocking, the clock jumps straight to that thread's deadline, so a
+    multi-hour mixing step completes immediately. Background workers (i.e:
+    the pressure monitor) sleep with `background=True` and are woken as
+    foreground sleeps carry virtual time past their deadlines. The foreground
+    thread then waits (briefly, in real time) for every woken background
+    worker to finish its iteration so that it observes a consistent
+    instrument state.
+
+    .. note::
+       Background sleepers also return after `sync_timeout_s` of real time
+       without advancing the clock so they can notice shutdown requests
+       while the instrument is idle.
+
+    """
+
+    def __init__(self, start_time_s: float = 0, sync_timeout_s: float = 1.0):
+        self._now_s = start_time_s
+        self.sync_timeout_s = sync_timeout_s
+        self._condition = Condition()
+        # Background worker threads keyed to their current deadline or None
+        # if the worker is awake.
+        self._background_deadlines: dict[Thread, float | None] = {}
+
+    def now(self) -> float:
+        with self._condition:
+            return self._now_s
+
+    def sleep(self, seconds: float, background: bool = False):
+        if background:
+            self._background_sleep(seconds)
+            return
+        if seconds <= 0:
+            return
+        with self._condition:
+            # Always make progress, even if the sleep is smaller than the
+            # float resolution of the current time.
+            self._advance_to(max(self._now_s + seconds,
+                                 nextafter(self._now_s, inf)))
+
+    def wait(self, event: Event, timeout: float,
+             background: bool = False) -> bool:
+        # Nothing can set the event in virtual time, so only an event set
+        # before the call (or by another thread during the sleep) can cut the
+        # wait short. Background waits still last until their deadline.
+        if event.is_set():
+            return True
+        self.sleep(timeout, background=background)
+        return event.is_set()
+
+    def _background_sleep(self, seconds: float):
+        thread = current_thread()
+        with self._condition:
+            deadline_s = self._now_s + max(seconds, 0)
+            self._background_deadlines[thread] = deadline_s
+            self._condition.notify_all()  # This worker's iteration is done.
+            self._condition.wait_for(lambda: self._now_s >= deadline_s,
+                                     timeout=self.sync_timeout_s)
+            self._background_deadlines[thread] = None  # Awake.
+
+    def _advance_to(self, deadline_s: float):
+        """Jump to the specified time and let any background workers that
+        are now due run their iteration.
+
+        .. note::
+           Must be called with the condition held.
+
+        """
+        if deadline_s <= self._now_s:
+            return
+        self._now_s = deadline_s
+        self._condition.notify_all()
+        self._condition.wait_for(self._background_workers_idle,
+                                 timeout=self.sync_timeout_s)
+
+    def _background_workers_idle(self) -> bool:
+        """True if every live background worker is asleep until a future
+        deadline."""
+        for thread in list(self._background_deadlines):
+            if not thread.is_alive():
+                del self._background_deadlines[thread]
+        return all(deadline_s is not None and deadline_s > self._now_s
+                   for deadline_s in self._background_deadlines.values())
@@ -0,0 +1,96 @@
+"""asyncio front-end for the BrainWasher instrument"""
+
+import asyncio
+import logging
+
+from brainwasher.devices.instruments.brainwasher import BrainWasher
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+
+class AsyncBrainWasher:
+    """Awaitable interface to a `BrainWasher`.
+
+    Fluid operations run on a dedicated worker thread so they do not block
+    the event loop, and they execute in the order they were awaited. Status
+    reads come from state the instrument already caches (i.e: the pressure
+    monitor's latest sample) and never wait for the flowpath lock, so they
+    return immediately even while a fluid operation is underway.
+    """
+
+    def __init__(self, instrument: BrainWasher):
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.instrument = instrument
+        # Fluid operations serialize on the flowpath lock anyway, so a single
+        # worker thread keeps them in order without tying up more threads.
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="brainwasher_io")
+
+    async def _run_in_executor(self, func, *args, **kwds):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          partial(func, *args, **kwds))
+
+    # Fluid operations.
+    async def dispense_to_vessel(self, microliters: float, chemical: str):
+        await self._run_in_executor(self.instrument.dispense_to_vessel,
+                                    microliters, chemical)
+
+    async def dispense_solution_to_vessel(self, **solution: float):
+        await self._run_in_executor(
+            self.instrument.dispense_solution_to_vessel, **solution)
+
+    async def drain_vessel(self, **kwds):
+        await self._run_in_executor(self.instrument.drain_vessel, **kwds)
+
+    async def run_wash_step(self, **kwds):
+        await self._run_in_executor(self.instrument.run_wash_step, **kwds)
+
+    async def run(self, job_path: str):
+        """Run the specified job and return once it finishes or pauses."""
+        await self._run_in_executor(self.instrument.run, Path(job_path))
+        # The job runs in its own worker thread. Wait for it without
+        # occupying the fluid operation worker.
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.instrument.job_worker.join)
+
+    # Job control. These only set flags, so they never block.
+    def pause(self):
+        self.instrument.pause()
+
+    def abort(self):
+        self.instrument.abort()
+
+    # Status reads from cached state.
+    @property
+    def pressure_psig(self) -> float:
+        return self.instrument.pressure_psig
+
+    @property
+    def vessel_solution(self) -> dict[str, float]:
+        return dict(self.instrument.rxn_vessel.solution)
+
+    @property
+    def job_step(self) -> int:
+        """Current (0-indexed) job step or -1 if no job step is running."""
+        return self.instrument.job_step
+
+    @property
+    def busy(self) -> bool:
+        """True if a fluid operation is underway."""
+        return self.instrument.flowpath_locked
+
+    def get_status(self) -> dict:
+        """Snapshot of the instrument's cached state."""
+        job_worker = self.instrument.job_worker
+        return {"pressure_psig": self.pressure_psig,
+                "vessel_solution": self.vessel_solution,
+                "job_running": job_worker is not None and job_worker.is_alive(),
+                "job_step": self.job_step,
+                "busy": self.busy}
+
+    def close(self):
+        """Wait for queued fluid operations to finish and release the worker
+        thread."""
+        self._executor.shutdown(wait=True)
@@ -2,37 +2,57 @@
 
 import _thread  # To kill the main thread from a child thread.
 import logging
+import numpy as np
 import yaml
 
+from brainwasher.clock import Clock
 from brainwasher.devices.vessels import Vessel, ReactionVessel, WasteVessel
 from brainwasher.devices.mixer import Mixer
 from brainwasher.devices.liquid_presence_detection import BubbleDetectionSensor
 from brainwasher.devices.sequent_microsystems.valve import NCValve, ThreeTwoValve
 from brainwasher.devices.pressure_sensor import PressureSensor
 from brainwasher.devices.valves.closeable_vici import CloseableVICI
+from brainwasher.devices.valves.valve import SolenoidValveBank
 from brainwasher.errors.instrument_errors import LeakCheckError
 from brainwasher.protocol import Protocol
+from brainwasher.reservoir_inventory import ReservoirInventory
+from brainwasher.ring_buffer import TimestampedRingBuffer
+from brainwasher.telemetry import PressureTelemetryRecorder
+from brainwasher.waste_planner import WastePlan, optimize_waste_plan
 from brainwasher.job import Job
-from copy import deepcopy
+from brainwasher.job_journal import JobJournal
+from brainwasher.job_loader import JobLoader
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import timedelta
 from functools import wraps
+from math import ceil
 from pathlib import Path
 from runze_control.syringe_pump import SyringePump
-from time import sleep
-from time import perf_counter as now
-from threading import Event, Thread, RLock, current_thread
+from threading import Event, Lock, Thread, RLock, current_thread
 
 
 SIMULATED = False
 
 def lock_flowpath(func):
-    """Provide methods with exclusive access to components that alter the flowpath."""
+    """Provide methods with exclusive access to components that alter the
+    flowpath and sample pressure quickly while they run."""
     @wraps(func) # required for sphinx doc generation
     def inner(self, *args, **kwds):
         with self.flowpath_lock:
             self.log.debug(f"Locking flowpath to "
                            f"{current_thread().name} for {func.__name__} fn.")
-            return func(self, *args, **kwds)
+            if not self._flowpath_depth:
+                self.shared_hardware_lock.acquire()
+            self._flowpath_depth += 1
+            self._update_pressure_sample_period()
+            try:
+                return func(self, *args, **kwds)
+            finally:
+                self._flowpath_depth -= 1
+                self._update_pressure_sample_period()
+                if not self._flowpath_depth:
+                    self.shared_hardware_lock.release()
     return inner
 
 def syringe_empty(func):
@@ -52,6 +72,16 @@ def syringe_empty(func):
     return inner
 
 
+@dataclass
+class PrimeState:
+    """What the reservoir lines and pump line are primed with. Instruments
+    that share a selector or pump share one of these."""
+    # Volume displaced to prime each chemical's reservoir line so that it
+    # can be "unprimed" if necessary.
+    prime_volumes_ul: dict[str, float] = field(default_factory=dict)
+    pump_is_primed_with: str = None
+
+
 class BrainWasher:
 
     """Class for controlling/maintaining the FlowChamber.
@@ -70,6 +100,13 @@ class BrainWasher:
     MAX_LEAK_CHECK_PRESSURE_DELTA_PSIG = 0.10  # Max permissable relative change
                                                # in pressure during leak checks.
     PRESSURE_POCKET_TIMEOUT_S = 6.0
+    # Pressure monitor sampling periods while the flowpath is changing (i.e:
+    # the pump is moving) and while it is static (i.e: only mixing).
+    FAST_PRESSURE_SAMPLE_PERIOD_S = 0.001
+    SLOW_PRESSURE_SAMPLE_PERIOD_S = 1.0
+    # Longest trailing window of pressure samples that can be queried while
+    # sampling fast. Must cover the longest averaging/jam-detection window.
+    PRESSURE_HISTORY_S = 2 * PRESSURE_POCKET_TIMEOUT_S
 
     def __init__(self, selector: CloseableVICI,
                  selector_lds_map: dict[str, int],
@@ -83,6 +120,13 @@ class BrainWasher:
                  output_bypass_valves: list[NCValve],
                  waste_drain_valves: list[NCValve],
                  pump_prime_lds: BubbleDetectionSensor,
+                 clock: Clock = None,
+                 valve_bank: SolenoidValveBank = None,
+                 pressure_recorder: PressureTelemetryRecorder = None,
+                 job_loader: JobLoader = None,
+                 prime_waste_ul: float = 0,
+                 purge_waste_ul: float = 0,
+                 reservoir_inventory: ReservoirInventory = None,
                  #tube_length_graph
                  ):
         """
@@ -90,9 +134,26 @@ class BrainWasher:
             different compatible chemicals that can be added to it.
         :param waste_drain_valves: list of valves gating each waste vessel.
             Valve order must match the order of the waste vessels.
+        :param clock: timekeeper for all waits. Defaults to the wall clock.
+            Simulations may share a `VirtualClock` with their simulated
+            devices to fast-forward through long jobs.
+        :param valve_bank: bank containing every valve, used to switch
+            several valves at once. Defaults to switching valves one by one.
+        :param pressure_recorder: optional recorder to stream every pressure
+            sample (tagged with the current job step) to disk.
+        :param job_loader: loader for job files. Defaults to one that only
+            caches validated jobs in memory.
+        :param prime_waste_ul: estimated liquid sent to waste when priming a
+            reservoir line. Used to plan waste routing.
+        :param purge_waste_ul: estimated liquid sent to waste when purging
+            the pump line after a dispense. Used to plan waste routing.
+        :param reservoir_inventory: record of reagent reservoir levels,
+            updated by every dispense and prime. Defaults to one that only
+            keeps levels in memory.
 
         """
         self.log = logging.getLogger(self.__class__.__name__)
+        self.clock = clock if clock is not None else Clock()
         self.selector = selector
         self.selector_lds_map = selector_lds_map
         self.pump = pump
@@ -105,11 +166,18 @@ class BrainWasher:
         self.output_bypass_valves = output_bypass_valves # liquids and vapors to waste.
         self.waste_drain_valves = waste_drain_valves  # reaction vessel waste drain valve.
         self.pump_prime_lds = pump_prime_lds
-
-        self.prime_volumes_ul = {} # Store how much volume was displaced to
-                                   # prime a particular chemical so that we
-                                   # can "unprime" it if necessary.
-        self.pump_is_primed_with = None
+        self.valve_bank = valve_bank if valve_bank is not None else \
+            SolenoidValveBank([rv_source_valve, rv_exhaust_valve,
+                               *output_bypass_valves, *waste_drain_valves])
+
+        # Instruments that share hardware share this state.
+        self.prime_state = PrimeState()
+        self.prime_waste_ul = prime_waste_ul
+        self.purge_waste_ul = purge_waste_ul
+        # Waste routing for the running job, and the waste vessel planned for
+        # the reaction vessel's current contents.
+        self.waste_plan: WastePlan = None
+        self._rxn_vessel_waste_id = None
 
         self.nominal_pump_speed_percent = 20
         self.slow_pump_speed_percent = 10
@@ -117,19 +185,37 @@ class BrainWasher:
         self.pump_purge_speed_percent = 100
         # Pressure Monitor Thread control
         self.monitoring_pressure = Event()
-        self.buffer_samples = Event()
-        self.pressure_sample_buffer = []
         self.pressure_monitor_thread = None
-        self.pressure_avg_start_time_s = 0
-        self.pressure_avg_duration_s = 0
-        self.pressure_psig = 0
+        # Recent pressure samples. Written only by the pressure monitor thread.
+        # One extra slot since the slot being written is never read.
+        self.pressure_samples = TimestampedRingBuffer(
+            capacity=ceil(self.PRESSURE_HISTORY_S
+                          / self.FAST_PRESSURE_SAMPLE_PERIOD_S) + 1)
+        self.pressure_recorder = pressure_recorder
+        self.job_loader = job_loader if job_loader is not None else JobLoader()
+        self.reservoir_inventory = (reservoir_inventory
+                                    if reservoir_inventory is not None
+                                    else ReservoirInventory())
+        self.job_step = -1  # Current (0-indexed) job step or -1 if idle.
+        # Flowpath activity sets the pressure sampling rate.
+        self._flowpath_depth = 0  # Nesting level of lock_flowpath calls.
+        self._flowpath_static = False
+        # Clock time at which the static flowpath is due to change or None.
+        self.flowpath_static_until_s = None
+        self.pressure_sample_period_s = self.SLOW_PRESSURE_SAMPLE_PERIOD_S
+        self.fast_pressure_sampling = Event()  # Wakes a slow pressure monitor.
         self._validate_setup()
         # Protocol Thread control
         self.job_worker = None
         # Thread-safe protection within a class instance.
         self.flowpath_lock = RLock()
+        # Held by the flowpath lock owner except while the flowpath is static.
+        # Instruments that share hardware (i.e: a reagent selector or waste
+        # vessels) share this lock so their fluid operations interleave.
+        self.shared_hardware_lock = Lock()
         # Pause Control
         self.pause_requested = Event()
+        self.abort_requested = Event()
         self.resume_state_overrides = {}
         # Launch pressure monitor thread.
         self.start_pressure_monitor()
@@ -148,6 +234,29 @@ class BrainWasher:
         if not (required_ports <= selector_port_map_keys):
             raise RuntimeError("The selector port map must include the "
                                f"followig named ports: {required_ports}")
+        # Every valve must be switchable through the valve bank.
+        valves = [self.rv_source_valve, self.rv_exhaust_valve,
+                  *self.output_bypass_valves, *self.waste_drain_valves]
+        if not all(valve in self.valve_bank.valves for valve in valves):
+            raise RuntimeError("The valve bank must include every valve.")
+
+    @property
+    def flowpath_locked(self) -> bool:
+        """True while a fluid operation holds the flowpath."""
+        return self._flowpath_depth > 0
+
+    @property
+    def prime_volumes_ul(self) -> dict[str, float]:
+        """Volume displaced to prime each primed chemical's reservoir line."""
+        return self.prime_state.prime_volumes_ul
+
+    @property
+    def pump_is_primed_with(self) -> str | None:
+        return self.prime_state.pump_is_primed_with
+
+    @pump_is_primed_with.setter
+    def pump_is_primed_with(self, chemical: str | None):
+        self.prime_state.pump_is_primed_with = chemical
 
     @property
     def plumbed_chemicals(self):
@@ -160,7 +269,8 @@ class BrainWasher:
         pressure pockets created to waste."""
         self.log.info("Resetting instrument.")
         self.mixer.stop_mixing()
-        self.deenergize_all_valves()
+        # Valve states are unknown at startup; command them all.
+        self.deenergize_all_valves(force=True)
         try:
             # Connect: source pump -> waste.
             # FIXME: we need to know what we're purging.
@@ -185,18 +295,18 @@ class BrainWasher:
                 self.pump.halt()
         except Exception:
             self.log.critical("Error halting pump.")
-        self.deenergize_all_valves()
+        self.deenergize_all_valves(force=True)
         self.mixer.stop_mixing()
 
     @lock_flowpath
-    def deenergize_all_valves(self):
+    def deenergize_all_valves(self, force: bool = False):
+        """Deenergize all solenoid valves.
+
+        :param force: if True, command every valve, even those that were last
+            commanded to deenergize.
+        """
         self.log.debug("Deenergizing all solenoid valves.")
-        self.rv_source_valve.deenergize()
-        self.rv_exhaust_valve.deenergize()
-        for valve in self.output_bypass_valves:
-            valve.deenergize()
-        for valve in self.waste_drain_valves:
-            valve.deenergize()
+        self.valve_bank.deenergize_all(force=force)
 
     def start_pressure_monitor(self):
         if self.monitoring_pressure.is_set():
@@ -213,36 +323,91 @@ class BrainWasher:
         self.monitoring_pressure.clear()
         self.pressure_monitor_thread.join()
         self.pressure_monitor_thread = None
+        if self.pressure_recorder is not None:
+            self.pressure_recorder.flush()
+
+    @property
+    def pressure_psig(self) -> float:
+        """Most recent pressure reading or 0 if there are none yet."""
+        sample = self.pressure_samples.latest()
+        return sample[1] if sample is not None else 0
 
     def get_average_psig(self, duration_s: float):
-        # Set event to stuff samples into an array.
-        self.pressure_sample_buffer = []  # clear old samples.
-        self.pressure_avg_start_time_s = now()
-        self.pressure_avg_duration_s = duration_s
-        self.buffer_samples.set()
-        # Wait for event to clear.
-        while self.buffer_samples.is_set():
-            sleep(0.01)
-        return sum(self.pressure_sample_buffer)/len(self.pressure_sample_buffer)
+        """Wait for the specified time and return the average pressure over
+        it."""
+        self._check_pressure_window(duration_s)
+        self.clock.sleep(duration_s)
+        return self.pressure_samples.mean(duration_s)
+
+    def get_pressure_slope_psig_per_s(self, duration_s: float):
+        """Rate of pressure change over the trailing `duration_s` seconds."""
+        self._check_pressure_window(duration_s)
+        return self.pressure_samples.slope(duration_s)
+
+    def _check_pressure_window(self, duration_s: float):
+        """Warn if the pressure history may not span `duration_s`."""
+        if duration_s > self.PRESSURE_HISTORY_S:
+            self.log.warning(f"Requested {duration_s}[s] of pressure samples, "
+                             f"but only the last {self.PRESSURE_HISTORY_S}[s] "
+                             "are kept while sampling fast.")
+
+    def _update_pressure_sample_period(self):
+        """Sample fast while a flowpath operation is underway, and slowly
+        otherwise."""
+        if self._flowpath_depth and not self._flowpath_static:
+            self.pressure_sample_period_s = self.FAST_PRESSURE_SAMPLE_PERIOD_S
+            self.fast_pressure_sampling.set()
+        else:
+            self.pressure_sample_period_s = self.SLOW_PRESSURE_SAMPLE_PERIOD_S
+            self.fast_pressure_sampling.clear()
+
+    @contextmanager
+    def _static_flowpath(self, until_s: float = None):
+        """Sample pressure slowly, even within a flowpath operation, while
+        the flowpath does not change, and lend any shared hardware to other
+        instruments in the meantime.
+
+        :param until_s: clock time at which the flowpath is expected to
+            change again so that shared hardware is only lent for
+            operations that will finish by then.
+        """
+        self._flowpath_static = True
+        self.flowpath_static_until_s = until_s
+        self._update_pressure_sample_period()
+        self.shared_hardware_lock.release()
+        try:
+            yield
+        finally:
+            self.shared_hardware_lock.acquire()
+            self.flowpath_static_until_s = None
+            self._flowpath_static = False
+            self._update_pressure_sample_period()
 
     def _monitor_pressure_worker(self):
         """Pressure monitor thread that ensures system stays below maximum
         pressure and aborts otherwise.
         """
+        sample_period_s = None
         while self.monitoring_pressure.is_set():
+            if sample_period_s != self.pressure_sample_period_s:
+                sample_period_s = self.pressure_sample_period_s
+                self.log.debug(f"Sampling pressure every {sample_period_s}[s].")
             pressure_psig = self.pressure_sensor.get_pressure_psig()
-            self.pressure_psig = pressure_psig
-            if self.buffer_samples.is_set():
-                self.pressure_sample_buffer.append(pressure_psig)
-                if (now() - self.pressure_avg_start_time_s)\
-                        > self.pressure_avg_duration_s:
-                    self.buffer_samples.clear()
-            if self.pressure_psig > self.MAX_SAFE_PRESSURE_PSIG:
+            time_s = self.clock.now()
+            self.pressure_samples.append(time_s, pressure_psig)
+            if self.pressure_recorder is not None:
+                self.pressure_recorder.record(time_s, pressure_psig,
+                                              self.job_step, sample_period_s)
+            if pressure_psig > self.MAX_SAFE_PRESSURE_PSIG:
                 error_msg = "Jam detected!! Aborting syringe movement."
                 self.log.critical(error_msg)
                 self.halt()
                 _thread.interrupt_main()
-            sleep(0.01)
+            if sample_period_s == self.FAST_PRESSURE_SAMPLE_PERIOD_S:
+                self.clock.sleep(sample_period_s, background=True)
+            else:  # Wake early if a flowpath operation starts.
+                self.clock.wait(self.fast_pressure_sampling, sample_period_s,
+                                background=True)
 
     def get_compatible_waste_vessel_id(self, *chemicals: str,
                                        waste_vessels: list[WasteVessel] = None) -> int | None:
@@ -274,10 +439,33 @@ class BrainWasher:
         # Only one or the other are compatible.
         return waste_compatibility.index(True)
 
+    def _get_planned_waste_vessel_id(self, *chemicals: str,
+                                     planned_id: int = None) -> int | None:
+        """Return the planned waste vessel if it is compatible with the
+        chemicals. Otherwise, fall back to
+        :meth:`get_compatible_waste_vessel_id`."""
+        if (planned_id is not None and set(chemicals)
+                <= self.waste_vessels[planned_id].compatible_chemicals):
+            return planned_id
+        return self.get_compatible_waste_vessel_id(*chemicals)
+
+    def _get_step_waste_vessel_id(self, *chemicals: str) -> int | None:
+        """Waste vessel for the current job step's waste."""
+        planned_id = (self.waste_plan.get_waste_vessel_id(self.job_step)
+                      if self.waste_plan else None)
+        return self._get_planned_waste_vessel_id(*chemicals,
+                                                 planned_id=planned_id)
+
     def reset_waste_vessel(self, index: int):
         """Update the specified waste vessel volume to empty."""
         self.waste_vessels[index].purge_solution()
 
+    def refill_reservoir(self, chemical: str, volume_ul: float):
+        """Set the level of the chemical's reservoir after refilling it."""
+        if chemical not in self.plumbed_chemicals:
+            raise ValueError(f"{chemical} is not a valid chemical.")
+        self.reservoir_inventory.refill(chemical, volume_ul)
+
     @lock_flowpath
     @syringe_empty
     def prime_reservoir_line(self, chemical: str,
@@ -291,18 +479,21 @@ class BrainWasher:
             self.log.warning(f"{chemical} reservoir line already primed. Aborting.")
             return
         # Bail-early if we're already primed.
-        if (not SIMULATED) and self.selector_lds_map[chemical].tripped():
+        if self.selector_lds_map[chemical].tripped():
             self.log.warning(f"{chemical} reservoir line detected prematurely "
                              f"as primed. Aborting.")
             self.prime_volumes_ul[chemical] = 0
             return
-        waste_id = self.get_compatible_waste_vessel_id(chemical)
+        planned_id = (self.waste_plan.prime_waste_vessel_ids.get(chemical)
+                      if self.waste_plan else None)
+        waste_id = self._get_planned_waste_vessel_id(chemical,
+                                                     planned_id=planned_id)
         self.log.info(f"Priming {chemical} reservoir line.")
         # Configure syringe path to dump air to waste
         self.log.debug(f"Opening pump path to waste.")
-        self.rv_source_valve.deenergize()
-        self.rv_exhaust_valve.deenergize()
-        self.output_bypass_valves[waste_id].energize()
+        self.valve_bank.set_states({self.rv_source_valve: False,
+                                    self.rv_exhaust_valve: False,
+                                    self.output_bypass_valves[waste_id]: True})
         syringe_volume_ul = self.pump.syringe_volume_ul
         remaining_volume_ul = max_pump_displacement_ul
         # Withdraw (100%) until reservoir line is tripped.
@@ -310,8 +501,6 @@ class BrainWasher:
         # Note: add small fudge factor since we can be +/- 1 step (~2.0833uL).
         liquid_detected = False
         while (not liquid_detected) and (remaining_volume_ul > 5):
-            if SIMULATED:
-                break
             # Withdraw another stroke.
             if self.selector_lds_map[chemical].tripped():
                 liquid_detected = True
@@ -355,6 +544,8 @@ class BrainWasher:
         displaced_volume_ul = max_pump_displacement_ul - remaining_volume_ul
         # Save displaced volume.
         self.prime_volumes_ul[chemical] = displaced_volume_ul
+        self.reservoir_inventory.prime_reservoir_line(chemical,
+                                                      displaced_volume_ul)
         self.log.info(f"Priming {chemical} complete. Function displaced "
             f"{displaced_volume_ul:.3f}[uL] of volume.")
 
@@ -390,6 +581,9 @@ class BrainWasher:
         # Reset speed.
         self.pump.set_speed_percent(self.nominal_pump_speed_percent)
         if chemical in self.prime_volumes_ul:
+            # Primed liquid was pushed back into the reservoir.
+            self.reservoir_inventory.unprime_reservoir_line(
+                chemical, self.prime_volumes_ul[chemical])
             del self.prime_volumes_ul[chemical] # Remove record of chemical.
         self.log.info(f"Unpriming {chemical} complete.")
 
@@ -398,10 +592,6 @@ class BrainWasher:
     def prime_pump_line(self, chemical: str):
         """Fill the selector-to-syringe line flowpath with the specified
             chemical."""
-        if SIMULATED:
-            self.log.warning(f"Skipping priming pump in simulation.")
-            self.pump_is_primed_with = f"{chemical}"
-            return
         if chemical not in self.prime_volumes_ul:
             self.prime_reservoir_line(chemical)
         # FIXME: store this state in software in case we are at the edge
@@ -430,6 +620,8 @@ class BrainWasher:
             # Restore speed
             self.pump.set_speed_percent(self.nominal_pump_speed_percent)
             self.pump.log.setLevel(old_log_level) # Restore pump log level.
+            self.reservoir_inventory.prime_pump_line(
+                chemical, self.pump.get_position_ul())
             self.pump_is_primed_with = f"{chemical}"
             return
         raise RuntimeError(f"Did not detect any liquid ({chemical}) after "
@@ -447,14 +639,12 @@ class BrainWasher:
         self.log.debug("Purging pump line.")
         # Configure syringe path to dump air to waste
         self.log.debug(f"Opening pump path to waste.")
-        waste_id = self.get_compatible_waste_vessel_id(chemical)
-        if destination == self.rxn_vessel:
-            self.rv_source_valve.energize()
-            self.rv_exhaust_valve.energize()
-        else:  # Bypass rxn vessel to waste.
-            self.rv_source_valve.deenergize()
-            self.rv_exhaust_valve.deenergize()
-        self.output_bypass_valves[waste_id].energize()
+        waste_id = self._get_step_waste_vessel_id(chemical)
+        # Route through the rxn vessel or bypass it straight to waste.
+        to_rxn_vessel = (destination == self.rxn_vessel)
+        self.valve_bank.set_states({self.rv_source_valve: to_rxn_vessel,
+                                    self.rv_exhaust_valve: to_rxn_vessel,
+                                    self.output_bypass_valves[waste_id]: True})
         self.pump.set_speed_percent(self.pump_purge_speed_percent)
         try:
             # Purge all starting contents of the syringe.
@@ -495,11 +685,11 @@ class BrainWasher:
                     self.selector.close()
                     self.log.debug("Pressurizing syringe volume.")
                     self.pump.move_absolute_in_percent(0, wait=False)
-                    start_time_s = now()
+                    start_time_s = self.clock.now()
                     while self.pump.is_busy():
                         # Bugfix: the pump can think it is still busy according
                         # to its motor status, so we halt it after a certin time.
-                        if (now() - start_time_s) > self.PRESSURE_POCKET_TIMEOUT_S:
+                        if (self.clock.now() - start_time_s) > self.PRESSURE_POCKET_TIMEOUT_S:
                             self.log.error(f"Pump timed out (i.e: thinks it is "
                                            f"still busy) while creating a pressure "
                                            f"pocket after {self.PRESSURE_POCKET_TIMEOUT_S}[seconds].")
@@ -510,11 +700,11 @@ class BrainWasher:
                             self.pump.halt()
                             self.pump.is_busy() # Dump busy state to logs.
                             break  # For some reason halt may not always clear busy?
-                        sleep(0.05)
+                        self.clock.sleep(0.05)
                     remaining_volume_ul = self.pump.get_position_ul()
                     self.log.debug("Releasing pressure to outlet.")
                     self.selector.open()
-                    sleep(0.5)
+                    self.clock.sleep(0.5)
             ## Ensure we're fully reset, not just hovering at the "0" error margin.
             #self.pump.move_absolute_in_percent(0)
             # Bugfix. The pump appears to ignore small movement commands near 0.
@@ -530,33 +720,128 @@ class BrainWasher:
     @lock_flowpath
     def dispense_to_vessel(self, microliters: float, chemical: str):
         """Withdraw specified chemical from the appropriate container and
-        dispense it into the reaction vessel."""
+        dispense it into the reaction vessel.
+
+        Volumes larger than the syringe are dispensed in multiple strokes.
+        """
+        self._dispense({chemical: microliters})
+
+    @lock_flowpath
+    def dispense_solution_to_vessel(self, **solution: float):
+        """Withdraw the specified solution from the appropriate containers and
+        dispense it into the reaction vessel.
+
+        If all of the solution's components are compatible with a common waste
+        vessel, aspirate every component back-to-back into each syringe
+        stroke, then purge once after the last stroke. Otherwise, dispense
+        each component separately.
+
+        :param solution: dict, keyed by chemical name of chemical
+            amount in microliters.
+        """
+        if (len(solution) > 1
+                and self.get_compatible_waste_vessel_id(*solution) is not None):
+            self._dispense(solution)
+            return
+        for chemical, microliters in solution.items():
+            self.dispense_to_vessel(microliters, chemical)
+
+    @staticmethod
+    def plan_strokes(solution: dict[str, float], stroke_capacity_ul: float,
+                     first_stroke_capacity_ul: float = None
+                     ) -> list[dict[str, float]]:
+        """Split a solution into the fewest syringe strokes that each fit
+        within the specified capacity.
+
+        Every stroke has the same composition as the overall solution.
+        Strokes are evenly sized unless that would overfill the first one,
+        in which case the first stroke fills its capacity and the rest split
+        the remainder evenly. The last stroke absorbs any rounding so that
+        strokes sum to the solution.
+
+        :param stroke_capacity_ul: room in the (empty) syringe per stroke.
+        :param first_stroke_capacity_ul: room in the syringe for the first
+            stroke if smaller, i.e: if it already holds gas. Defaults to
+            `stroke_capacity_ul`.
+        """
+        first_stroke_capacity_ul = min(
+            first_stroke_capacity_ul if first_stroke_capacity_ul is not None
+            else stroke_capacity_ul, stroke_capacity_ul)
+        if first_stroke_capacity_ul <= 0:
+            raise ValueError(f"Cannot plan strokes with a capacity of "
+                             f"{first_stroke_capacity_ul}[uL].")
+        total_ul = sum(solution.values())
+        stroke_count = 1 + max(ceil((total_ul - first_stroke_capacity_ul)
+                                    / stroke_capacity_ul), 0)
+        first_stroke_ul = min(total_ul / stroke_count, first_stroke_capacity_ul)
+        stroke_volumes_ul = [first_stroke_ul]
+        if stroke_count > 1:
+            stroke_volumes_ul += ([(total_ul - first_stroke_ul) / (stroke_count - 1)]
+                                  * (stroke_count - 1))
+        strokes = [{chemical: microliters * volume_ul / total_ul if total_ul else 0
+                    for chemical, microliters in solution.items()}
+                   for volume_ul in stroke_volumes_ul[:-1]]
+        last_stroke = {chemical: microliters - sum(s[chemical] for s in strokes)
+                       for chemical, microliters in solution.items()}
+        return strokes + [last_stroke]
+
+    @lock_flowpath
+    def _dispense(self, solution: dict[str, float]):
+        """Aspirate each chemical of the solution in turn into the syringe
+        and dispense them into the reaction vessel in as many evenly-sized
+        strokes as needed, then purge the pump-to-vessel line once."""
+        microliters = sum(solution.values())
         # Safety checks:
         if microliters + self.rxn_vessel.curr_volume_ul > self.rxn_vessel.max_volume_ul:
             raise ValueError("Requested dispense amount would exceed vessel capacity.")
         # State checks:
-        if chemical not in self.selector_lds_map:
-            raise ValueError(f"{chemical} is not a valid chemical.")
-        if chemical not in self.prime_volumes_ul:
-            self.log.warning(f"{chemical} has not yet been primed. Priming now.")
-            self.prime_reservoir_line(chemical)
-        waste_id = self.get_compatible_waste_vessel_id(chemical)
-        self.prime_pump_line(chemical) # Prime pump line.
-        self.log.info(f"Dispensing {microliters}uL of {chemical} to vessel.")
+        for chemical in solution:
+            if chemical not in self.selector_lds_map:
+                raise ValueError(f"{chemical} is not a valid chemical.")
+        # Prime all reservoir lines first since priming requires an empty syringe.
+        for chemical in solution:
+            if chemical not in self.prime_volumes_ul:
+                self.log.warning(f"{chemical} has not yet been primed. Priming now.")
+                self.prime_reservoir_line(chemical)
+        waste_id = self._get_step_waste_vessel_id(*solution)
+        self.prime_pump_line(next(iter(solution))) # Prime pump line.
+        # Size the first stroke to leave room for the gas drawn in while
+        # priming. Later strokes start with an empty syringe.
+        strokes = self.plan_strokes(
+            solution, self.pump.syringe_volume_ul,
+            first_stroke_capacity_ul=(self.pump.syringe_volume_ul
+                                      - self.pump.get_position_ul()))
+        self.log.info(f"Dispensing {solution} [uL] to vessel in "
+                      f"{len(strokes)} stroke(s).")
         # Set outlet flowpath starting configuration.
-        self.rv_source_valve.energize()
-        self.rv_exhaust_valve.energize()
-        self.output_bypass_valves[waste_id].energize()
-        self.selector.move_to_port(chemical)
+        self.valve_bank.set_states({self.rv_source_valve: True,
+                                    self.rv_exhaust_valve: True,
+                                    self.output_bypass_valves[waste_id]: True})
         pump_to_common_dv_ul = 10.0 # FIXME: magic number. get this from a graph.
-        # Subtract off pump-to-common dead volume because we will introduce
-        # this volume back when we fully purge the pump-to-vessel flowpath.
-        self.pump.withdraw(microliters - pump_to_common_dv_ul)
-        self.selector.move_to_port("outlet")
-        # Fully plunge. Note: some liquid will remain in the pump-to-vessel
-        # path at this point.
-        self.log.debug(f"Plunging initial {microliters - pump_to_common_dv_ul}[uL].")
-        self.pump.move_absolute_in_percent(0)
+        for stroke_index, stroke in enumerate(strokes):
+            for index, (chemical, chemical_ul) in enumerate(stroke.items()):
+                self.selector.move_to_port(chemical)
+                # Subtract off pump-to-common dead volume from the very first
+                # withdrawal because it is already in the primed pump line and
+                # will be introduced when we fully purge the pump-to-vessel
+                # flowpath. Every later withdrawal pushes the previous contents
+                # out of the pump line and leaves the same dead volume behind.
+                withdraw_ul = chemical_ul
+                if stroke_index == 0 and index == 0:
+                    withdraw_ul -= pump_to_common_dv_ul
+                self.log.debug(f"Withdrawing {withdraw_ul}[uL] of {chemical}.")
+                self.pump.withdraw(withdraw_ul)
+                self.reservoir_inventory.dispense(chemical, withdraw_ul)
+                self.pump_is_primed_with = chemical
+            self.selector.move_to_port("outlet")
+            # Fully plunge. Note: some liquid will remain in the
+            # pump-to-vessel path at this point.
+            self.log.debug(f"Plunging stroke {stroke_index + 1}/{len(strokes)}.")
+            self.pump.move_absolute_in_percent(0)
+            # Update State for all but the last stroke, which finishes
+            # delivering with the purge.
+            if stroke_index < len(strokes) - 1:
+                self.rxn_vessel.add_solution(**stroke)
         self.log.debug(f"Plunging remaining {pump_to_common_dv_ul}[uL]"
                        f"(pump-to-vessel dead volume) to clear line and "
                        f"fully dispense {microliters}[uL].")
@@ -565,12 +850,14 @@ class BrainWasher:
         self.purge_pump_line(self.pump_is_primed_with,
                              destination=self.rxn_vessel, gas_cycles=1)
         ## Update State:
-        self.rxn_vessel.add_solution(**{chemical: microliters})
+        self.rxn_vessel.add_solution(**strokes[-1])
         self.pump_is_primed_with = None
+        if self.waste_plan:
+            self._rxn_vessel_waste_id = waste_id
         # Seal reaction vessel and all other flowpaths.
-        self.rv_source_valve.deenergize()
-        self.rv_exhaust_valve.deenergize()
-        self.output_bypass_valves[waste_id].deenergize()
+        self.valve_bank.set_states({self.rv_source_valve: False,
+                                    self.rv_exhaust_valve: False,
+                                    self.output_bypass_valves[waste_id]: False})
         self.log.debug(f"Dispensed {microliters}[uL] into reaction vessel. "
                        f"Prime line is now cleared.")
 
@@ -583,13 +870,15 @@ class BrainWasher:
         self.log.info(msg)
         # Select chemically-compatible flowpath depending on the waste contents.
         components = set(self.rxn_vessel.solution.keys())
-        waste_id = self.get_compatible_waste_vessel_id(*components)
+        waste_id = self._get_planned_waste_vessel_id(
+            *components, planned_id=self._rxn_vessel_waste_id)
         self.log.debug(f"Waste contents will be discarded to "
                        f"{self.waste_vessels[waste_id].name}.")
         # Set outlet flowpath starting configuration.
-        self.rv_source_valve.energize()
-        self.rv_exhaust_valve.deenergize()  # Lock out the rv top exhaust port.
-        self.waste_drain_valves[waste_id].energize()  # Open rv lower drain path.
+        self.valve_bank.set_states({
+            self.rv_source_valve: True,
+            self.rv_exhaust_valve: False,  # Lock out the rv top exhaust port.
+            self.waste_drain_valves[waste_id]: True})  # Open rv lower drain path.
         self.pump.set_speed_percent(self.pump_purge_speed_percent)
         # Pump through the specified volume with gas.
         # Note: gas is compressible, so the volume displaced is less than
@@ -607,14 +896,15 @@ class BrainWasher:
             # Fully plunge syringe.
             self.pump.move_absolute_in_percent(0)
             remaining_volume_ul -= stroke_volume_ul
-            sleep(0.5)  # Wait for liquid to finish moving (system to hit equilibrium).
+            self.clock.sleep(0.5)  # Wait for liquid to finish moving (system to hit equilibrium).
         self.pump.set_speed_percent(self.nominal_pump_speed_percent)
         # Update State:
         self.rxn_vessel.purge_solution()
+        self._rxn_vessel_waste_id = None
         # Close valves
-        self.rv_source_valve.deenergize()
-        self.rv_exhaust_valve.deenergize()
-        self.waste_drain_valves[waste_id].deenergize()
+        self.valve_bank.set_states({self.rv_source_valve: False,
+                                    self.rv_exhaust_valve: False,
+                                    self.waste_drain_valves[waste_id]: False})
 
     @lock_flowpath
     def fast_gas_charge_syringe(self, percent: float = 100):
@@ -672,7 +962,7 @@ class BrainWasher:
         # Decide if we will use intermittent mixing.
         slow_mix_times = [intermittent_mixing_on_time_s,
                           intermittent_mixing_off_time_s]
-        intermittent_mixing = all([i is not None for i in slow_mix_times])
+        intermittent_mixing = all([i is not None and i > 0 for i in slow_mix_times])
         # Validate chemicals.
         #common_chemicals = self.selector_lds_map.keys() & solution.keys()
         used_chemicals = set(solution.keys())
@@ -686,8 +976,7 @@ class BrainWasher:
         # Fill
         if len(solution):
             self.log.info(f"Filling vessel with solution: {solution}.")
-        for chemical_name, ul in solution.items():
-            self.dispense_to_vessel(ul, chemical_name)
+            self.dispense_solution_to_vessel(**solution)
         if mix_speed_rpm > 0:
             try:
                 self.mixer.set_mixing_speed(mix_speed_rpm)
@@ -706,30 +995,63 @@ class BrainWasher:
                           f"[rpm]" + intermittent_mixing_msg + ".")
         elif duration_s > 0:
             self.log.info(f"Idling for {duration_s} seconds.")
-        start_time_s = now()
+        start_time_s = self.clock.now()
         if mix_speed_rpm > 0:
             self.mixer.start_mixing()
         # Wait while implementing intermittent mixing strategy.
-        while (now() - start_time_s) < duration_s:
+        # The flowpath is static, so pressure only needs a slow heartbeat.
+        with self._static_flowpath(until_s=start_time_s + duration_s):
+            if not self._wait_for_wash_step(start_time_s, duration_s,
+                                            mix_speed_rpm, intermittent_mixing,
+                                            intermittent_mixing_on_time_s,
+                                            intermittent_mixing_off_time_s):
+                return
+        # Drain (if required).
+        if end_empty:
+            self.drain_vessel()
+
+    def _wait_for_wash_step(self, start_time_s: float, duration_s: float,
+                            mix_speed_rpm: float, intermittent_mixing: bool,
+                            intermittent_mixing_on_time_s: float,
+                            intermittent_mixing_off_time_s: float) -> bool:
+        """Wait out a wash step, waking only to switch the mixer on or off,
+        to handle a pause (or abort) request, or at the end of the step.
+
+        Intermittent mixing transitions are scheduled from `start_time_s` so
+        that they do not drift over long steps.
+
+        :return: True if the step ran to completion; False if it was paused.
+        """
+        mix_period_s = (intermittent_mixing_on_time_s
+                        + intermittent_mixing_off_time_s) if intermittent_mixing else None
+        mixing = mix_speed_rpm > 0
+        while (elapsed_time_s := self.clock.now() - start_time_s) < duration_s:
             # Handle pause request if called in a "job" context.
             if self.job_worker and self.job_worker.is_alive() and self.pause_requested.is_set():
-                elapsed_time_s = round(now() - start_time_s)
+                if mixing:
+                    self.mixer.stop_mixing()
+                elapsed_time_s = round(elapsed_time_s)
                 action_msg = "mixing" if mix_speed_rpm else "idling"
                 self.log.warning(f"Aborting after {elapsed_time_s}[s] of {action_msg}.")
                 self.resume_state_overrides.update(duration_s=(duration_s - elapsed_time_s))
-                return
-            if not intermittent_mixing:
-                sleep(0.010)
-                continue
-            sleep(intermittent_mixing_on_time_s)
+                return False
+            wake_time_s = duration_s
+            if mix_period_s and mix_speed_rpm > 0:
+                cycle_start_time_s = elapsed_time_s - elapsed_time_s % mix_period_s
+                on_end_time_s = cycle_start_time_s + intermittent_mixing_on_time_s
+                should_mix = elapsed_time_s < on_end_time_s
+                if should_mix and not mixing:
+                    self.mixer.start_mixing()
+                elif mixing and not should_mix:
+                    self.mixer.stop_mixing()
+                mixing = should_mix
+                wake_time_s = min(duration_s, on_end_time_s if should_mix
+                                  else cycle_start_time_s + mix_period_s)
+            # Wake early only to handle a pause request.
+            self.clock.wait(self.pause_requested, wake_time_s - elapsed_time_s)
+        if mixing:
             self.mixer.stop_mixing()
-            sleep(intermittent_mixing_off_time_s)
-            self.mixer.start_mixing()
-        if mix_speed_rpm > 0:
-            self.mixer.stop_mixing()
-        # Drain (if required).
-        if end_empty:
-            self.drain_vessel()
+        return True
 
     @lock_flowpath
     def mix(self, duration_s: int, mix_speed_rpm: float = 1000,
@@ -754,42 +1076,57 @@ class BrainWasher:
             to create the job or None to create an empty job file.
         """
         job_path = Path(job_path)
-        source_path = Path(source)
         # Create from an empty job (default).
-        if not job_path.exists():
-            job = Job(name=job_path.stem)  # Name without suffix
-            with open(job_path) as job_file:
-                yaml.dump(job.model_dump(exclude_none=True), job_file)
-            self.log.info(f"Created an empty job file.")
-            return
+        if source is None:
+            job = Job(name=job_path.stem, starting_solution={})  # Name without suffix
+            self.log.info(f"Creating an empty job file.")
         # Create from an existing job.
-        if source_path.suffix.lower() in ["yaml", "yml"]:
-            with open(source_path) as source_job, open(job_path) as job_file:
-                job_dict = yaml.safe_load(source_job)
-                job = Job(**job_dict)  # validate
-                job.purge_history()
-                job.set_source_protocol(source_path)
-                yaml.dump(job.model_dump(exclude_none=True), job_file)
-                self.log.info(f"Created job file from an existing job file.")
-                return
+        elif (source_path := Path(source)).suffix.lower() in [".yaml", ".yml"]:
+            job = self.job_loader.load(source_path)  # validate
+            job.purge_history()
+            job.set_source_protocol(source_path)
+            self.log.info(f"Creating job file from an existing job file.")
         # Create from a csv-style protocol.
-        if job_path.suffix.lower() == "csv":
-            protocol = Protocol(job_path)
-            # TODO: create a job from the protocol
-            raise NotImplementedError("Cannot convert csv files to jobs yet!")
-            #yaml.dump(job.model_dump(exclude_none=True), job_path)
-
-    def validate_job_against_instrument(self, job: Job):
-        """Validate that the job can be executed on this instrument configuration"""
+        elif source_path.suffix.lower() == ".csv":
+            protocol = Protocol(source_path)
+            job = protocol.to_job(name=job_path.stem,
+                                  max_volume_ul=self.rxn_vessel.max_volume_ul,
+                                  max_mix_speed_rpm=self.mixer.rpm_range[1],
+                                  source=source_path)
+            self.log.info(f"Creating job file from a protocol.")
+        else:
+            raise ValueError(f"Cannot create a job from {source_path.name}. "
+                             "Source must be a yaml job or a csv protocol.")
+        with open(job_path, "w") as job_file:
+            yaml.dump(job.model_dump(exclude_none=True), job_file)
+
+    def validate_job_against_instrument(self, job: Job,
+                                        waste_volumes_ul: list[float] = None,
+                                        reservoir_volumes_ul: dict[str, float] = None,
+                                        start_step: int = 0) -> WastePlan:
+        """Validate that the job can be executed on this instrument configuration
+
+        :param waste_volumes_ul: per-waste-vessel volumes to start from,
+            which are updated in place with the job's waste so that several
+            jobs can be validated back-to-back. Defaults to the current
+            waste vessel volumes.
+        :param reservoir_volumes_ul: tracked reservoir levels to start from,
+            which are updated in place like `waste_volumes_ul`. Defaults to
+            the current reservoir levels.
+        :param start_step: first step still to run, i.e: when resuming a
+            paused job. Earlier steps have already drawn from the reservoirs.
+        :return: where each step's waste goes and the waste vessel headroom
+            at the end of the job. See :meth:`plan_waste_routing`.
+        """
         # Ensure all solution volumes fit in reaction vessel
+        step_volumes_ul = job.index.step_waste_ul  # Each step's solution volume.
         volume_errors = []
-        for index, step in enumerate(job.protocol):
-            if step.solution_volume_ul > self.rxn_vessel.max_volume_ul:
-                msg = (f"Step {index}: solution total volume "
-                       f"({step.solution_volume_ul} [uL]) exceeds reaction "
-                       f"vessel volume ({self.rxn_vessel.max_volume_ul} [uL]).")
-                self.log.error(msg)
-                volume_errors.append(msg)
+        for index in np.flatnonzero(step_volumes_ul > self.rxn_vessel.max_volume_ul):
+            msg = (f"Step {index}: solution total volume "
+                   f"({step_volumes_ul[index]} [uL]) exceeds reaction "
+                   f"vessel volume ({self.rxn_vessel.max_volume_ul} [uL]).")
+            self.log.error(msg)
+            volume_errors.append(msg)
         if volume_errors:
             raise ValueError("Job volumes are not compatible with the size "
                              "of the instrument reaction vessel: "
@@ -799,43 +1136,69 @@ class BrainWasher:
             raise ValueError(f"Job chemicals are not plumbed on the machine; "
                              f"Job chemicals: {job.chemicals}, "
                              f"loaded chemicals: {self.plumbed_chemicals}.")
+        # Route the whole job's waste to need as few interventions as possible.
+        plan = self.plan_waste_routing(job, waste_volumes_ul, start_step)
         # Ensure each step solution can be dumped to a compatible waste vessel.
         waste_compatibility_errors = []
-        for index, step in enumerate(job.protocol):
-            components = set(step.solution.keys())
-            # Find at least one vessel that the solution can be dumped.
-            solution_has_valid_waste = self.get_compatible_waste_vessel_id(*components)
-            if solution_has_valid_waste is None:
-                msg = f"Step {index} solution has no designated waste. " \
-                      f"Solution components: {components}. "
-                self.log.error(msg)
-                waste_compatibility_errors.append(msg)
+        for index in plan.incompatible_steps:
+            components = job.protocol[index].components
+            msg = f"Step {index} solution has no designated waste. " \
+                  f"Solution components: {components}. "
+            self.log.error(msg)
+            waste_compatibility_errors.append(msg)
         if waste_compatibility_errors:
             raise ValueError("Job is not chemically compatible with waste "
                              f"vessels. The following steps cannot be dumped "
                              f"to any waste vessel: {waste_compatibility_errors}")
         # Ensure waste vessels can accommodate solutions across every job step.
-        # Easiest way to check this is to just run it on a copy.
-        waste_vessels = deepcopy(self.waste_vessels)
-        for index, step in enumerate(job.protocol):
-            waste_vessel_id = self.get_compatible_waste_vessel_id(*step.components,
-                                                                  waste_vessels=waste_vessels)
-            # Raises an error if we're at capacity.
-            waste_vessels[waste_vessel_id].add_solution(**step.solution)
-        self.log.info(f"Job passed validation against instrument capabilities.")
+        if plan.interventions:
+            overflows = [f"{self.waste_vessels[waste_vessel_id].name} at step "
+                         f"{step}" for step, waste_vessel_id in plan.interventions]
+            msg = (f"Waste vessels would overflow unless emptied "
+                   f"{len(plan.interventions)} time(s): {', '.join(overflows)}.")
+            self.log.error(msg)
+            raise ValueError(msg)
+        # Ensure tracked reservoirs hold enough for every job step.
+        forecast = self.reservoir_inventory.forecast(
+            job, reservoir_volumes_ul, start_step=start_step,
+            primed_chemicals=self.prime_volumes_ul)
+        if forecast.shortfall_steps:
+            shortfalls = [f"{chemical} at step {step} (short by "
+                          f"{-forecast.volumes_ul[chemical]:.1f} [uL] at job end)"
+                          for chemical, step in forecast.shortfall_steps.items()]
+            msg = f"Reservoirs would run dry: {', '.join(shortfalls)}."
+            self.log.error(msg)
+            raise ValueError(msg)
+        if waste_volumes_ul is not None:
+            waste_volumes_ul[:] = plan.volumes_ul
+        if reservoir_volumes_ul is not None:
+            reservoir_volumes_ul.update(forecast.volumes_ul)
+        headroom = {wv.name: headroom_ul for wv, headroom_ul
+                    in zip(self.waste_vessels, plan.headroom_ul)}
+        self.log.info(f"Job passed validation against instrument capabilities. "
+                      f"Waste vessel headroom at job end [uL]: {headroom}. "
+                      f"Tracked reservoir levels at job end [uL]: "
+                      f"{forecast.volumes_ul}.")
+        return plan
+
+    def plan_waste_routing(self, job: Job, waste_volumes_ul: list[float] = None,
+                           start_step: int = 0) -> WastePlan:
+        """Route the job's waste, including waste from priming and purging,
+        to waste vessels so that they need emptying as few times as possible.
+
+        :param waste_volumes_ul: per-waste-vessel volumes to start from.
+            Defaults to the current waste vessel volumes.
+        :param start_step: first step to plan, i.e: when resuming a job.
+        """
+        return optimize_waste_plan(job, self.waste_vessels, waste_volumes_ul,
+                                   start_step=start_step,
+                                   prime_waste_ul=self.prime_waste_ul,
+                                   purge_waste_ul=self.purge_waste_ul,
+                                   primed_chemicals=self.prime_volumes_ul)
 
     def _load_job(self, job_path: str) -> Job:
-        job_path = Path(job_path)
-        if not job_path.exists():
-            raise FileNotFoundError(f"Job does not exist at location: "
-                                    f"{job_path.resolve()}")
-        with open(job_path) as yaml_stream:
-            self.log.debug(f"Loading job from: {job_path.absolute()}")
-            job_dict = yaml.safe_load(yaml_stream)
-            logging.debug(f"Validating job from file.")
-            job = Job(**job_dict)  # validate
-            logging.debug(f"Job is a valid job.")
-            return job
+        job = self.job_loader.load(job_path)
+        return JobJournal.replay(job_path, job)
 
     def run(self, job_path: str):
         """Run the job specified from the specified filepath."""
@@ -843,7 +1206,8 @@ class BrainWasher:
             raise ValueError("Cannot run another job while an existing "
                              "job is running.")
         job = self._load_job(job_path)
-        self.validate_job_against_instrument(job)
+        start_step = job.resume_state.step if job.resume_state else 0
+        self.validate_job_against_instrument(job, start_step=start_step)
         logging.debug(f"Launching job worker thread.")
         # Run job in a separate thread to lock out flowpath
         # and support pause/resume control.
@@ -870,8 +1234,11 @@ class BrainWasher:
                 raise ValueError("When resuming, reaction vessel starting "
                                  "solution does not match the correct resume "
                                  "state starting solution.")
-            job.clear_resume_state()
+            journal = JobJournal(job_path, job)
             job.record_resume()
+            # Keep the resume state on disk until the first step checkpoints.
+            journal.checkpoint(job)
+            job.clear_resume_state()
         else:
             start_step = 0
             start_step_overrides = None
@@ -882,7 +1249,9 @@ class BrainWasher:
                 raise ValueError("When starting, reaction vessel starting "
                                  "solution does not match the correct resume "
                                  "state starting solution.")
+            journal = JobJournal(job_path, job)
             job.record_start()
+            journal.checkpoint(job)
         log_msg = f"{starting_or_resuming_msg} job: '{job.name}'"
         if start_step > 0:
             log_msg += f" at step {start_step+1}."  # Steps in logs are 1-indexed.
@@ -890,47 +1259,59 @@ class BrainWasher:
             log_msg += ". "
         log_msg += f"Job should take {timedelta(seconds=job.get_duration_s(start_step))}."
         self.log.info(log_msg)
+        # Drain, purge, and prime waste follows the plan for the whole job.
+        self.waste_plan = self.plan_waste_routing(job, start_step=start_step)
+        for step, waste_vessel_id in self.waste_plan.interventions:
+            self.log.warning(f"{self.waste_vessels[waste_vessel_id].name} must "
+                             f"be emptied before step {step+1}.")
         # Execute the protocol.
-        for index, step in enumerate(job.protocol[start_step:], start=start_step):
-            resume_step = index # Save resume step in case of unhandled exception.
-            try:
-                # Apply overrides (recursive) on the first (ie resume) step only.
-                if index == start_step and start_step_overrides:
-                    step = step.model_copy(update=start_step_overrides)
-                    self.log.info(f"Applying overrides to starting step: "
-                                  f"{start_step_overrides}.")
-                # Convert step parameters to valid function parameters.
-                kwargs = step.model_dump(exclude='solution')  # omit **solution
-                kwargs.update(step.solution)  # splat **solution
-                self.log.info(f"Conducting step: "
-                              f"{index + 1}/{len(job.protocol)} with "
-                              f"{step.solution}")
-                # Run step.
-                self.run_wash_step(**kwargs)
-                # Handle pause state.
-                # Save current step if not completed (overrides present) or
-                # next step if the current step completed.
-                resume_step = index if self.resume_state_overrides else index + 1
-                if self.pause_requested.is_set():
-                    # Note: steps are 1-indexed when referenced in logs.
-                    self.log.warning(f"Pausing system at step {resume_step+1}.")
-                    job.record_pause()
-                    self.pause_requested.clear()
-                    self.log.info(f"System paused.")
-                    return  # Will execute finally block first.
-            finally:
-                # Always save the current step in case of an unhandled exception
-                # or power failure.
-                job.save_resume_state(resume_step, step.solution,
-                                      **self.resume_state_overrides)
-                self.resume_state_overrides = {}
-                with open(job_path, "w") as job_file:
-                    yaml.dump(job.model_dump(exclude_none=True), job_file)
-                self.log.debug(f"Job progress saved to: {job_path}")
-        job.clear_resume_state()
-        job.record_finish()
-        with open(job_path, "w") as job_file:
-            yaml.dump(job.model_dump(exclude_none=True), job_file)
+        # Progress is journaled after every step and compacted into the
+        # job file when the job finishes, pauses, or fails.
+        try:
+            for index, step in enumerate(job.protocol[start_step:], start=start_step):
+                resume_step = index # Save resume step in case of unhandled exception.
+                self.job_step = index
+                try:
+                    # Apply overrides (recursive) on the first (ie resume) step only.
+                    if index == start_step and start_step_overrides:
+                        step = step.model_copy(update=start_step_overrides)
+                        self.log.info(f"Applying overrides to starting step: "
+                                      f"{start_step_overrides}.")
+                    # Convert step parameters to valid function parameters.
+                    kwargs = step.model_dump(exclude='solution')  # omit **solution
+                    kwargs.update(step.solution)  # splat **solution
+                    self.log.info(f"Conducting step: "
+                                  f"{index + 1}/{len(job.protocol)} with "
+                                  f"{step.solution}")
+                    # Run step.
+                    self.run_wash_step(**kwargs)
+                    # Handle pause state.
+                    # Save current step if not completed (overrides present) or
+                    # next step if the current step completed.
+                    resume_step = index if self.resume_state_overrides else index + 1
+                    if self.pause_requested.is_set():
+                        # Note: steps are 1-indexed when referenced in logs.
+                        self.log.warning(f"Pausing system at step {resume_step+1}.")
+                        job.record_pause()
+                        self.pause_requested.clear()
+                        if self.abort_requested.is_set():
+                            self.abort_requested.clear()
+                            self.halt()
+                        self.log.info(f"System paused.")
+                        return  # Will execute finally block first.
+                finally:
+                    self.job_step = -1
+                    # Always save the current step in case of an unhandled exception
+                    # or power failure.
+                    job.save_resume_state(resume_step, step.solution,
+                                          **self.resume_state_overrides)
+                    self.resume_state_overrides = {}
+                    journal.checkpoint(job)
+            job.clear_resume_state()
+            job.record_finish()
+        finally:
+            self.waste_plan = None
+            journal.compact(job)
         self.log.info(f"Finished job: {job.name} from {job_path}")
 
     def pause(self):
@@ -943,7 +1324,18 @@ class BrainWasher:
         self.pause_requested.set()
 
     def abort(self):
-        raise NotImplementedError
+        """Request that the system stop the currently running protocol as soon
+        as the current fluid operation finishes, then halt all active
+        components.
+
+        Progress is saved as if paused so that the job can be resumed.
+        """
+        if self.job_worker is None or not self.job_worker.is_alive():
+            self.log.error("Ignoring abort request. System is not running a protocol.")
+            return
+        self.log.warning("Requesting system abort.")
+        self.abort_requested.set()
+        self.pause_requested.set()
 
     @lock_flowpath
     def run_leak_checks(self):
@@ -989,8 +1381,7 @@ class BrainWasher:
     def leak_check_syringe_to_rv_exaust_normally_open_path(self):
         try:
             self.log.debug("Creating closed volume.")
-            self.deenergize_all_valves()
-            self.rv_exhaust_valve.energize()
+            self.valve_bank.energize_only(self.rv_exhaust_valve)
             self.fast_gas_charge_syringe(30)
             self.selector.move_to_port("outlet")
             # Measure:
@@ -1028,8 +1419,7 @@ class BrainWasher:
     def leak_check_syringe_to_reaction_vessel(self):
         try:
             self.log.debug("Creating closed volume.")
-            self.deenergize_all_valves()
-            self.rv_source_valve.energize()
+            self.valve_bank.energize_only(self.rv_source_valve)
             self.fast_gas_charge_syringe(30)
             self.selector.move_to_port("outlet")
             # Measure:
@@ -1047,11 +1437,11 @@ class BrainWasher:
             vapor_components = set(self.rxn_vessel.solution.keys())
             waste_vessel_id = self.get_compatible_waste_vessel_id(*vapor_components)
             # TODO: waste_vessel_id could be None but shouldn't be at this point.
-            self.output_bypass_valves[waste_vessel_id].energize()
-            self.rv_exhaust_valve.energize()
-            sleep(0.5)
-            self.output_bypass_valves[waste_vessel_id].deenergize()
-            self.rv_exhaust_valve.deenergize()
+            self.valve_bank.set_states({self.output_bypass_valves[waste_vessel_id]: True,
+                                        self.rv_exhaust_valve: True})
+            self.clock.sleep(0.5)
+            self.valve_bank.set_states({self.output_bypass_valves[waste_vessel_id]: False,
+                                        self.rv_exhaust_valve: False})
         self.log.info("leak check passed: syringe -><- reaction vessel path.")
 
     @lock_flowpath
@@ -1077,18 +1467,19 @@ class BrainWasher:
         self.log.debug("Squeezing closed volume.")
         self.pump.move_absolute_in_percent(pump_compressed_position_percent)
         # Monitor starting pressure and pressure change.
-        sleep(1)
+        self.clock.sleep(1)
         compressed_pressure = self.get_average_psig(1)
         self.log.debug(f"Compressed pressure: {compressed_pressure:.3f}")
         if ((compressed_pressure - uncompressed_pressure)
                 < self.MIN_LEAK_CHECK_STARTING_PRESSURE_PSIG):
             raise LeakCheckError("Syringe cannot create a positive relative "
                                  "pressure within the starting volume.")
-        start_time_s = now()
-        while now() - start_time_s < measurement_time_s:
+        start_time_s = self.clock.now()
+        while self.clock.now() - start_time_s < measurement_time_s:
             curr_pressure = self.get_average_psig(0.5)
             delta = abs(compressed_pressure - curr_pressure)
-            self.log.debug(f"Pressure delta: {delta:.3f}")
+            self.log.debug(f"Pressure delta: {delta:.3f}, trend: "
+                           f"{self.get_pressure_slope_psig_per_s(0.5):.4f}[psig/s]")
             if delta > self.MAX_LEAK_CHECK_PRESSURE_DELTA_PSIG:
                 raise LeakCheckError("Pressure change is significant enough"
                                      "to indicate a leak.")
@@ -1096,10 +1487,9 @@ class BrainWasher:
     @lock_flowpath
     def _purge_gas_filled_syringe(self):
         self.log.debug("Purging gas-filled syringe to waste.")
-        self.deenergize_all_valves()
         vapor_components = set(self.rxn_vessel.solution.keys())
         waste_vessel_id = self.get_compatible_waste_vessel_id(*vapor_components)
         # TODO: waste_vessel_id could be None but shouldn't be at this point.
-        self.output_bypass_valves[waste_vessel_id].energize()
+        self.valve_bank.energize_only(self.output_bypass_valves[waste_vessel_id])
         self.pump.move_absolute_in_percent(0)
         self.output_bypass_valves[waste_vessel_id].deenergize()
@@ -0,0 +1,217 @@
+"""Run several BrainWasher instruments from one controller process."""
+
+import logging
+
+from brainwasher.clock import Clock
+from brainwasher.devices.instruments.brainwasher import BrainWasher, PrimeState
+from pathlib import Path
+from threading import Condition
+
+
+class SharedHardwareScheduler:
+    """Decide which of several instruments that share hardware may change
+    its flowpath next.
+
+    An instrument that is only mixing (or idling) lends the shared hardware
+    out until its static flowpath is due to change. Another instrument is
+    only admitted if its fluid operation should finish by then, so that it
+    does not stretch the mixing instrument's timed step. An instrument
+    returning from its mixing window goes first.
+
+    Each instrument's next fluid operation is assumed to take as long as
+    its last one did.
+
+    .. note::
+       An instrument whose operations never fit between the others' mixing
+       windows waits until those instruments stop mixing.
+
+    """
+
+    def __init__(self, instruments: dict[str, BrainWasher], clock: Clock):
+        """
+        :param instruments: dict, keyed by name, of instruments that share
+            hardware.
+        :param clock: timekeeper shared with the instruments.
+        """
+        self.instruments = instruments
+        self.clock = clock
+        # Time each instrument last held the shared hardware for.
+        self.hold_estimates_s = {name: 0. for name in instruments}
+        self._condition = Condition()
+        self._holder = None
+        self._acquired_time_s = None
+        self._waiting = set()
+
+    def get_lock(self, name: str) -> "ScheduledLock":
+        """Lock-like handle for the named instrument's shared hardware."""
+        return ScheduledLock(self, name)
+
+    def _static_until_s(self, name: str) -> float | None:
+        return self.instruments[name].flowpath_static_until_s
+
+    def admits(self, name: str) -> bool:
+        """True if the named instrument may take the shared hardware now."""
+        with self._condition:
+            return self._admits(name)
+
+    def _admits(self, name: str) -> bool:
+        if self._holder is not None:
+            return False
+        returning = [n for n in self._waiting | {name}
+                     if self._static_until_s(n) is not None]
+        if returning:
+            # Whoever's mixing window ended first goes first.
+            return name == min(returning, key=self._static_until_s)
+        finish_time_s = self.clock.now() + self.hold_estimates_s[name]
+        return all(finish_time_s <= self._static_until_s(other)
+                   for other in self.instruments
+                   if other != name and self._static_until_s(other) is not None)
+
+    def acquire(self, name: str):
+        with self._condition:
+            self._waiting.add(name)
+            self._condition.wait_for(lambda: self._admits(name))
+            self._waiting.remove(name)
+            self._holder = name
+            self._acquired_time_s = self.clock.now()
+
+    def release(self, name: str):
+        with self._condition:
+            if self._holder != name:
+                raise RuntimeError(f"{name} does not hold the shared hardware.")
+            self.hold_estimates_s[name] = self.clock.now() - self._acquired_time_s
+            self._holder = None
+            self._condition.notify_all()
+
+
+class ScheduledLock:
+    """Stand-in for an instrument's `shared_hardware_lock` that defers to a
+    `SharedHardwareScheduler`."""
+
+    def __init__(self, scheduler: SharedHardwareScheduler, name: str):
+        self.scheduler = scheduler
+        self.name = name
+
+    def acquire(self):
+        self.scheduler.acquire(self.name)
+
+    def release(self):
+        self.scheduler.release(self.name)
+
+
+class BrainWasherOrchestrator:
+    """Run jobs on several `BrainWasher` instruments at once.
+
+    Instruments that share hardware (i.e: a common reagent selector, pump,
+    valves, or waste vessels) are grouped so that only one of them changes
+    the flowpath at a time. Each instrument lends its shared hardware to the
+    others while its reaction vessel is only mixing or idling, so one
+    vessel's fills and drains interleave with another vessel's mixing. A
+    `SharedHardwareScheduler` per group only lends it for operations that
+    should finish before the lender's mixing window ends. Instruments in a
+    group also share what the reservoir lines and pump line are primed
+    with, so none of them skips priming or reuses a line that another has
+    filled with a different chemical.
+    """
+
+    def __init__(self, instruments: dict[str, BrainWasher]):
+        """
+        :param instruments: dict, keyed by name, of instruments to run.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.instruments = instruments
+        self.hardware_groups = self.group_by_shared_hardware(instruments)
+        self.schedulers = {}  # Keyed by instrument name.
+        for group in self.hardware_groups:
+            if len(group) < 2:
+                continue
+            self.log.info(f"Instruments {sorted(group)} share hardware and "
+                          "will interleave fluid operations.")
+            if running := [name for name in group
+                           if self.instruments[name].flowpath_locked]:
+                raise RuntimeError(f"Cannot share hardware with instruments "
+                                   f"{running} while they are running.")
+            members = {name: self.instruments[name] for name in sorted(group)}
+            scheduler = SharedHardwareScheduler(
+                members, clock=next(iter(members.values())).clock)
+            prime_state = self._merge_prime_states(
+                [instrument.prime_state for instrument in members.values()])
+            for name, instrument in members.items():
+                self.schedulers[name] = scheduler
+                instrument.shared_hardware_lock = scheduler.get_lock(name)
+                instrument.prime_state = prime_state
+
+    @staticmethod
+    def _merge_prime_states(prime_states: list[PrimeState]) -> PrimeState:
+        """One prime state for instruments that start out with their own.
+
+        A reservoir line only counts as primed if every instrument agrees
+        that it is, and the pump line only counts as primed if every
+        instrument agrees on the chemical. Anything else is re-primed.
+        """
+        merged = PrimeState()
+        common = set.intersection(*(set(p.prime_volumes_ul) for p in prime_states))
+        for chemical in common:
+            merged.prime_volumes_ul[chemical] = max(
+                p.prime_volumes_ul[chemical] for p in prime_states)
+        pump_chemicals = {p.pump_is_primed_with for p in prime_states}
+        if len(pump_chemicals) == 1:
+            merged.pump_is_primed_with = pump_chemicals.pop()
+        return merged
+
+    @staticmethod
+    def get_hardware(instrument: BrainWasher) -> list:
+        """Devices that alter an instrument's flowpath."""
+        return [instrument.selector, instrument.pump,
+                instrument.rv_source_valve, instrument.rv_exhaust_valve,
+                *instrument.output_bypass_valves,
+                *instrument.waste_drain_valves, *instrument.waste_vessels]
+
+    @classmethod
+    def group_by_shared_hardware(cls, instruments: dict[str, BrainWasher]
+                                 ) -> list[set[str]]:
+        """Partition instrument names into groups that (transitively) share
+        any flowpath hardware."""
+        groups = []
+        for name, instrument in instruments.items():
+            hardware = {id(device) for device in cls.get_hardware(instrument)}
+            group, merged_hardware = {name}, hardware
+            for other_group, other_hardware in list(groups):
+                if other_hardware & hardware:
+                    groups.remove((other_group, other_hardware))
+                    group |= other_group
+                    merged_hardware |= other_hardware
+            groups.append((group, merged_hardware))
+        return [group for group, _ in groups]
+
+    def run(self, jobs: dict[str, str]):
+        """Start a job on each of the specified instruments.
+
+        :param jobs: dict, keyed by instrument name, of job file paths.
+        """
+        if missing := jobs.keys() - self.instruments.keys():
+            raise ValueError(f"Unrecognized instruments: {missing}.")
+        for name, job_path in jobs.items():
+            self.log.info(f"Starting job {job_path} on instrument '{name}'.")
+            self.instruments[name].run(Path(job_path))
+
+    def wait(self):
+        """Block until every running job finishes or pauses."""
+        for instrument in self.instruments.values():
+            if instrument.job_worker is not None:
+                instrument.job_worker.join()
+
+    def pause(self):
+        """Request that every running job pause."""
+        for instrument in self.running_instruments().values():
+            instrument.pause()
+
+    def abort(self):
+        """Request that every running job abort."""
+        for instrument in self.running_instruments().values():
+            instrument.abort()
+
+    def running_instruments(self) -> dict[str, BrainWasher]:
+        return {name: instrument for name, instrument in self.instruments.items()
+                if instrument.job_worker is not None
+                and instrument.job_worker.is_alive()}
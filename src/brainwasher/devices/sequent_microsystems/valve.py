@@ -3,6 +3,7 @@
 from brainwasher.devices.valves.valve import SolenoidValve as BaseSolenoidValve
 from brainwasher.devices.valves.valve import NCValve as BaseNCValve
 from brainwasher.devices.valves.valve import ThreeTwoValve as BaseThreeTwoValve
+from brainwasher.devices.valves.valve import SolenoidValveBank
 
 from time import sleep
 from typing import Union
@@ -21,15 +22,13 @@ class NCValve(BaseNCValve, BaseSolenoidValve):
         self.board_address = board_address
         self.channel = channel
 
-    def energize(self):
-        super().energize()
+    def _energize(self):
         # Warning: using the set command requires adding dead time, or
         # back-to-back commands are ignored
         lib8mosind.set(self.board_address, self.channel, 1)
         sleep(DEAD_TIME_S)
 
-    def deenergize(self):
-        super().deenergize()
+    def _deenergize(self):
         # Warning: using the set command requires adding dead time, or
         # back-to-back commands are ignored
         lib8mosind.set(self.board_address, self.channel, 0)
@@ -49,15 +48,13 @@ class ThreeTwoValve(BaseThreeTwoValve, BaseSolenoidValve):
         self.board_address = board_address
         self.channel = channel
 
-    def energize(self):
-        super().energize()
+    def _energize(self):
         # Warning: using the set command requires adding dead time, or
         # back-to-back commands are ignored
         lib8mosind.set(self.board_address, self.channel, 1)
         sleep(DEAD_TIME_S)
 
-    def deenergize(self):
-        super().deenergize()
+    def _deenergize(self):
         lib8mosind.set_pwm(self.board_address, self.channel, 0)
         # Warning: using the set command requires adding dead time, or
         # back-to-back commands are ignored
@@ -71,3 +68,43 @@ class ThreeTwoValve(BaseThreeTwoValve, BaseSolenoidValve):
             self.deenergize()
         else:
             raise ValueError("Invalid argument.")
+
+
+class ValveBank(SolenoidValveBank):
+    """Valves on one 8-Mosfets board, switched with a single write of the
+    board's output register followed by a single dead time.
+
+    The register is read once at startup and shadowed afterwards, so each
+    transition is one I2C transaction. Channels that are not in the bank
+    are assumed to keep the state they had at startup.
+    """
+    def __init__(self, board_address: int,
+                 valves: list[Union[NCValve, ThreeTwoValve]], name: str = None):
+        super().__init__(valves=valves, name=name)
+        self.board_address = board_address
+        for valve in self.valves:
+            if valve.board_address != board_address:
+                raise ValueError(f"{valve.log.name} is not on board "
+                                 f"{board_address}.")
+            if isinstance(valve, ThreeTwoValve):
+                lib8mosind.set_pwm(self.board_address, valve.channel, 0)
+                sleep(DEAD_TIME_S)
+        self.output_mask = lib8mosind.get_all(self.board_address)
+
+    def _write_states(self, states):
+        mask = self.output_mask
+        for valve in self.valves:
+            # Valves may also be switched on their own, so take the bank's
+            # bits from each valve's last commanded state where it is known.
+            energized = states.get(valve, valve.energized)
+            if energized is None:
+                continue
+            if valve in states:
+                valve.log.debug("Energizing." if energized else "De-energizing.")
+            if energized:
+                mask |= 1 << (valve.channel - 1)
+            else:
+                mask &= ~(1 << (valve.channel - 1))
+        lib8mosind.set_all(self.board_address, mask)
+        self.output_mask = mask
+        sleep(DEAD_TIME_S)
@@ -0,0 +1,138 @@
+"""Simulated fluid flow between the selector, its reservoirs, and the pump."""
+
+import logging
+from collections import deque
+
+
+class SimFluidModel:
+    """Track liquid and gas displaced by the pump through the selector.
+
+    Each reservoir port has a line that holds gas until enough volume is
+    withdrawn through the port to pull the liquid up to the selector. The
+    selector-to-pump line behaves as a first-in-first-out pipe; liquid is
+    detected at its pump end once a full line volume of liquid has been
+    withdrawn behind any gas already in the line.
+    """
+
+    def __init__(self, selector, reservoir_line_volume_ul: float = 2000.,
+                 pump_line_volume_ul: float = 500.,
+                 reservoir_line_volumes_ul: dict[str, float] = None,
+                 gas_ports: list[str] = ("ambient", "outlet"),
+                 name: str = None):
+        """
+        :param selector: selector whose current port sets where fluid is
+            drawn from or pushed to.
+        :param reservoir_line_volume_ul: default volume to withdraw through a
+            reservoir port before liquid reaches the selector.
+        :param pump_line_volume_ul: selector-to-pump line volume.
+        :param reservoir_line_volumes_ul: per-port overrides of
+            `reservoir_line_volume_ul`, keyed by port name.
+        :param gas_ports: ports that only ever supply gas.
+        """
+        logger_name = self.__class__.__name__ + (f".{name}" if name else "")
+        self.log = logging.getLogger(logger_name)
+        self.selector = selector
+        self.reservoir_line_volume_ul = reservoir_line_volume_ul
+        self.reservoir_line_volumes_ul = reservoir_line_volumes_ul or {}
+        self.pump_line_volume_ul = pump_line_volume_ul
+        self.gas_ports = set(gas_ports)
+        # Net volume withdrawn through each reservoir port's line.
+        self.withdrawn_volumes_ul: dict[str, float] = {}
+        # Selector-to-pump line contents as [volume, is_liquid] segments
+        # ordered from the selector end to the pump end. Starts full of gas.
+        self.pump_line = deque([[pump_line_volume_ul, False]])
+        self.syringe_liquid_ul = 0
+        self.syringe_gas_ul = 0
+
+    def get_line_volume_ul(self, port: str) -> float:
+        return self.reservoir_line_volumes_ul.get(port,
+                                                  self.reservoir_line_volume_ul)
+
+    def reservoir_line_primed(self, port: str) -> bool:
+        """True if liquid has been withdrawn up to the selector."""
+        if port in self.gas_ports:
+            return False
+        return self.withdrawn_volumes_ul.get(port, 0) >= self.get_line_volume_ul(port)
+
+    def pump_line_primed(self) -> bool:
+        """True if liquid is present at the pump end of the pump line."""
+        return self.pump_line[-1][1]
+
+    def displace(self, volume_ul: float):
+        """Move fluid through the current selector port. Positive volumes
+        withdraw into the syringe; negative volumes push out of it."""
+        port = self.selector.current_port
+        if not volume_ul or not port.open:  # Closed: gas compresses instead.
+            return
+        port = str(port.port)
+        if volume_ul > 0:
+            self._withdraw(port, volume_ul)
+        else:
+            self._push(port, -volume_ul)
+
+    def _withdraw(self, port: str, volume_ul: float):
+        liquid_ul = 0
+        if port not in self.gas_ports:
+            line_volume_ul = self.get_line_volume_ul(port)
+            prev_withdrawn_ul = self.withdrawn_volumes_ul.get(port, 0)
+            withdrawn_ul = prev_withdrawn_ul + volume_ul
+            self.withdrawn_volumes_ul[port] = withdrawn_ul
+            liquid_ul = (max(withdrawn_ul - line_volume_ul, 0)
+                         - max(prev_withdrawn_ul - line_volume_ul, 0))
+        # Gas in the reservoir line arrives before the liquid behind it.
+        self._fill(True, volume_ul - liquid_ul, False)
+        self._fill(True, liquid_ul, True)
+        liquid_ul, gas_ul = self._drain(False, volume_ul)
+        self.syringe_liquid_ul += liquid_ul
+        self.syringe_gas_ul += gas_ul
+
+    def _push(self, port: str, volume_ul: float):
+        syringe_volume_ul = self.syringe_liquid_ul + self.syringe_gas_ul
+        liquid_fraction = (self.syringe_liquid_ul / syringe_volume_ul
+                           if syringe_volume_ul else 0)
+        liquid_ul = min(volume_ul * liquid_fraction, self.syringe_liquid_ul)
+        self.syringe_liquid_ul -= liquid_ul
+        self.syringe_gas_ul = max(self.syringe_gas_ul - (volume_ul - liquid_ul), 0)
+        self._fill(False, liquid_ul, True)
+        self._fill(False, volume_ul - liquid_ul, False)
+        self._drain(True, volume_ul)
+        # Pushing back through a reservoir port returns liquid and gas to it.
+        if port in self.withdrawn_volumes_ul:
+            self.withdrawn_volumes_ul[port] = \
+                max(self.withdrawn_volumes_ul[port] - volume_ul, 0)
+
+    def _fill(self, selector_end: bool, volume_ul: float, is_liquid: bool):
+        """Add the specified volume to one end of the pump line."""
+        if volume_ul <= 0:
+            return
+        end = 0 if selector_end else -1
+        if self.pump_line and self.pump_line[end][1] == is_liquid:
+            self.pump_line[end][0] += volume_ul  # Merge like segments.
+        elif selector_end:
+            self.pump_line.appendleft([volume_ul, is_liquid])
+        else:
+            self.pump_line.append([volume_ul, is_liquid])
+
+    def _drain(self, selector_end: bool, volume_ul: float) -> tuple[float, float]:
+        """Remove the specified volume from one end of the pump line.
+
+        :return: the (liquid, gas) volumes removed.
+        """
+        liquid_ul = gas_ul = 0
+        end = 0 if selector_end else -1
+        while volume_ul > 0 and self.pump_line:
+            segment = self.pump_line[end]
+            segment_volume_ul, is_liquid = segment
+            removed_ul = min(segment_volume_ul, volume_ul)
+            if segment_volume_ul > removed_ul:
+                segment[0] -= removed_ul
+            elif selector_end:
+                self.pump_line.popleft()
+            else:
+                self.pump_line.pop()
+            if is_liquid:
+                liquid_ul += removed_ul
+            else:
+                gas_ul += removed_ul
+            volume_ul -= removed_ul
+        return liquid_ul, gas_ul
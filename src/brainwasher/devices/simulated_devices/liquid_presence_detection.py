@@ -0,0 +1,27 @@
+"""Simulated Liquid Detection Sensors"""
+
+from brainwasher.devices.liquid_presence_detection import BubbleDetectionSensor
+from brainwasher.devices.simulated_devices.fluid_model import SimFluidModel
+
+
+class SimBubbleDetectionSensor(BubbleDetectionSensor):
+    """Bubble sensor that trips when the fluid model places liquid at it."""
+
+    def __init__(self, fluid_model: SimFluidModel, port: str = None):
+        """
+        :param fluid_model: simulated flowpath contents.
+        :param port: selector port whose reservoir line this sensor sits on.
+            If unspecified, the sensor sits at the pump end of the
+            selector-to-pump line.
+        """
+        super().__init__()
+        self.fluid_model = fluid_model
+        self.port = port
+
+    def tripped(self):
+        if self.port is None:
+            return self.fluid_model.pump_line_primed()
+        return self.fluid_model.reservoir_line_primed(self.port)
+
+    def untripped(self):
+        return not self.tripped()
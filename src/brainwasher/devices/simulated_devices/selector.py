@@ -1,34 +1,166 @@
 """Simulated Selector"""
 import logging
+from brainwasher.clock import Clock
+from dataclasses import dataclass
+from math import ceil
 from typing import Union
 
 
 class SimSelector:
+    """Rotary selector that takes time to rotate between positions.
 
-    def __init__(self, positions: int, position_map: dict = None, name: str = None):
+    Like an actuator in its forward-only mode, `move_to_position` always
+    rotates clockwise (i.e: towards increasing position numbers).
+    """
+
+    def __init__(self, positions: int, position_map: dict = None,
+                 position_time_s: float = 0.1, command_latency_s: float = 0.02,
+                 clock: Clock = None, name: str = None):
+        """
+        :param position_time_s: time to rotate from one position to the next.
+        :param command_latency_s: time to send a command and get a reply.
+        :param clock: timekeeper shared with the instrument.
+        """
         logger_name = self.__class__.__name__ + (f".{name}" if name else "")
         self.log = logging.getLogger(logger_name)
         self.nominal_position_count = positions
         self.position_count = positions
-        self._position_dict = position_map
+        self._position_dict = position_map if position_map is not None else {}
+        self.position_time_s = position_time_s
+        self.command_latency_s = command_latency_s
+        self.clock = clock if clock is not None else Clock()
+        self.hw_position = 1  # 1-indexed.
+        self.move_count = 0  # Moves issued, for benchmarking.
+
+    def current_position(self):
+        return self.hw_position
+
+    def _lookup_position(self, position: Union[int, str]) -> int:
+        return int(self._position_dict.get(position, position))
+
+    def _rotate(self, position: Union[int, str], clockwise: bool = True):
+        position = self._lookup_position(position)
+        if not 1 <= position <= self.position_count:
+            raise ValueError(f"Position {position} does not exist.")
+        distance = (position - self.hw_position) % self.position_count
+        if not clockwise:
+            distance = (self.position_count - distance) % self.position_count
+        self.clock.sleep(self.command_latency_s + distance * self.position_time_s)
+        self.hw_position = position
+        self.move_count += 1
 
     def move_to_position(self, position: Union[int, str]):
         self.log.debug(f"Moving to position: {position}")
+        self._rotate(position)
+
+    def move_clockwise_to_position(self, position: Union[int, str]):
+        self.log.debug(f"Clockwise move to position: {position}")
+        self._rotate(position, clockwise=True)
+
+    def move_counterclockwise_to_position(self, position: Union[int, str]):
+        self.log.debug(f"Counterclockwise move to position: {position}")
+        self._rotate(position, clockwise=False)
+
+
+@dataclass
+class SimPort:
+    port: Union[int, str] = None
+    open: bool = False
 
 
 class SimCloseableSelector(SimSelector):
+    """Selector with closed positions between each port, mirroring
+    `CloseableVICI`.
+
+    Like `CloseableVICI`, `move_to_port`, `open`, and `close` skip moves to
+    the current position and otherwise rotate in whichever direction is
+    shorter, and `force=True` re-reads the current port first.
+    """
 
     def __init__(self, port_count: int, port_map: dict = None,
-                 name: str = None):
+                 position_time_s: float = 0.1, command_latency_s: float = 0.02,
+                 clock: Clock = None, name: str = None):
         self.port_count = port_count
         self.port_map = port_map
-        super().__init__(positions=port_count, position_map=port_map, name=name)
+        self._port_map = {str(i + 1): i + 1 for i in range(port_count)}
+        self._port_map.update(port_map if port_map is not None else {})
+        super().__init__(positions=port_count * 2,
+                         position_map={c: self._to_nearest_hw_position(i, open=True)
+                                       for c, i in self._port_map.items()},
+                         position_time_s=position_time_s,
+                         command_latency_s=command_latency_s,
+                         clock=clock, name=name)
+        self.current_port = None
+        self.refresh_position()
+        self.skipped_move_count = 0  # Moves skipped because already there.
 
-    def open(self):
+    def _to_nearest_hw_position(self, port: int, open: bool = True):
+        if open:
+            return (port * 2 - 1) % (self.port_count * 2)
+        return port * 2
+
+    def _get_port_name(self, port_index: int) -> Union[int, str]:
+        """Name of the port in the port map, or its index if unnamed."""
+        return next((name for name, index in (self.port_map or {}).items()
+                     if index == port_index), port_index)
+
+    def refresh_position(self):
+        """Replace the cached port with the one at the current position."""
+        self.current_port = SimPort(
+            port=self._get_port_name(ceil(self.hw_position / 2)),
+            open=(self.hw_position % 2 != 0))
+
+    def _check_port_range(self, port: Union[int, str]):
+        if str(port) not in self._port_map:
+            raise ValueError(f"Requested port {port} does not exist.")
+
+    def _open_hw_position(self, port: Union[int, str]):
+        self._check_port_range(port)
+        return self._to_nearest_hw_position(self._port_map[str(port)], open=True)
+
+    def _move_to_hw_position(self, hw_position: int, force: bool = False):
+        if force:
+            self.refresh_position()
+        if hw_position == self.hw_position:
+            self.log.debug(f"Already at position {hw_position}.")
+            self.skipped_move_count += 1
+            return
+        clockwise_distance = (hw_position - self.hw_position) % self.position_count
+        self._rotate(hw_position, clockwise=(
+            clockwise_distance <= self.position_count - clockwise_distance))
+
+    def is_open(self):
+        return self.current_port.open
+
+    def open(self, force: bool = False):
         self.log.debug("Opening flow.")
+        if force:
+            self.refresh_position()
+        self.move_to_port(self.current_port.port, force=force)
 
-    def close(self):
+    def close(self, force: bool = False):
         self.log.debug("Closing flow.")
+        if force:
+            self.refresh_position()
+        port_index = self._port_map[str(self.current_port.port)]
+        self._move_to_hw_position(self._to_nearest_hw_position(port_index, open=False),
+                                  force=force)
+        self.current_port.open = False
+
+    def move_to_port(self, port: Union[int, str], force: bool = False):
+        self.log.debug(f"Moving to port: {port}")
+        self._move_to_hw_position(self._open_hw_position(port), force=force)
+        self.current_port.port = port
+        self.current_port.open = True
+
+    def move_clockwise_to_port(self, port: Union[int, str]):
+        self.log.debug(f"Clockwise move to open port: {port}.")
+        self._rotate(self._open_hw_position(port), clockwise=True)
+        self.current_port.port = port
+        self.current_port.open = True
 
-    def move_to_port(self, port: Union[int, str]):
-        self.log.debug(f"Moving to port: {port}")
\ No newline at end of file
+    def move_counterclockwise_to_port(self, port: Union[int, str]):
+        self.log.debug(f"Counterclockwise move to open port: {port}.")
+        self._rotate(self._open_hw_position(port), clockwise=False)
+        self.current_port.port = port
+        self.current_port.open = True
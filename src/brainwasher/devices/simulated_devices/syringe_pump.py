@@ -1,49 +1,115 @@
-"""Simulated Selector"""
+"""Simulated Syringe Pump"""
 import logging
 
-
+from brainwasher.clock import Clock
 
 
 class SimSyringePump:
-
-    def __init__(self, syringe_volume_ul: int, name: str = None):
+    """Syringe pump whose plunger travels at a finite speed.
+
+    Moves take `full_stroke_time_s` (scaled by the speed setting) to travel
+    the full syringe volume, and every command costs a serial round trip.
+    Non-blocking moves report busy until the plunger arrives. If a fluid
+    model is specified, plunger displacement moves fluid through the
+    simulated flowpath.
+    """
+
+    def __init__(self, syringe_volume_ul: int, full_stroke_time_s: float = 5.0,
+                 command_latency_s: float = 0.005, fluid_model=None,
+                 clock: Clock = None, name: str = None):
+        """
+        :param full_stroke_time_s: time to travel the full syringe volume at
+            100% speed.
+        :param command_latency_s: time to send a command and get a reply.
+        :param fluid_model: optional `SimFluidModel` to displace fluid through.
+        :param clock: timekeeper shared with the instrument.
+        """
         logger_name = self.__class__.__name__ + (f".{name}" if name else "")
         self.log = logging.getLogger(logger_name)
         self.syringe_volume_ul = syringe_volume_ul # more of a "capacity."
+        self.full_stroke_time_s = full_stroke_time_s
+        self.command_latency_s = command_latency_s
+        self.fluid_model = fluid_model
+        self.clock = clock if clock is not None else Clock()
         self.curr_volume_ul = 0
         self.speed_percent = 100.
+        self.stroke_count = 0  # Plunger moves issued, for benchmarking.
+        # (start time, start volume, end volume, duration) of the active move.
+        self._move = None
+
+    def _send(self):
+        """Spend the time needed to exchange a command with the pump."""
+        self.clock.sleep(self.command_latency_s)
+
+    def _update(self):
+        """Advance the plunger along its active move up to the current time."""
+        if self._move is None:
+            return
+        start_time_s, start_volume_ul, end_volume_ul, duration_s = self._move
+        elapsed_time_s = self.clock.now() - start_time_s
+        fraction = min(elapsed_time_s / duration_s, 1.) if duration_s else 1.
+        volume_ul = start_volume_ul + (end_volume_ul - start_volume_ul) * fraction
+        if self.fluid_model is not None:
+            self.fluid_model.displace(volume_ul - self.curr_volume_ul)
+        self.curr_volume_ul = volume_ul
+        if fraction >= 1.:
+            self._move = None
+
+    def _move_to(self, volume_ul: float, wait: bool = True):
+        self._send()
+        self._update()
+        volume_ul = min(max(volume_ul, 0), self.syringe_volume_ul)
+        duration_s = (abs(volume_ul - self.curr_volume_ul) / self.syringe_volume_ul
+                      * self.full_stroke_time_s * 100. / self.speed_percent)
+        self._move = (self.clock.now(), self.curr_volume_ul, volume_ul, duration_s)
+        if volume_ul != self.curr_volume_ul:
+            self.stroke_count += 1
+        if wait:
+            self.clock.sleep(duration_s)
+            self._update()
 
     def reset_syringe_position(self):
-        pass
+        self.log.debug("Resetting syringe position.")
+        self._move_to(0)
 
     def get_speed_percent(self):
         return self.speed_percent
 
     def set_speed_percent(self, percent: float):
         self.log.debug(f"Setting plunger speed to {percent}%")
+        self._send()
         self.speed_percent = percent
 
     def get_position_ul(self):
+        self._send()
+        self._update()
         return self.curr_volume_ul
 
     def get_position_percent(self):
-        return 100. * self.curr_volume_ul/self.syringe_volume_ul
-
+        return 100. * self.get_position_ul()/self.syringe_volume_ul
 
     def move_absolute_in_percent(self, percent: float, wait: bool = True):
         self.log.debug(f"Moving plunger to {percent}% full scale range")
-        self.curr_volume_ul = percent/100. * self.syringe_volume_ul
+        self._move_to(percent/100. * self.syringe_volume_ul, wait=wait)
 
     def withdraw(self, microliters, wait: bool = True):
-        if not wait:
-            self.is_busy = True
-        return self.aspirate(microliters)
+        return self.aspirate(microliters, wait=wait)
 
-    def aspirate(self, microliters, waite: bool = True):
-        self.curr_volume_ul += microliters
+    def aspirate(self, microliters, wait: bool = True):
+        self._update()
+        self._move_to(self.curr_volume_ul + microliters, wait=wait)
 
     def dispense(self, microliters, wait: bool = True):
-        self.curr_volume_ul -= microliters
+        self._update()
+        self._move_to(self.curr_volume_ul - microliters, wait=wait)
+
+    def halt(self):
+        self.log.debug("Halting plunger.")
+        self._send()
+        self._update()
+        self._move = None
 
     def is_busy(self):
-        return False
+        self._send()
+        self._update()
+        return self._move is not None
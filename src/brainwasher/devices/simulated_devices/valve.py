@@ -0,0 +1,50 @@
+"""Simulated Solenoid Valves"""
+
+from brainwasher.clock import Clock
+from brainwasher.devices.valves.valve import SolenoidValve, NCSolenoidValve
+from brainwasher.devices.valves.valve import ThreeTwoSolenoidValve
+from brainwasher.devices.valves.valve import SolenoidValveBank
+
+
+class SimSolenoidValve(SolenoidValve):
+    """Solenoid valve that takes time to actuate."""
+
+    def __init__(self, actuation_time_s: float = 0.02, clock: Clock = None,
+                 name: str = None):
+        """
+        :param actuation_time_s: time for the valve to switch after a command.
+        :param clock: timekeeper shared with the instrument.
+        """
+        super().__init__(name=name)
+        self.actuation_time_s = actuation_time_s
+        self.clock = clock if clock is not None else Clock()
+
+    def _energize(self):
+        self.clock.sleep(self.actuation_time_s)
+
+    def _deenergize(self):
+        self.clock.sleep(self.actuation_time_s)
+
+
+class SimNCValve(SimSolenoidValve, NCSolenoidValve):
+    pass
+
+
+class SimThreeTwoValve(SimSolenoidValve, ThreeTwoSolenoidValve):
+    pass
+
+
+class SimValveBank(SolenoidValveBank):
+    """Valves that switch together in a single command."""
+
+    def __init__(self, valves: list[SimSolenoidValve],
+                 actuation_time_s: float = 0.02, clock: Clock = None,
+                 name: str = None):
+        super().__init__(valves=valves, name=name)
+        self.actuation_time_s = actuation_time_s
+        self.clock = clock if clock is not None else Clock()
+
+    def _write_states(self, states: dict[SimSolenoidValve, bool]):
+        for valve, energized in states.items():
+            valve.log.debug("Energizing." if energized else "De-energizing.")
+        self.clock.sleep(self.actuation_time_s)
@@ -18,7 +18,14 @@ class Port:
 class CloseableVICI(VICI):
     """a rotary shear valve that can be closed by moving to an interstitial
     position *between* two positions, effectively acting like a normal
-    `RotaryShearValve` but with twice as many positions."""
+    `RotaryShearValve` but with twice as many positions.
+
+    `move_to_port`, `open`, and `close` skip moves to the current position
+    and otherwise rotate in whichever direction is shorter. The current
+    position is read from the hardware on startup and after a failed move,
+    and is otherwise cached. Pass `force=True` to re-read it first (i.e:
+    after the valve may have been moved by hand).
+    """
 
     def __init__(self, serial: Serial,
                  port_count: int, port_map: dict = None):
@@ -44,17 +51,29 @@ class CloseableVICI(VICI):
         position_map = {c:self._to_nearest_hw_position(i, open=True)
                         for c,i in self._port_map.items()}
         super().__init__(serial, positions=port_count * 2, position_map=position_map)
-        self.current_port = self._get_current_port()
         logger_name = self.__class__.__name__ + f".{serial.portstr}"
         self.log = logging.getLogger(logger_name)
+        self.current_port = None
+        self.refresh_position()
+        self.skipped_move_count = 0  # Moves skipped because already there.
         self.log.debug(f"high level port map:            {self._port_map}")
         self.log.debug(f"Underlying VICI representation: {position_map}")
 
+    def _get_port_name(self, port_index: int) -> Union[int, str]:
+        """Name of the port in the port map, or its index if unnamed."""
+        return next((name for name, index in (self.port_map or {}).items()
+                     if index == port_index), port_index)
+
     def _get_current_port(self):
         curr_hw_position = int(self.current_position())
-        return Port(port=ceil(float(curr_hw_position)/2),
+        return Port(port=self._get_port_name(ceil(float(curr_hw_position)/2)),
                     open=(curr_hw_position % 2 != 0))  # open if odd
 
+    def refresh_position(self):
+        """Replace the cached position with the one read from the hardware."""
+        self.current_port = self._get_current_port()
+        self.log.debug(f"Read current port from hardware: {self.current_port}.")
+
     def _to_nearest_hw_position(self, port: int, open: bool = True):
         if open:
             return (port * 2 - 1) % (self.port_count * 2)
@@ -64,26 +83,70 @@ class CloseableVICI(VICI):
         if str(port) not in self._port_map:
             raise ValueError(f"Requested port {port} does not exist.")
 
-    def move_to_port(self, port: Union[int, str]):
+    def _current_hw_position(self):
+        port_index = self._port_map[str(self.current_port.port)]
+        return self._to_nearest_hw_position(port_index,
+                                            open=self.current_port.open)
+
+    def _rotate_to_hw_position(self, hw_position: int, clockwise: bool):
+        """Rotate to the specified hardware position. If the move fails, the
+        cached position is re-read from the hardware since the valve may
+        have stopped anywhere."""
+        try:
+            if clockwise:
+                super().move_clockwise_to_position(hw_position)
+            else:
+                super().move_counterclockwise_to_position(hw_position)
+        except Exception:
+            self.log.error(f"Failed to move to position {hw_position}. "
+                           "Re-reading the current position.")
+            self.refresh_position()
+            raise
+
+    def _move_to_hw_position(self, hw_position: int, force: bool = False):
+        """Move to the specified hardware position along the shorter arc of
+        the position ring, or skip the move if we are already there.
+
+        :param force: if True, re-read the current position from the
+            hardware instead of trusting the cached one.
+        """
+        if force:
+            self.refresh_position()
+        curr_hw_position = self._current_hw_position()
+        if hw_position == curr_hw_position:
+            self.logger.debug(f"Already at position {hw_position}.")
+            self.skipped_move_count += 1
+            return
+        position_count = self.port_count * 2
+        clockwise_distance = (hw_position - curr_hw_position) % position_count
+        self._rotate_to_hw_position(
+            hw_position,
+            clockwise=(clockwise_distance <= position_count - clockwise_distance))
+
+    def move_to_port(self, port: Union[int, str], force: bool = False):
         """Move to the specified position."""
         self._check_port_range(port)
         port_index = self._port_map[str(port)]  # Convert name to int.
         open_hw_position = self._to_nearest_hw_position(port_index, open=True)
         self.logger.debug(f"Opening port: {port}.")
-        super().move_to_position(open_hw_position)
+        self._move_to_hw_position(open_hw_position, force=force)
         self.current_port.port = port
         self.current_port.open = True
 
     def is_open(self):
         return self.current_port.open
 
-    def open(self):
-        self.move_to_port(self.current_port.port)
+    def open(self, force: bool = False):
+        if force:
+            self.refresh_position()
+        self.move_to_port(self.current_port.port, force=force)
 
-    def close(self):
+    def close(self, force: bool = False):
+        if force:
+            self.refresh_position()
         port_index = self._port_map[str(self.current_port.port)]
         closed_hw_position = self._to_nearest_hw_position(port_index, open=False)
-        super().move_to_position(closed_hw_position)
+        self._move_to_hw_position(closed_hw_position, force=force)
         self.current_port.open = False
 
     def move_clockwise_to_port(self, port: Union[int, str]):
@@ -91,7 +154,7 @@ class CloseableVICI(VICI):
         port_index = self._port_map[str(port)]  # Convert name to int.
         open_hw_position = self._to_nearest_hw_position(port_index, open=True)
         self.logger.debug(f"Clockwise move to open port: {port}.")
-        super().move_clockwise_to_position(open_hw_position)
+        self._rotate_to_hw_position(open_hw_position, clockwise=True)
         self.current_port.port = port
         self.current_port.open = True
 
@@ -100,7 +163,7 @@ class CloseableVICI(VICI):
         port_index = self._port_map[str(port)]  # Convert name to int.
         open_hw_position = self._to_nearest_hw_position(port_index, open=True)
         self.logger.debug(f"Counterclockwise move to open port: {port}.")
-        super().move_counterclockwise_to_position(open_hw_position)
+        self._rotate_to_hw_position(open_hw_position, clockwise=False)
         self.current_port.port = port
         self.current_port.open = True
 
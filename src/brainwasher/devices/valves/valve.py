@@ -12,13 +12,50 @@ class Valve:
 
 
 class SolenoidValve(Valve):
-    """Valve base class."""
+    """Valve base class.
 
-    def energize(self):
+    Commands that would leave the valve in its last commanded state are
+    skipped. Pass `force=True` to send the command regardless (i.e: when
+    the physical state may differ from the last commanded state).
+    Subclasses implement the hardware write in `_energize`/`_deenergize`.
+    """
+
+    def __init__(self, name: str = None):
+        super().__init__(name=name)
+        self.energized = None  # Last commanded state or None if unknown.
+        self.write_count = 0  # Commands sent to the hardware.
+        self.skipped_write_count = 0  # Commands skipped as redundant.
+
+    def energize(self, force: bool = False):
+        if self.energized is True and not force:
+            self._record_skipped_write()
+            return
         self.log.debug("Energizing.")
+        self._energize()
+        self._record_write(True)
 
-    def deenergize(self):
+    def deenergize(self, force: bool = False):
+        if self.energized is False and not force:
+            self._record_skipped_write()
+            return
         self.log.debug("De-energizing.")
+        self._deenergize()
+        self._record_write(False)
+
+    def _record_write(self, energized: bool):
+        """Track a command sent to the hardware, whether it was sent by
+        this valve or by a valve bank."""
+        self.energized = energized
+        self.write_count += 1
+
+    def _record_skipped_write(self):
+        self.skipped_write_count += 1
+
+    def _energize(self):
+        pass
+
+    def _deenergize(self):
+        pass
 
 
 class IsolationValve(Valve):
@@ -66,3 +103,58 @@ class ThreeTwoValve(Valve):
 
 class ThreeTwoSolenoidValve(SolenoidValve):
     pass
+
+
+class SolenoidValveBank:
+    """Group of solenoid valves that are switched together.
+
+    Valves already in the requested state are skipped unless forced. The
+    base implementation switches each remaining valve in turn. Subclasses
+    backed by a single driver board can override `_write_states` to apply
+    them all at once.
+    """
+
+    def __init__(self, valves: list[SolenoidValve], name: str = None):
+        logger_name = self.__class__.__name__ + (f".{name}" if name else "")
+        self.log = logging.getLogger(logger_name)
+        self.valves = valves
+        self.write_count = 0  # Bank writes issued.
+
+    def set_states(self, states: dict[SolenoidValve, bool],
+                   force: bool = False):
+        """Energize (True) or de-energize (False) each specified valve.
+
+        :param force: if True, command every specified valve, even if it is
+            already in the requested state.
+        """
+        changes = {}
+        for valve, energized in states.items():
+            if valve not in self.valves:
+                raise ValueError(f"{valve.log.name} is not in this valve bank.")
+            if valve.energized is energized and not force:
+                valve._record_skipped_write()
+                continue
+            changes[valve] = energized
+        if not changes:
+            return
+        self._write_states(changes)
+        for valve, energized in changes.items():
+            valve._record_write(energized)
+        self.write_count += 1
+
+    def _write_states(self, states: dict[SolenoidValve, bool]):
+        """Send the valve states to the hardware."""
+        for valve, energized in states.items():
+            valve.log.debug("Energizing." if energized else "De-energizing.")
+            if energized:
+                valve._energize()
+            else:
+                valve._deenergize()
+
+    def energize_only(self, *valves: SolenoidValve, force: bool = False):
+        """Energize the specified valves and de-energize all others."""
+        self.set_states({valve: (valve in valves) for valve in self.valves},
+                        force=force)
+
+    def deenergize_all(self, force: bool = False):
+        self.energize_only(force=force)
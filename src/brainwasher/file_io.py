@@ -0,0 +1,29 @@
+"""Crash-safe file writes."""
+
+import os
+
+from pathlib import Path
+from threading import get_ident
+
+
+def atomic_write(path: str, data: str | bytes):
+    """Replace the file at `path` with `data` such that, even if power is
+    lost partway through, the file holds either its old or new contents.
+
+    The data is written and fsynced to a temporary file next to `path`,
+    which then replaces `path`. The directory is fsynced so that the
+    replacement itself is durable.
+    """
+    path = Path(path)
+    # Unique per writer so that concurrent writers never share a temp file.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{get_ident()}.tmp")
+    with open(tmp_path, "wb" if isinstance(data, bytes) else "w") as tmp_file:
+        tmp_file.write(data)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_path, path)
+    directory = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
@@ -1,10 +1,11 @@
 """pydantic model of job instance of protocol"""
 
+import numpy as np
+
 from pathlib import Path
-from pydantic import BaseModel, computed_field, field_serializer, model_serializer, AfterValidator, Field
+from pydantic import BaseModel, computed_field, field_serializer, model_serializer, AfterValidator, Field, PrivateAttr
 from pydantic import ValidationError
 from datetime import datetime
-from functools import cached_property
 from typing import Annotated, Optional, Any, Literal, Union
 import logging
 
@@ -107,6 +108,140 @@ class History(BaseModel):
     events: Optional[list[Event]] = list()
 
 
+class JobIndex:
+    """Prefix sums over a job's protocol so that progress, remaining time,
+    remaining chemicals, and remaining waste from any step take constant
+    time (per chemical or waste group) rather than a pass over the protocol.
+
+    Waste is grouped by each step solution's set of components, which is
+    what determines the compatible waste vessels it can be routed to.
+
+    .. note::
+       Following :meth:`BrainWasher.validate_job_against_instrument`, each
+       step's solution is counted as that step's waste.
+
+    """
+
+    def __init__(self, protocol: list[WashStep]):
+        self.chemicals: list[str] = []  # Column order of chemical arrays.
+        self.waste_groups: list[frozenset[str]] = []  # Column order of waste.
+        self._chemical_columns: dict[str, int] = {}
+        self._waste_columns: dict[frozenset[str], int] = {}
+        # Per-step values.
+        self._durations_s = np.zeros(0)
+        self._volumes_ul = np.zeros((0, 0))
+        self._uses = np.zeros((0, 0), dtype=int)  # Steps using each chemical.
+        self._waste_ul = np.zeros((0, 0))
+        self.waste_group_ids = np.zeros(0, dtype=int)  # Waste group per step.
+        self.rebuild(protocol)
+
+    @property
+    def step_count(self) -> int:
+        return len(self._durations_s)
+
+    @property
+    def step_waste_ul(self) -> np.ndarray:
+        """Waste volume of every step."""
+        return self._waste_ul.sum(axis=1)
+
+    def _get_column(self, columns: dict, names: list, key) -> int:
+        if key not in columns:
+            columns[key] = len(names)
+            names.append(key)
+        return columns[key]
+
+    def rebuild(self, protocol: list[WashStep], start_step: int = 0):
+        """Update the index after the protocol changed from `start_step` on.
+        Values for earlier steps are reused."""
+        steps = protocol[start_step:]
+        durations_s = np.array([step.duration_s or 0 for step in steps], dtype=float)
+        waste_group_ids = np.array(
+            [self._get_column(self._waste_columns, self.waste_groups,
+                              frozenset(step.components)) for step in steps],
+            dtype=int)
+        for step in steps:
+            for chemical in step.solution:
+                self._get_column(self._chemical_columns, self.chemicals, chemical)
+        volumes_ul = np.zeros((len(steps), len(self.chemicals)))
+        uses = np.zeros((len(steps), len(self.chemicals)), dtype=int)
+        waste_ul = np.zeros((len(steps), len(self.waste_groups)))
+        for row, step in enumerate(steps):
+            for chemical, volume_ul in step.solution.items():
+                volumes_ul[row, self._chemical_columns[chemical]] = volume_ul
+                uses[row, self._chemical_columns[chemical]] = 1
+            waste_ul[row, waste_group_ids[row]] = step.solution_volume_ul
+
+        def splice(kept, new):
+            """Keep the first `start_step` rows (padded with any new
+            columns) and replace the rest."""
+            kept = kept[:start_step]
+            if kept.ndim > 1:
+                kept = np.pad(kept, ((0, 0), (0, new.shape[1] - kept.shape[1])))
+            return np.concatenate([kept, new])
+
+        self._durations_s = splice(self._durations_s, durations_s)
+        self._volumes_ul = splice(self._volumes_ul, volumes_ul)
+        self._uses = splice(self._uses, uses)
+        self._waste_ul = splice(self._waste_ul, waste_ul)
+        self.waste_group_ids = splice(self.waste_group_ids, waste_group_ids)
+        # Prefix sums, with a leading zero row, i.e: the totals before each step.
+        self._cumulative_durations_s = np.concatenate(
+            [[0.], np.cumsum(self._durations_s)])
+        self._cumulative_volumes_ul = np.vstack(
+            [np.zeros(len(self.chemicals)), np.cumsum(self._volumes_ul, axis=0)])
+        self._cumulative_uses = np.vstack(
+            [np.zeros(len(self.chemicals), dtype=int), np.cumsum(self._uses, axis=0)])
+        self._cumulative_waste_ul = np.vstack(
+            [np.zeros(len(self.waste_groups)), np.cumsum(self._waste_ul, axis=0)])
+
+    def get_remaining_duration_s(self, step: int = 0) -> float:
+        """Total duration of the protocol from `step` on."""
+        return float(self._cumulative_durations_s[-1]
+                     - self._cumulative_durations_s[step])
+
+    def get_progress(self, step: int) -> float:
+        """Fraction (by duration) of the protocol completed before `step`."""
+        total_s = self._cumulative_durations_s[-1]
+        return float(self._cumulative_durations_s[step] / total_s) if total_s else 1.
+
+    def get_remaining_volume_ul(self, chemical: str, step: int = 0) -> float:
+        """Volume of the chemical that the protocol needs from `step` on."""
+        if (column := self._chemical_columns.get(chemical)) is None:
+            return 0.
+        return float(self._cumulative_volumes_ul[-1, column]
+                     - self._cumulative_volumes_ul[step, column])
+
+    def get_running_usage(self, chemical: str, step: int = 0
+                          ) -> tuple[np.ndarray, np.ndarray]:
+        """Running totals, through each step from `step` on, of the volume of
+        the chemical used and of the number of steps that use it."""
+        if (column := self._chemical_columns.get(chemical)) is None:
+            step_count = max(self.step_count - step, 0)
+            return np.zeros(step_count), np.zeros(step_count, dtype=int)
+        return (self._cumulative_volumes_ul[step + 1:, column]
+                - self._cumulative_volumes_ul[step, column],
+                self._cumulative_uses[step + 1:, column]
+                - self._cumulative_uses[step, column])
+
+    def get_remaining_volumes_ul(self, step: int = 0) -> dict[str, float]:
+        """Dict, keyed by chemical, of the volume of each chemical that the
+        protocol uses from `step` on."""
+        used = (self._cumulative_uses[-1] - self._cumulative_uses[step]) > 0
+        volumes_ul = (self._cumulative_volumes_ul[-1]
+                      - self._cumulative_volumes_ul[step])
+        return {chemical: float(volumes_ul[column])
+                for column, chemical in enumerate(self.chemicals) if used[column]}
+
+    def get_remaining_waste_ul(self, step: int = 0) -> dict[frozenset[str], float]:
+        """Dict, keyed by the set of solution components, of the waste volume
+        the protocol produces from `step` on."""
+        waste_ul = (self._cumulative_waste_ul[-1]
+                    - self._cumulative_waste_ul[step])
+        return {group: float(waste_ul[column])
+                for column, group in enumerate(self.waste_groups)
+                if waste_ul[column] > 0}
+
+
 class Job(BaseModel):
     """Local job, derived from a protocol, to be run on an instrument."""
     name: str
@@ -115,30 +250,65 @@ class Job(BaseModel):
     protocol: Optional[list[WashStep]] = list()
     resume_state: Optional[ResumeState] = None
     history: Optional[History] = History()
+    _index: Optional[JobIndex] = PrivateAttr(default=None)
+    _indexed_protocol: Optional[list] = PrivateAttr(default=None)
+
+    @property
+    def index(self) -> JobIndex:
+        """Prefix-sum index of the protocol.
+
+        .. note::
+           The index is rebuilt if the protocol is replaced, but edits to
+           steps in place must go through :meth:`set_step`,
+           :meth:`insert_step`, or :meth:`remove_step` to update it.
+
+        """
+        if (self._index is None or self._indexed_protocol is not self.protocol
+                or self._index.step_count != len(self.protocol)):
+            self._index = JobIndex(self.protocol)
+            self._indexed_protocol = self.protocol
+        return self._index
+
+    def set_step(self, index: int, step: WashStep):
+        """Replace a protocol step and update the index from that step on."""
+        job_index = self.index
+        index = range(len(self.protocol))[index]  # Resolve negative indices.
+        self.protocol[index] = step
+        job_index.rebuild(self.protocol, index)
+
+    def insert_step(self, index: int, step: WashStep):
+        """Insert a protocol step (like `list.insert`) and update the index
+        from that step on."""
+        job_index = self.index
+        index = min(index, len(self.protocol)) if index >= 0 \
+            else max(len(self.protocol) + index, 0)
+        self.protocol.insert(index, step)
+        job_index.rebuild(self.protocol, index)
+
+    def remove_step(self, index: int):
+        """Remove a protocol step and update the index from that step on."""
+        job_index = self.index
+        index = range(len(self.protocol))[index]
+        del self.protocol[index]
+        job_index.rebuild(self.protocol, index)
 
     def get_duration_s(self, start_step: int = 0):
         """Total job duration in seconds starting from the specified step."""
-        return sum([step.duration_s for step in self.protocol[start_step:]])
+        return self.index.get_remaining_duration_s(start_step)
 
-    @cached_property
+    @property
     def chemicals(self) -> set[str]:
         """Extract set of chemicals from all solutions across all steps"""
-        step_components = set([chemical for step in self.protocol
-                          for chemical in step.components])
+        step_components = set(self.index.get_remaining_volumes_ul())
         # Include starting solution chemicals.
         return step_components | set(self.starting_solution.keys())
 
     @computed_field
-    @cached_property
+    @property
     def stock_chemical_volumes_ul(self) -> dict[str, float]:
         """Dict of total chemical volumes (in microliters) needed across all
         steps."""
-        stock_chemicals = {}
-        for step in self.protocol:
-            for chemical_name, volume_ul in step.solution.items():
-                curr_volume_ul = stock_chemicals.get(chemical_name, 0)
-                stock_chemicals[chemical_name] = curr_volume_ul + volume_ul
-        return stock_chemicals
+        return self.index.get_remaining_volumes_ul()
 
     def record_start(self, timestamp: datetime = None):
         """Record a start event to the job's history."""
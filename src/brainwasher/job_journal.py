@@ -0,0 +1,102 @@
+"""Append-only journal of job progress."""
+
+import json
+import logging
+import os
+import yaml
+
+from brainwasher.file_io import atomic_write
+from brainwasher.job import Event, Job, ResumeState
+from pathlib import Path
+
+
+class JobJournal:
+    """Crash-safe record of a running job's progress.
+
+    Rather than rewriting the whole job file after every step, each
+    checkpoint appends only what changed (new history events and the
+    current resume state) as one line of json to a journal file next to the
+    job file and fsyncs it. Checkpoint cost is then constant regardless of
+    protocol length or history size.
+
+    On completion or pause, the journal is compacted: the full job is written
+    to a temporary file that atomically replaces the job file, and the
+    journal is deleted. If power is lost in between, the journal is replayed
+    onto the last complete job file the next time the job is loaded. Each
+    record notes how many events preceded it, so records already compacted
+    into the job file (i.e: if power is lost after the job file is replaced
+    but before the journal is deleted) are skipped.
+    """
+
+    SUFFIX = ".journal"
+
+    def __init__(self, job_path: str, job: Job):
+        """
+        :param job_path: path to the job file.
+        :param job: the job as loaded (with any journal replayed).
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.job_path = Path(job_path)
+        self.path = self.get_path(job_path)
+        self._event_count = len(job.history.events)  # Events on disk.
+        self._file = None
+
+    @classmethod
+    def get_path(cls, job_path: str) -> Path:
+        job_path = Path(job_path)
+        return job_path.with_name(job_path.name + cls.SUFFIX)
+
+    @classmethod
+    def replay(cls, job_path: str, job: Job) -> Job:
+        """Apply any journaled progress to a job loaded from `job_path`."""
+        path = cls.get_path(job_path)
+        if not path.exists():
+            return job
+        logging.getLogger(cls.__name__).warning(
+            f"Recovering job progress from journal: {path}")
+        with open(path) as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Partially written final record.
+                event_count = len(job.history.events)
+                first_event = record.get("first_event", event_count)
+                if first_event + len(record["events"]) < event_count:
+                    continue  # Already compacted into the job file.
+                job.history.events.extend(
+                    Event(**event)
+                    for event in record["events"][event_count - first_event:])
+                resume_state = record["resume_state"]
+                job.resume_state = (ResumeState(**resume_state)
+                                    if resume_state else None)
+        return job
+
+    def checkpoint(self, job: Job):
+        """Durably append the job's new events and current resume state."""
+        new_events = job.history.events[self._event_count:]
+        record = {"first_event": self._event_count,
+                  "events": [e.model_dump(mode="json") for e in new_events],
+                  "resume_state": (job.resume_state.model_dump(mode="json")
+                                   if job.resume_state else None)}
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._event_count = len(job.history.events)
+
+    def compact(self, job: Job):
+        """Atomically rewrite the job file with the job's full state and
+        delete the journal."""
+        # The replacement is durable before the journal is discarded.
+        atomic_write(self.job_path, yaml.dump(job.model_dump(exclude_none=True)))
+        self.close()
+        self.path.unlink(missing_ok=True)
+        self._event_count = len(job.history.events)
+        self.log.debug(f"Job progress saved to: {self.job_path}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,107 @@
+"""Fast job file loading with a cache of validated jobs."""
+
+import logging
+import pickle
+import yaml
+
+from brainwasher.file_io import atomic_write
+from brainwasher.job import Job
+from collections import OrderedDict
+from hashlib import sha256
+from pathlib import Path
+from threading import Lock
+
+# Use the libyaml C parser when PyYAML was built with it.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(stream):
+    """`yaml.safe_load` equivalent that uses the C parser when available."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+class JobLoader:
+    """Load and validate job files, caching validated jobs by file content.
+
+    Jobs are cached in memory and, if `cache_dir` is specified, on disk as
+    pickles tagged with the hash of the job file's contents (and of the
+    `Job` schema so that cached jobs are discarded when the model changes).
+    Loading an unchanged job then skips parsing and validation. Each load
+    returns a new `Job`, so callers may modify it freely.
+
+    Only the latest version of each job file is cached, so rewriting a job
+    file (i.e: on pause or completion) replaces its cached pickle. The
+    in-memory cache also holds at most `max_cached_jobs` job files, evicting
+    the least recently loaded.
+    """
+
+    def __init__(self, cache_dir: str = None, max_cached_jobs: int = 16):
+        """
+        :param cache_dir: folder to keep validated jobs in across runs.
+            If unspecified, jobs are only cached in memory.
+        :param max_cached_jobs: job files to keep in memory.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._schema_hash = sha256(
+            str(Job.model_json_schema()).encode()).digest()
+        self.max_cached_jobs = max_cached_jobs
+        # (content hash, pickled job) keyed by resolved job path.
+        self._cache: OrderedDict[Path, tuple[bytes, bytes]] = OrderedDict()
+        self._cache_lock = Lock()
+
+    def _get_key(self, contents: bytes) -> bytes:
+        return sha256(self._schema_hash + contents).hexdigest().encode()
+
+    def _get_cache_path(self, job_path: Path) -> Path:
+        """Where the latest version of the job file is cached on disk."""
+        return self.cache_dir / f"{sha256(str(job_path).encode()).hexdigest()}.pkl"
+
+    def _get_cached(self, job_path: Path, key: bytes) -> bytes | None:
+        """Pickled job cached for this version of the job file, if any."""
+        with self._cache_lock:
+            cached = self._cache.get(job_path)
+            if cached is not None and cached[0] == key:
+                self._cache.move_to_end(job_path)
+                return cached[1]
+        if not self.cache_dir:
+            return None
+        cache_path = self._get_cache_path(job_path)
+        if not cache_path.exists():
+            return None
+        cached = cache_path.read_bytes()
+        if not cached.startswith(key):
+            return None  # Cached from an older version of the job file.
+        self._remember(job_path, key, cached[len(key):])
+        return cached[len(key):]
+
+    def _remember(self, job_path: Path, key: bytes, pickled_job: bytes):
+        with self._cache_lock:
+            self._cache[job_path] = (key, pickled_job)
+            self._cache.move_to_end(job_path)
+            while len(self._cache) > self.max_cached_jobs:
+                self._cache.popitem(last=False)
+
+    def load(self, job_path: str) -> Job:
+        job_path = Path(job_path)
+        if not job_path.exists():
+            raise FileNotFoundError(f"Job does not exist at location: "
+                                    f"{job_path.resolve()}")
+        contents = job_path.read_bytes()
+        job_path = job_path.resolve()
+        key = self._get_key(contents)
+        if (pickled_job := self._get_cached(job_path, key)) is not None:
+            self.log.debug(f"Loaded validated job from cache: {job_path}")
+            return pickle.loads(pickled_job)
+        self.log.debug(f"Loading job from: {job_path.absolute()}")
+        job = Job(**load_yaml(contents))  # validate
+        self.log.debug(f"Job is a valid job.")
+        pickled_job = pickle.dumps(job)
+        self._remember(job_path, key, pickled_job)
+        if self.cache_dir:
+            # Replace any older version. Concurrent loaders never see
+            # partial files.
+            atomic_write(self._get_cache_path(job_path), key + pickled_job)
+        return job
@@ -0,0 +1,220 @@
+"""Persistent, prioritized queue of jobs to run back-to-back on an instrument."""
+
+import logging
+import yaml
+
+from brainwasher.file_io import atomic_write
+from brainwasher.job import Job, WashStep
+from brainwasher.job_loader import load_yaml
+from datetime import datetime
+from pathlib import Path
+from pydantic import BaseModel, Field, field_serializer
+from threading import Event, Lock, Thread
+
+
+class QueuedJob(BaseModel):
+    path: Path
+    priority: int = 0  # Higher priority jobs run first.
+    queued: datetime = Field(default_factory=datetime.now)
+
+    @field_serializer("path")
+    def resolve_path(self, path: Path):
+        """Coerce path output to absolute path string for serialization."""
+        return str(Path(path).resolve())
+
+
+class JobQueueState(BaseModel):
+    jobs: list[QueuedJob] = list()
+
+
+class JobQueue:
+    """Run queued jobs on one instrument, starting each job as soon as the
+    previous one finishes.
+
+    Jobs are validated against the instrument when they are queued, and the
+    whole queue is checked against the instrument's remaining waste capacity
+    and tracked reservoir levels so that a late job does not find its waste
+    vessels full or its reservoirs empty. The queue is saved to `queue_path`
+    on every change so it survives restarts.
+
+    If a job pauses, aborts, or fails, it stays at the front of the queue and
+    dispatching stops until :meth:`start` is called again, which resumes it.
+    """
+
+    def __init__(self, instrument, queue_path: str,
+                 refill_between_jobs: bool = True):
+        """
+        :param instrument: the `BrainWasher` to run jobs on.
+        :param queue_path: yaml file to persist the queue to.
+        :param refill_between_jobs: if True, drain the reaction vessel and
+            fill it with the next job's starting solution when its contents
+            don't already match.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.instrument = instrument
+        self.queue_path = Path(queue_path)
+        self.refill_between_jobs = refill_between_jobs
+        self._lock = Lock()
+        self._job_queued = Event()
+        self._stop_requested = Event()
+        self.dispatcher = None
+        self.state = JobQueueState()
+        if self.queue_path.exists():
+            with open(self.queue_path) as queue_file:
+                self.state = JobQueueState(**(load_yaml(queue_file) or {}))
+            self.log.info(f"Loaded {len(self.state.jobs)} queued jobs from "
+                          f"{self.queue_path}.")
+
+    @property
+    def jobs(self) -> list[QueuedJob]:
+        """Queued jobs in the order they will run."""
+        with self._lock:
+            return list(self.state.jobs)
+
+    def _save(self):
+        atomic_write(self.queue_path, yaml.dump(self.state.model_dump()))
+
+    @staticmethod
+    def _sorted(jobs: list[QueuedJob]) -> list[QueuedJob]:
+        return sorted(jobs, key=lambda j: (-j.priority, j.queued))
+
+    def add(self, job_path: str, priority: int = 0):
+        """Validate a job and add it to the queue.
+
+        :param priority: jobs with higher priority run before those with
+            lower priority. Jobs with equal priority run in the order they
+            were added.
+        """
+        queued_job = QueuedJob(path=Path(job_path), priority=priority)
+        job = self.instrument._load_job(job_path)
+        self.instrument.validate_job_against_instrument(
+            job, start_step=self._get_start_step(job))
+        with self._lock:
+            jobs = self.state.jobs
+            # A running job stays at the front regardless of priority.
+            running = jobs[:1] if self._is_running(jobs) else []
+            proposed = running + self._sorted(jobs[len(running):] + [queued_job])
+            self.validate_queue(proposed)
+            self.state.jobs = proposed
+            self._save()
+        self.log.info(f"Queued job {job_path} with priority {priority}.")
+        self._job_queued.set()
+
+    def remove(self, job_path: str):
+        """Remove a job that has not started yet from the queue."""
+        job_path = Path(job_path).resolve()
+        with self._lock:
+            jobs = self.state.jobs
+            if self._is_running(jobs) and jobs[0].path.resolve() == job_path:
+                raise ValueError("Cannot remove the running job.")
+            self.state.jobs = [j for j in jobs if j.path.resolve() != job_path]
+            self._save()
+
+    @staticmethod
+    def _get_start_step(job: Job) -> int:
+        """First step of the job still to run."""
+        return job.resume_state.step if job.resume_state else 0
+
+    def _is_running(self, jobs: list[QueuedJob]) -> bool:
+        return (self.dispatcher is not None and self.dispatcher.is_alive()
+                and bool(jobs) and self.instrument.job_worker is not None
+                and self.instrument.job_worker.is_alive())
+
+    def _needs_refill(self, job: Job, vessel_solution: dict[str, float]) -> bool:
+        """True if the vessel will be refilled with the job's starting
+        solution before the job starts."""
+        return (self.refill_between_jobs and job.resume_state is None
+                and bool(vessel_solution)
+                and vessel_solution != job.starting_solution)
+
+    def validate_queue(self, jobs: list[QueuedJob] = None):
+        """Check that the waste from every queued job, run in order, fits
+        into the instrument's compatible waste vessels and that tracked
+        reservoirs hold enough for every queued job.
+
+        Jobs that were paused only count their remaining steps. Refilling
+        the vessel with a job's starting solution before it starts counts
+        as one more step.
+        """
+        jobs = self.state.jobs if jobs is None else jobs
+        waste_volumes_ul = [wv.curr_volume_ul
+                            for wv in self.instrument.waste_vessels]
+        reservoir_volumes_ul = self.instrument.reservoir_inventory.volumes_ul
+        # What the vessel holds before each job. A running job needs no
+        # refill.
+        vessel_solution = ({} if self._is_running(jobs)
+                           else self.instrument.rxn_vessel.solution)
+        for queued_job in jobs:
+            job = self.instrument._load_job(queued_job.path)
+            try:
+                if self._needs_refill(job, vessel_solution):
+                    refill = Job(name=f"{job.name}_refill",
+                                 starting_solution=vessel_solution,
+                                 protocol=[WashStep(solution=job.starting_solution)])
+                    self.instrument.validate_job_against_instrument(
+                        refill, waste_volumes_ul=waste_volumes_ul,
+                        reservoir_volumes_ul=reservoir_volumes_ul)
+                self.instrument.validate_job_against_instrument(
+                    job, waste_volumes_ul=waste_volumes_ul,
+                    reservoir_volumes_ul=reservoir_volumes_ul,
+                    start_step=self._get_start_step(job))
+            except ValueError as e:
+                raise ValueError(f"Queued job {queued_job.path} would not fit "
+                                 f"in the remaining waste capacity or "
+                                 f"reservoir levels.") from e
+            vessel_solution = (job.protocol[-1].solution if job.protocol
+                               else job.starting_solution)
+
+    def start(self):
+        """Start running queued jobs in the background."""
+        if self.dispatcher is not None and self.dispatcher.is_alive():
+            raise RuntimeError("Job queue is already running.")
+        self._stop_requested.clear()
+        self.dispatcher = Thread(target=self._dispatch_worker,
+                                 name="job_queue_dispatcher", daemon=True)
+        self.dispatcher.start()
+
+    def stop(self):
+        """Stop starting new jobs. A running job continues until it finishes
+        or is paused."""
+        self._stop_requested.set()
+        self._job_queued.set()  # Wake the dispatcher.
+
+    def _dispatch_worker(self):
+        while True:
+            self._job_queued.clear()
+            if self._stop_requested.is_set():
+                return
+            with self._lock:
+                queued_job = self.state.jobs[0] if self.state.jobs else None
+            if queued_job is None:
+                self._job_queued.wait()
+                continue
+            if not self._run_job(queued_job.path):
+                self.log.warning(f"Job {queued_job.path} did not finish. "
+                                 "Stopping the job queue.")
+                return
+            with self._lock:
+                self.state.jobs.remove(queued_job)
+                self._save()
+
+    def _run_job(self, job_path: Path) -> bool:
+        """Run the job to completion.
+
+        :return: True if the job finished; False if it paused or failed.
+        """
+        job = self.instrument._load_job(job_path)
+        if self._needs_refill(job, self.instrument.rxn_vessel.solution):
+            starting_solution = job.starting_solution
+            self.log.info(f"Refilling vessel with starting solution for "
+                          f"{job_path}: {starting_solution}.")
+            self.instrument.fill(empty_first=True, **starting_solution)
+        try:
+            self.instrument.run(job_path)
+        except Exception:
+            self.log.exception(f"Could not start job {job_path}.")
+            return False
+        self.instrument.job_worker.join()
+        job = self.instrument._load_job(job_path)
+        return (job.resume_state is None and bool(job.history.events)
+                and job.history.events[-1].type == "end")
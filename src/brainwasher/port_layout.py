@@ -0,0 +1,154 @@
+"""Selector port layout optimization.
+
+Rotation time depends on how far apart back-to-back selector ports are.
+Trace the selector moves that a job produces and search for the port
+assignment that minimizes total rotation distance around the selector's
+doubled (open/closed) position ring.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from functools import wraps
+from itertools import permutations
+from math import perm
+from pathlib import Path
+
+# Selector targets are (port name, open) pairs.
+SelectorMove = tuple[str, bool]
+
+MAX_EXHAUSTIVE_LAYOUTS = 200000
+
+
+@dataclass
+class PortLayoutProposal:
+    port_map: dict[str, int]
+    proposed_port_map: dict[str, int]
+    move_count: int  # Selector moves, not including skipped no-op moves.
+    positions_rotated: int
+    proposed_positions_rotated: int
+    position_time_s: float
+
+    @property
+    def time_saved_s(self) -> float:
+        """Predicted rotation time saved by the proposed layout."""
+        return ((self.positions_rotated - self.proposed_positions_rotated)
+                * self.position_time_s)
+
+
+def trace_selector_moves(instrument, job_path: Path) -> list[SelectorMove]:
+    """Run a job and record every selector port move it makes.
+
+    .. warning::
+       This runs the job to completion (and writes progress to the job file),
+       so it should only be called on a simulated instrument.
+
+    """
+    selector = instrument.selector
+    moves = []
+
+    def record(func, is_open: bool):
+        @wraps(func)
+        def inner(*args, **kwds):
+            result = func(*args, **kwds)
+            moves.append((str(selector.current_port.port), is_open))
+            return result
+        return inner
+
+    for name in ["move_to_port", "move_clockwise_to_port",
+                 "move_counterclockwise_to_port", "open"]:
+        setattr(selector, name, record(getattr(selector, name), True))
+    selector.close = record(selector.close, False)
+    instrument.run(job_path)
+    instrument.job_worker.join()
+    return moves
+
+
+def get_hw_position(port_index: int, is_open: bool) -> int:
+    """Selector position of a port's open (odd) or closed (even) position."""
+    return port_index * 2 - 1 if is_open else port_index * 2
+
+
+def get_positions_rotated(transitions: Counter, port_map: dict[str, int],
+                          port_count: int) -> int:
+    """Total positions rotated over the specified move transitions, taking
+    the shorter arc around the position ring for each move."""
+    position_count = port_count * 2
+    positions_rotated = 0
+    for ((src, src_open), (dest, dest_open)), count in transitions.items():
+        distance = (get_hw_position(port_map[dest], dest_open)
+                    - get_hw_position(port_map[src], src_open)) % position_count
+        positions_rotated += count * min(distance, position_count - distance)
+    return positions_rotated
+
+
+def optimize_port_layout(moves: list[SelectorMove], port_map: dict[str, int],
+                         port_count: int, position_time_s: float = 0.1):
+    """Propose the selector port assignment that minimizes total rotation
+    distance for the specified move sequence.
+
+    Every named port may be reassigned to any physical port. Small problems
+    are searched exhaustively; larger ones are improved from the current
+    layout by pairwise port swaps until no swap helps.
+
+    :param moves: sequence of (port name, open) selector moves, i.e: from
+        :func:`trace_selector_moves`.
+    :param port_map: current dict, keyed by port name, of selector ports.
+    :param port_count: number of physical selector ports.
+    :param position_time_s: time to rotate from one position to the next.
+    """
+    port_map = {name: int(port) for name, port in port_map.items()}
+    # Only transitions between distinct positions cost rotation.
+    transitions = Counter((src, dest) for src, dest in zip(moves, moves[1:])
+                          if src != dest)
+    # Order names busiest first.
+    names = sorted({name for move in transitions for name, _ in move},
+                   key=lambda n: (-sum(c for (src, dest), c in transitions.items()
+                                       if n in (src[0], dest[0])), n))
+    if missing := set(names) - set(port_map):
+        raise ValueError(f"Moves reference ports missing from the port map: "
+                         f"{missing}.")
+    # Names that are never moved to keep their current ports.
+    fixed = {n: p for n, p in port_map.items() if n not in names}
+    free_ports = [p for p in range(1, port_count + 1)
+                  if p not in fixed.values()]
+    if names and not fixed:
+        # Rotating a layout doesn't change its cost, so pin the busiest port.
+        fixed[names[0]] = port_map[names[0]]
+        free_ports.remove(port_map[names[0]])
+        names = names[1:]
+
+    def cost(layout):
+        return get_positions_rotated(transitions, layout, port_count)
+
+    best = dict(port_map)
+    best_cost = cost(best)
+    if names and perm(len(free_ports), len(names)) <= MAX_EXHAUSTIVE_LAYOUTS:
+        for ports in permutations(free_ports, len(names)):
+            layout = {**fixed, **dict(zip(names, ports))}
+            layout_cost = cost(layout)
+            if layout_cost < best_cost:
+                best, best_cost = layout, layout_cost
+    else:
+        # Pairwise swaps, including swaps with unused ports.
+        improved = True
+        while improved:
+            improved = False
+            for name in names:
+                for port in free_ports:
+                    layout = dict(best)
+                    other = next((n for n in names if best[n] == port), None)
+                    if other == name:
+                        continue
+                    if other is not None:
+                        layout[other] = best[name]
+                    layout[name] = port
+                    layout_cost = cost(layout)
+                    if layout_cost < best_cost:
+                        best, best_cost = layout, layout_cost
+                        improved = True
+    return PortLayoutProposal(port_map=port_map,
+                              proposed_port_map=best,
+                              move_count=sum(transitions.values()),
+                              positions_rotated=cost(port_map),
+                              proposed_positions_rotated=best_cost,
+                              position_time_s=position_time_s)
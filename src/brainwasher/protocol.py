@@ -1,104 +1,244 @@
 """Tissue-clearing proof-of-concept"""
 
 import logging
-import pandas as pd
+import numpy as np
 import re
+from brainwasher.job import Job
+from brainwasher.units import get_scale_factor, get_unit_registry
 from enum import Enum
 from functools import lru_cache
 from pathlib import Path
-from pint import UnitRegistry
-from typing import Union
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    import pandas as pd  # Imported on first use since it is slow to import.
+
+# Grammar for protocol cells.
+NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+# i.e: "1hr", "2.5 hr", "90min"
+DURATION_PATTERN = re.compile(
+    rf"^\s*(?P<value>{NUMBER})\s*(?P<unit>[^\s\d].*?)?\s*$")
+# i.e: "100%" or "100"
+MIX_SPEED_PATTERN = re.compile(rf"^\s*(?P<value>{NUMBER})\s*%?\s*$")
+# One comma-separated Solution component, i.e: "30% THF" or "2.5mL SBiP"
+SOLUTION_COMPONENT_PATTERN = re.compile(
+    rf"^\s*(?P<value>{NUMBER})\s*(?P<unit>[^\s\d]*)\s+(?P<chemical>.*?)\s*$")
 
 
 class Protocol:
-    """Parser for reading/writing protocols to/from CSV files."""
+    """Parser for reading/writing protocols to/from CSV files.
+
+    Each column is parsed in one pass over its distinct entries, and parsed
+    columns are cached per instance until the next :meth:`load`.
+    """
 
     def __init__(self, file: Union[Path, str, None] = None):
         self.log = logging.getLogger(self.__class__.__name__)
-        self.ureg = UnitRegistry()
-        self.df = pd.read_csv(file) if file else None
+        self.df = None
+        if file:
+            self.load(file)
+
+    @property
+    def ureg(self):
+        return get_unit_registry()
 
     def load(self, file: Union[Path, str]):
+        import pandas as pd
         self.df = pd.read_csv(file)
-        self.get_chemicals.cache_clear()
-        self.get_solution.cache_clear()
+        # Per-instance caches of parsed columns.
+        self._parsed_chemicals = lru_cache(maxsize=1)(self._parse_chemicals)
+        self._parsed_durations_s = lru_cache(maxsize=1)(self._parse_durations_s)
+        self._parsed_mix_speeds_percent = lru_cache(maxsize=1)(
+            self._parse_mix_speeds_percent)
+        self._parsed_solutions = lru_cache(maxsize=4)(self._parse_solutions)
 
     @property
     def step_count(self):
         """Return the number of steps in this protocol."""
         return len(self.df.index)
 
-    @lru_cache(maxsize=None)
+    @staticmethod
+    def _factorize(*columns: "pd.Series") -> tuple[np.ndarray, "pd.DataFrame"]:
+        """Row codes into the distinct entries of the specified columns so
+        that each distinct entry only needs to be parsed once."""
+        import pandas as pd
+        codes, uniques = pd.MultiIndex.from_arrays(
+            [c.astype(str) for c in columns]).factorize()
+        return codes, uniques.to_frame(index=False)
+
+    @staticmethod
+    def _get_unit_scale_factors(units: "pd.Series", to_units: str):
+        """Scale factors from each unit string to `to_units` (or nan if the
+        unit can't be converted), parsing each distinct unit only once."""
+        factors = {}
+        for unit in units.dropna().unique():
+            try:
+                factors[unit] = get_scale_factor(unit, to_units)
+            except Exception:  # Undefined unit or wrong dimensions.
+                factors[unit] = np.nan
+        return units.map(factors).to_numpy(dtype=float)
+
+    @staticmethod
+    def _get_step_errors(codes: np.ndarray, messages: dict[int, str]):
+        """Dict, keyed by step, of error messages from messages keyed by
+        distinct entry."""
+        return {int(step): messages[codes[step]]
+                for step in np.flatnonzero(np.isin(codes, list(messages)))}
+
+    def _parse_chemicals(self) -> list[set[str]]:
+        """Set of chemicals for every step."""
+        codes, uniques = self._factorize(self.df["Chemicals"])
+        chemicals = [{c.strip() for c in entry.split(",")}
+                     for entry in uniques[0]]
+        return [chemicals[code] for code in codes]
+
+    def _parse_durations_s(self) -> tuple[np.ndarray, dict[int, str]]:
+        """Duration (in seconds) of every step and errors keyed by step."""
+        codes, uniques = self._factorize(self.df["Duration"])
+        parsed = uniques[0].str.extract(DURATION_PATTERN)
+        factors = self._get_unit_scale_factors(parsed["unit"], "seconds")
+        durations_s = parsed["value"].astype(float).to_numpy() * factors
+        messages = {}
+        for index in np.flatnonzero(np.isnan(durations_s)):
+            entry = uniques[0][index]
+            if parsed["value"].isna()[index]:
+                messages[index] = f"cannot parse duration '{entry}'."
+            elif parsed["unit"].isna()[index]:
+                messages[index] = f"duration '{entry}' has no units."
+            else:
+                messages[index] = f"duration '{entry}' is not a time."
+        return durations_s[codes], self._get_step_errors(codes, messages)
+
+    def _parse_mix_speeds_percent(self) -> tuple[np.ndarray, dict[int, str]]:
+        """Mix speed (in percent) of every step and errors keyed by step."""
+        codes, uniques = self._factorize(self.df["Mix Speed"])
+        parsed = uniques[0].str.extract(MIX_SPEED_PATTERN)
+        mix_speeds_percent = parsed["value"].astype(float).to_numpy()
+        messages = {index: f"unrecognized mix speed '{uniques[0][index]}'."
+                    for index in np.flatnonzero(np.isnan(mix_speeds_percent))}
+        return mix_speeds_percent[codes], self._get_step_errors(codes, messages)
+
+    def _parse_solutions(self, max_volume_ul: float
+                         ) -> tuple[list[dict[str, float]], dict[int, str]]:
+        """Solution (dict of chemical volumes in microliters) of every step
+        and errors keyed by step.
+
+        Percent-based amounts are a fraction of `max_volume_ul`.
+        """
+        import pandas as pd
+        codes, uniques = self._factorize(self.df["Chemicals"], self.df["Solution"])
+        entries = uniques[1].str.split(",").explode()
+        components = entries.str.extract(SOLUTION_COMPONENT_PATTERN)
+        chemicals = uniques[0].str.split(",").explode().str.strip()
+        listed = pd.MultiIndex.from_arrays(
+            [components.index, components["chemical"]]).isin(
+            pd.MultiIndex.from_arrays([chemicals.index, chemicals]))
+        is_percent = (components["unit"] == "%").to_numpy()
+        values = components["value"].astype(float).to_numpy()
+        factors = self._get_unit_scale_factors(
+            components["unit"].where(~is_percent), "uL")
+        volumes_ul = np.where(is_percent, values / 100. * max_volume_ul,
+                              values * factors)
+        solutions = [{} for _ in range(len(uniques))]
+        messages = {}
+        for index, entry, unit, chemical, is_listed, volume_ul in zip(
+                components.index.tolist(), entries.tolist(),
+                components["unit"].tolist(), components["chemical"].tolist(),
+                listed.tolist(), volumes_ul.tolist()):
+            if index in messages:
+                continue
+            entry = str(entry).strip()
+            if pd.isna(chemical):
+                messages[index] = f"cannot parse solution component '{entry}'."
+            elif not unit:
+                messages[index] = f"solution component '{entry}' has no units."
+            elif not is_listed:
+                messages[index] = (f"solution chemical '{chemical}' is not "
+                                   "listed in the step's chemicals.")
+            elif np.isnan(volume_ul):
+                messages[index] = (f"solution component '{entry}' is not a "
+                                   "volume or percent.")
+            else:
+                solutions[index][chemical] = volume_ul
+        return ([solutions[code] for code in codes],
+                self._get_step_errors(codes, messages))
+
     def get_chemicals(self, step: Union[int, None] = None):
         """Return all chemicals present in a protocol file or for a specific
         step."""
+        chemicals = self._parsed_chemicals()
         if step is not None:
-            entry = self.df.loc[step, "Chemicals"]
-            return {c.strip() for c in entry.split(",")}
-        column = self.df.loc[:, "Chemicals"]
-        chem_list = [c.strip() for entry in column.values for c in entry.split(",")]
-        return set(chem_list)
+            return set(chemicals[step])
+        return set().union(*chemicals)
 
     def get_duration_s(self, step: int):
         """Return the duration in seconds"""
-        return self.ureg(self.df.loc[step, "Duration"]).to('seconds').m
+        durations_s, errors = self._parsed_durations_s()
+        if step in errors:
+            raise ValueError(f"Step {step}: {errors[step]}")
+        return float(durations_s[step])
 
     def get_mix_speed_percent(self, step: int):
-        parsed_mix_speed = self.ureg(self.df.loc[step, "Mix Speed"])
-        if type(parsed_mix_speed) in [float, int]:
-            return float(parsed_mix_speed)
-        if type(parsed_mix_speed) == self.ureg.Quantity:
-            if parsed_mix_speed.units == self.ureg.percent:
-                return float(parsed_mix_speed.magnitude)
-        raise ValueError("Unrecognized mix speed specification.")
-
-    @lru_cache(maxsize=None)
+        mix_speeds_percent, errors = self._parsed_mix_speeds_percent()
+        if step in errors:
+            raise ValueError(f"Step {step}: {errors[step]}")
+        return float(mix_speeds_percent[step])
+
     def get_solution(self, step: int, max_volume_ul: float):
         """Return a dictionary, keyed by chemical name, of the solution volume
         in microliters"""
-        solution = {}
-        solution_str = self.df.loc[step, "Solution"]
-        chemicals = self.get_chemicals(step)
-        all_chemicals = self.get_chemicals()
-        # Parse string for volume fraction.
-        qty_words = [q.strip() for q in solution_str.split(',')]
-        for qty_word in qty_words:
-            found_chemical = None
-            qty = None
-            for chemical in chemicals:
-                if chemical in qty_word:
-                    found_chemical = chemical
-                    qty = self.ureg(qty_word.rstrip(chemical))
-                    # Convert 'amount' to microliters.
-                    if type(qty) != self.ureg.Quantity:
-                        raise ValueError("Solution specification for step "
-                                         f"{step} has no units!")
-                    if qty.units == self.ureg.percent:
-                        ul = float((qty.magnitude / 100.) * max_volume_ul)
-                    else:
-                        ul = float(qty.to('uL').magnitude)
-                    solution[chemical] = ul
-            if not all([found_chemical, qty]):
-                raise RuntimeError(f"Cannot parse solution on step {step}: {solution_str}")
-        # TODO: Infer remaining percents if any are missing.
-        ## If any quantities are specified as a percent, infer any missing qty.
-        #if any([i.units == self.ureg.percent for i in solution.values()]):
-        #    print("found percent!!")
-        return solution
+        solutions, errors = self._parsed_solutions(max_volume_ul)
+        if step in errors:
+            raise ValueError(f"Step {step}: {errors[step]}")
+        return dict(solutions[step])
+
+    def get_errors(self, max_volume_ul: float) -> dict[int, list[str]]:
+        """Dict, keyed by step, of every problem in the protocol."""
+        errors = {}
+        for _, step_errors in [self._parsed_durations_s(),
+                               self._parsed_mix_speeds_percent(),
+                               self._parsed_solutions(max_volume_ul)]:
+            for step, message in step_errors.items():
+                errors.setdefault(step, []).append(message)
+        return dict(sorted(errors.items()))
 
     def validate(self, max_volume_ul):
         """Read the current schedule. Ensure every step is doable on the
         target system.
+
+        :raises ValueError: listing every invalid step.
         """
         # FIXME: passing in max_volume_ul here feels sloppy.
-        for index, row in self.df.iterrows():
-            # Validate column names.
-            # Validate chemicals.
-            # Validate solutions.
-            # Validate durations.
-            # Validate solution spec as "all percent" or "all volume-based"
-            # Lazy way: iterate through all function calls and cache everything.
-            self.get_solution(index, max_volume_ul)
-
+        if errors := self.get_errors(max_volume_ul):
+            raise ValueError("Invalid protocol steps:\n" + "\n".join(
+                f"  Step {step}: {' '.join(messages)}"
+                for step, messages in errors.items()))
 
+    def to_job(self, name: str, max_volume_ul: float, max_mix_speed_rpm: float,
+               starting_solution: dict[str, float] = None,
+               source: Union[Path, str, None] = None) -> Job:
+        """Compile this protocol into a job.
 
+        :param name: job name.
+        :param max_volume_ul: volume that percent-based solutions are a
+            fraction of.
+        :param max_mix_speed_rpm: mixing speed corresponding to 100% mix speed.
+        :param starting_solution: solution the reaction vessel holds before
+            the first step. Defaults to an unspecified (empty) solution.
+        :param source: path to this protocol, recorded as the job's source.
+        """
+        self.validate(max_volume_ul)
+        durations_s, _ = self._parsed_durations_s()
+        mix_speeds_percent, _ = self._parsed_mix_speeds_percent()
+        solutions, _ = self._parsed_solutions(max_volume_ul)
+        mix_speeds_rpm = mix_speeds_percent / 100. * max_mix_speed_rpm
+        protocol = [{"duration_s": duration_s, "mix_speed_rpm": mix_speed_rpm,
+                     "solution": solution}
+                    for duration_s, mix_speed_rpm, solution
+                    in zip(durations_s.tolist(), mix_speeds_rpm.tolist(),
+                           solutions)]
+        job = Job(name=name, starting_solution=starting_solution or {},
+                  protocol=protocol)
+        if source is not None:
+            job.set_source_protocol(Path(source))
+        return job
@@ -0,0 +1,148 @@
+"""Persistent record of how much liquid is left in each reagent reservoir."""
+
+import logging
+import numpy as np
+import yaml
+
+from brainwasher.file_io import atomic_write
+from brainwasher.job import Job
+from brainwasher.job_loader import load_yaml
+from dataclasses import dataclass, field
+from pathlib import Path
+from pydantic import BaseModel
+from typing import Iterable
+
+
+class ReservoirInventoryState(BaseModel):
+    volumes_ul: dict[str, float] = dict()  # Tracked reservoir levels.
+    # Liquid drawn from each reservoir by the last reservoir line priming.
+    reservoir_line_volumes_ul: dict[str, float] = dict()
+    # Liquid drawn from each reservoir by the last pump line priming.
+    pump_line_volumes_ul: dict[str, float] = dict()
+
+
+@dataclass
+class ReservoirForecast:
+    volumes_ul: dict[str, float]  # Per tracked reservoir, at job end.
+    # First step at which each reservoir that runs dry would run dry.
+    shortfall_steps: dict[str, int] = field(default_factory=dict)
+
+
+class ReservoirInventory:
+    """Track the level of each reagent reservoir across dispenses, primes,
+    and restarts.
+
+    Only reservoirs whose level has been set with :meth:`refill` are
+    tracked. Every change is saved to `inventory_path` (if specified) so that
+    levels survive restarts. The liquid drawn by the last priming of each
+    reservoir line and pump line is saved too so that forecasts can include
+    the liquid that priming will consume.
+    """
+
+    def __init__(self, inventory_path: str = None):
+        """
+        :param inventory_path: yaml file to persist reservoir levels to.
+            If unspecified, levels are only kept in memory.
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.inventory_path = (Path(inventory_path) if inventory_path is not None
+                               else None)
+        self.state = ReservoirInventoryState()
+        if self.inventory_path is not None and self.inventory_path.exists():
+            with open(self.inventory_path) as inventory_file:
+                self.state = ReservoirInventoryState(
+                    **(load_yaml(inventory_file) or {}))
+            self.log.info(f"Loaded levels of {len(self.state.volumes_ul)} "
+                          f"reservoirs from {self.inventory_path}.")
+
+    @property
+    def volumes_ul(self) -> dict[str, float]:
+        """Dict, keyed by chemical, of each tracked reservoir's level."""
+        return dict(self.state.volumes_ul)
+
+    def _save(self):
+        if self.inventory_path is None:
+            return
+        atomic_write(self.inventory_path, yaml.dump(self.state.model_dump()))
+
+    def get_volume_ul(self, chemical: str) -> float | None:
+        """Level of the chemical's reservoir or None if it is not tracked."""
+        return self.state.volumes_ul.get(chemical)
+
+    def refill(self, chemical: str, volume_ul: float):
+        """Set the level of the chemical's reservoir, i.e: after filling or
+        replacing it, and start tracking it."""
+        self.state.volumes_ul[chemical] = volume_ul
+        self._save()
+        self.log.info(f"{chemical} reservoir set to {volume_ul}[uL].")
+
+    def untrack(self, chemical: str):
+        """Stop tracking the chemical's reservoir level."""
+        self.state.volumes_ul.pop(chemical, None)
+        self._save()
+
+    def _withdraw(self, chemical: str, volume_ul: float):
+        if chemical not in self.state.volumes_ul:
+            return
+        self.state.volumes_ul[chemical] -= volume_ul
+        if self.state.volumes_ul[chemical] < 0:
+            self.log.warning(f"{chemical} reservoir is expected to be empty "
+                             f"(short by {-self.state.volumes_ul[chemical]:.1f}"
+                             f"[uL]).")
+
+    def dispense(self, chemical: str, volume_ul: float):
+        """Record liquid drawn from the chemical's reservoir."""
+        self._withdraw(chemical, volume_ul)
+        self._save()
+
+    def prime_reservoir_line(self, chemical: str, volume_ul: float):
+        """Record liquid drawn from the reservoir to prime its line."""
+        self._withdraw(chemical, volume_ul)
+        self.state.reservoir_line_volumes_ul[chemical] = volume_ul
+        self._save()
+
+    def prime_pump_line(self, chemical: str, volume_ul: float):
+        """Record liquid drawn from the reservoir to prime the pump line."""
+        self._withdraw(chemical, volume_ul)
+        self.state.pump_line_volumes_ul[chemical] = volume_ul
+        self._save()
+
+    def unprime_reservoir_line(self, chemical: str, volume_ul: float):
+        """Record liquid pushed back into the reservoir from its line."""
+        self._withdraw(chemical, -volume_ul)
+        self._save()
+
+    def forecast(self, job: Job, volumes_ul: dict[str, float] = None,
+                 start_step: int = 0,
+                 primed_chemicals: Iterable[str] = ()) -> ReservoirForecast:
+        """Predict each tracked reservoir's level through the job, including
+        the liquid drawn to prime each reservoir line on first use and the
+        pump line on every use.
+
+        :param volumes_ul: reservoir levels to start from. Defaults to the
+            current levels. Pass the previous forecast's `volumes_ul` to
+            forecast several jobs back-to-back.
+        :param start_step: first step to forecast, i.e: when resuming a job.
+        :param primed_chemicals: chemicals whose reservoir lines are already
+            primed.
+        """
+        volumes_ul = dict(volumes_ul if volumes_ul is not None
+                          else self.state.volumes_ul)
+        primed_chemicals = set(primed_chemicals)
+        shortfall_steps = {}
+        for chemical, volume_ul in volumes_ul.items():
+            used_ul, uses = job.index.get_running_usage(chemical, start_step)
+            if not uses.any():
+                continue
+            # Liquid drawn, including priming, through each step.
+            pump_line_ul = self.state.pump_line_volumes_ul.get(chemical, 0)
+            drawn_ul = used_ul + uses * pump_line_ul
+            if chemical not in primed_chemicals:
+                reservoir_line_ul = self.state.reservoir_line_volumes_ul.get(
+                    chemical, 0)
+                drawn_ul += np.where(uses > 0, reservoir_line_ul, 0)
+            if (dry_steps := np.flatnonzero(drawn_ul > volume_ul)).size:
+                shortfall_steps[chemical] = start_step + int(dry_steps[0])
+            volumes_ul[chemical] = volume_ul - float(drawn_ul[-1])
+        return ReservoirForecast(volumes_ul=volumes_ul,
+                                 shortfall_steps=shortfall_steps)
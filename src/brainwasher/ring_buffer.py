@@ -0,0 +1,92 @@
+"""Fixed-size buffer of timestamped samples for trailing-window statistics."""
+
+import numpy as np
+
+from bisect import bisect_left
+
+
+class TimestampedRingBuffer:
+    """Fixed-size ring of (time, value) samples written by a single thread
+    and read by any number of threads without locks.
+
+    The writer stores a sample in its slot before publishing it by
+    incrementing the sample count. Once the buffer is full, that slot also
+    holds the oldest published sample, so readers treat it as overwritten
+    already. Readers copy the samples they need and then discard any that
+    the writer may have overwritten during the copy.
+
+    .. note::
+       Sample times must be non-decreasing.
+
+    """
+
+    def __init__(self, capacity: int = 6000):
+        """
+        :param capacity: number of most-recent samples to keep.
+        """
+        self.capacity = capacity
+        self._times_s = np.zeros(capacity)
+        self._values = np.zeros(capacity)
+        self._count = 0  # Total samples ever written.
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def append(self, time_s: float, value: float):
+        """Add a sample. Must only be called from a single writer thread."""
+        index = self._count % self.capacity
+        self._times_s[index] = time_s
+        self._values[index] = value
+        self._count += 1  # Publish.
+
+    def latest(self) -> tuple[float, float] | None:
+        """Most recent (time, value) sample or None if empty."""
+        count = self._count
+        if not count:
+            return None
+        index = (count - 1) % self.capacity
+        return float(self._times_s[index]), float(self._values[index])
+
+    def window(self, duration_s: float) -> tuple[np.ndarray, np.ndarray]:
+        """Copy of the (times, values) samples within `duration_s` of the
+        most recent sample, oldest first.
+
+        The window always includes the most recent sample (if any) and is
+        limited to the `capacity - 1` most recent samples, since the slot
+        after them may be mid-write.
+        """
+        count = self._count
+        if not count:
+            return np.empty(0), np.empty(0)
+        first = min(max(count + 1 - self.capacity, 0), count - 1)
+        end_time_s = self._times_s[(count - 1) % self.capacity]
+        start = first + bisect_left(
+            range(first, count), end_time_s - duration_s,
+            key=lambda i: self._times_s[i % self.capacity])
+        start = min(start, count - 1)
+        indices = np.arange(start, count) % self.capacity
+        times_s = self._times_s[indices]
+        values = self._values[indices]
+        # Drop samples that the writer overwrote while we were copying.
+        overwritten = max(self._count + 1 - self.capacity - start, 0)
+        return times_s[overwritten:], values[overwritten:]
+
+    def mean(self, duration_s: float) -> float:
+        """Mean value over the trailing window or nan if empty."""
+        _, values = self.window(duration_s)
+        return float(values.mean()) if len(values) else float("nan")
+
+    def variance(self, duration_s: float) -> float:
+        """Variance over the trailing window or nan if empty."""
+        _, values = self.window(duration_s)
+        return float(values.var()) if len(values) else float("nan")
+
+    def slope(self, duration_s: float) -> float:
+        """Least-squares rate of change (value per second) over the trailing
+        window or 0 if the window spans no time."""
+        times_s, values = self.window(duration_s)
+        times_s = times_s - times_s.mean() if len(times_s) else times_s
+        denominator = np.dot(times_s, times_s)
+        if not denominator:
+            return 0.
+        return float(np.dot(times_s, values - values.mean()) / denominator)
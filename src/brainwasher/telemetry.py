@@ -0,0 +1,194 @@
+"""Bounded on-disk recording of timestamped pressure samples."""
+
+import json
+import logging
+import numpy as np
+import time
+
+from brainwasher.file_io import atomic_write
+from pathlib import Path
+
+# One record per pressure sample. `step` is the (0-indexed) job step being
+# run when the sample was taken or -1 if no job was running.
+# `sample_period_s` is the pressure monitor's sampling period at the time.
+PRESSURE_RECORD_DTYPE = np.dtype([("time_s", "<f8"),
+                                  ("pressure_psig", "<f4"),
+                                  ("step", "<i4"),
+                                  ("sample_period_s", "<f4")])
+
+
+class PressureTelemetryRecorder:
+    """Stream pressure samples into a rotating series of memory-mapped,
+    append-only `.npy` files.
+
+    Each file is preallocated to hold `file_capacity` records, so appending
+    only writes into the mapped pages, and memory use stays constant
+    regardless of run length. Once a file fills up, recording continues in
+    a new file and the oldest files beyond `max_files` are deleted, which
+    bounds disk use too. Unwritten records have a NaN timestamp.
+
+    Sample times come from the instrument clock, which is monotonic but
+    arbitrary per process. Each file gets a small json index, written on
+    every flush, with the offset from sample time to wall-clock (unix) time
+    at the file's first sample, the file's time range, and the rows each
+    job step spans, so that reads skip files and rows they don't need.
+
+    .. note::
+       `record` must only be called from a single writer thread.
+
+    """
+
+    FILE_PREFIX = "pressure_"
+
+    def __init__(self, directory: str, file_capacity: int = 1048576,
+                 max_files: int = 32, name: str = None):
+        """
+        :param directory: folder to write telemetry files into.
+        :param file_capacity: records per file (20 bytes each).
+        :param max_files: number of most-recent files to keep.
+        """
+        logger_name = self.__class__.__name__ + (f".{name}" if name else "")
+        self.log = logging.getLogger(logger_name)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.file_capacity = file_capacity
+        self.max_files = max_files
+        # Continue numbering after files from previous runs.
+        existing_files = self.get_files(self.directory)
+        self._file_index = (int(existing_files[-1].stem[len(self.FILE_PREFIX):]) + 1
+                            if existing_files else 0)
+        self._records = None
+        self._record_count = 0
+        self._index = None
+        self._open_next_file()
+
+    @classmethod
+    def get_files(cls, directory: str) -> list[Path]:
+        """Telemetry files in the directory, oldest first."""
+        return sorted(Path(directory).glob(f"{cls.FILE_PREFIX}*.npy"))
+
+    @staticmethod
+    def get_index_path(path: Path) -> Path:
+        return path.with_suffix(".json")
+
+    def _write_index(self):
+        """Atomically save the index of the current file's records."""
+        atomic_write(self.get_index_path(self._path), json.dumps(self._index))
+
+    def _open_next_file(self):
+        if self._records is not None:
+            self.flush()
+        path = self.directory / f"{self.FILE_PREFIX}{self._file_index:06d}.npy"
+        self._path = path
+        self.log.debug(f"Recording pressure telemetry to: {path}")
+        self._records = np.lib.format.open_memmap(
+            path, mode="w+", dtype=PRESSURE_RECORD_DTYPE,
+            shape=(self.file_capacity,))
+        self._records["time_s"] = np.nan
+        self._record_count = 0
+        # Rows [start, stop) of each run of samples from one step.
+        self._index = {"wall_clock_offset_s": None, "record_count": 0,
+                       "start_time_s": None, "end_time_s": None,
+                       "step_runs": []}
+        self._file_index += 1
+        for old_path in self.get_files(self.directory)[:-self.max_files]:
+            self.log.debug(f"Removing old pressure telemetry: {old_path}")
+            old_path.unlink()
+            self.get_index_path(old_path).unlink(missing_ok=True)
+
+    def record(self, time_s: float, pressure_psig: float, step: int = -1,
+               sample_period_s: float = np.nan):
+        """Append one pressure sample."""
+        if self._record_count == self.file_capacity:
+            self._open_next_file()
+        self._records[self._record_count] = (time_s, pressure_psig, step,
+                                             sample_period_s)
+        index = self._index
+        if index["wall_clock_offset_s"] is None:
+            index["wall_clock_offset_s"] = time.time() - time_s
+            index["start_time_s"] = time_s
+        index["end_time_s"] = time_s
+        runs = index["step_runs"]
+        if runs and runs[-1][0] == step:
+            runs[-1][2] += 1
+        else:
+            runs.append([step, self._record_count, self._record_count + 1])
+        self._record_count += 1
+        index["record_count"] = self._record_count
+        if self._record_count == 1:  # Save the wall-clock offset right away.
+            self._write_index()
+
+    def flush(self):
+        self._records.flush()
+        self._write_index()
+
+    def close(self):
+        if self._records is not None:
+            self.flush()
+            self._records = None
+
+
+def _read_index(path: Path) -> dict:
+    """A telemetry file's index or an empty one if it has none, i.e: the
+    recorder stopped before its first flush."""
+    index_path = PressureTelemetryRecorder.get_index_path(path)
+    if not index_path.exists():
+        return {"wall_clock_offset_s": None, "record_count": 0,
+                "start_time_s": None, "end_time_s": None, "step_runs": []}
+    with open(index_path) as index_file:
+        return json.load(index_file)
+
+
+def read_pressure_telemetry(directory: str, step: int = None,
+                            start_time_s: float = None,
+                            end_time_s: float = None,
+                            wall_clock: bool = False) -> np.ndarray:
+    """Load recorded pressure samples, optionally limited to one job step
+    and/or a time range.
+
+    Only the rows that each file's index lists for the step and time range
+    are read, plus any rows written after the index was last saved.
+
+    :param wall_clock: if True, return (and filter by) wall-clock (unix)
+        times so that recordings line up across restarts and with logs.
+        Files without a saved wall-clock offset are skipped.
+    :return: structured array with `time_s`, `pressure_psig`, `step`, and
+        `sample_period_s` fields, oldest first.
+    """
+    chunks = []
+    for path in PressureTelemetryRecorder.get_files(directory):
+        index = _read_index(path)
+        offset_s = 0.
+        if wall_clock:
+            if (offset_s := index["wall_clock_offset_s"]) is None:
+                continue
+        indexed_count = index["record_count"]
+        # Indexed rows that may match.
+        if indexed_count and ((start_time_s is not None and
+                               index["end_time_s"] + offset_s < start_time_s)
+                              or (end_time_s is not None and
+                                  index["start_time_s"] + offset_s > end_time_s)):
+            row_ranges = []
+        else:
+            row_ranges = [(start, stop) for run_step, start, stop
+                          in index["step_runs"]
+                          if step is None or run_step == step]
+        records = np.load(path, mmap_mode="r")
+        # Rows recorded since the index was saved aren't indexed.
+        row_ranges.append((indexed_count, len(records)))
+        for start, stop in row_ranges:
+            rows = records[start:stop]
+            times_s = rows["time_s"] + offset_s
+            mask = ~np.isnan(times_s)
+            if step is not None:
+                mask &= rows["step"] == step
+            if start_time_s is not None:
+                mask &= times_s >= start_time_s
+            if end_time_s is not None:
+                mask &= times_s <= end_time_s
+            chunk = np.array(rows[mask])
+            chunk["time_s"] += offset_s
+            chunks.append(chunk)
+    if not chunks:
+        return np.empty(0, dtype=PRESSURE_RECORD_DTYPE)
+    return np.concatenate(chunks)
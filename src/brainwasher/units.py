@@ -0,0 +1,33 @@
+"""Shared pint unit registry and cached unit parsing.
+
+Creating a `pint.UnitRegistry` (and importing pint) is slow, so the registry
+is created once, on first use, and shared.
+"""
+
+from functools import cache, lru_cache
+
+
+@cache
+def get_unit_registry():
+    """The shared unit registry."""
+    from pint import UnitRegistry
+    return UnitRegistry()
+
+
+@lru_cache(maxsize=None)
+def parse_quantity(text: str):
+    """Parse text (i.e: "2.5hr" or "30%") into a quantity, or a plain number
+    if it has no units.
+
+    .. warning::
+       Returned quantities are shared between callers and must not be
+       modified in place.
+
+    """
+    return get_unit_registry()(text)
+
+
+@lru_cache(maxsize=None)
+def get_scale_factor(units: str, to_units: str) -> float:
+    """Factor that converts a magnitude in `units` to `to_units`."""
+    return float(get_unit_registry().Quantity(1, units).to(to_units).m)
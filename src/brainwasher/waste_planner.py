@@ -0,0 +1,182 @@
+"""Planning of where a job's waste goes and whether it fits."""
+
+from brainwasher.devices.vessels import WasteVessel
+from brainwasher.job import Job
+from dataclasses import dataclass, field
+from typing import Iterable
+
+# Routing options kept per item while optimizing. Options that are no better
+# than another one are always dropped first, so this only bounds the search
+# for jobs whose waste can be split across many vessels.
+MAX_ROUTING_OPTIONS = 64
+
+
+@dataclass
+class WastePlan:
+    # Per step from `start_step` on. None if incompatible.
+    waste_vessel_ids: list[int | None]
+    volumes_ul: list[float]  # Per waste vessel, at job end.
+    headroom_ul: list[float]  # Per waste vessel, at job end. Negative if full.
+    # First step at which each waste vessel that overflows would overflow.
+    overflow_steps: dict[int, int] = field(default_factory=dict)
+    start_step: int = 0
+    # Waste vessel for the waste from priming each chemical's reservoir line.
+    prime_waste_vessel_ids: dict[str, int | None] = field(default_factory=dict)
+    # (step, waste vessel id) of each waste vessel that must be emptied
+    # before the step starts for the job's waste to fit.
+    interventions: list[tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def incompatible_steps(self) -> list[int]:
+        return [step for step, waste_vessel_id
+                in enumerate(self.waste_vessel_ids, start=self.start_step)
+                if waste_vessel_id is None]
+
+    def get_waste_vessel_id(self, step: int) -> int | None:
+        """Waste vessel planned for the specified step's waste."""
+        if not 0 <= step - self.start_step < len(self.waste_vessel_ids):
+            return None
+        return self.waste_vessel_ids[step - self.start_step]
+
+
+def get_compatible_waste_vessel_ids(components: set[str],
+                                    waste_vessels: list[WasteVessel]) -> list[int]:
+    """Indices of the waste vessels that accept a solution's components."""
+    return [index for index, wv in enumerate(waste_vessels)
+            if components <= wv.compatible_chemicals]
+
+
+@dataclass(frozen=True)
+class _RoutingOption:
+    """Waste vessel volumes after routing every item so far one particular
+    way, linked to the option it extends."""
+    interventions: int
+    volumes_ul: tuple[float, ...]
+    waste_vessel_id: int | None = None  # Where this option routed its item.
+    emptied: bool = False  # Whether the vessel was emptied for the item.
+    previous: "_RoutingOption" = None
+
+
+def _get_waste_items(job: Job, start_step: int, prime_waste_ul: float,
+                     purge_waste_ul: float, primed_chemicals: Iterable[str]):
+    """Every deposit of waste in the order it happens: (step, prime chemical
+    or None, solution components, volume)."""
+    index = job.index
+    primed = set(primed_chemicals)
+    group_ids = index.waste_group_ids.tolist()
+    step_waste_ul = index.step_waste_ul.tolist()
+    items = []
+    for step in range(start_step, len(job.protocol)):
+        solution = job.protocol[step].solution
+        # Reservoir lines are primed on first use, before dispensing.
+        for chemical in solution:
+            if chemical not in primed:
+                primed.add(chemical)
+                items.append((step, chemical, frozenset([chemical]),
+                              prime_waste_ul))
+        # Purged pump line contents are routed with the step's waste.
+        items.append((step, None, index.waste_groups[group_ids[step]],
+                      step_waste_ul[step] + (purge_waste_ul if solution else 0)))
+    return items
+
+
+def _prune(options: list[_RoutingOption], max_volumes_ul: list[float]):
+    """Drop options that need at least as many interventions and leave every
+    waste vessel at least as full as another option."""
+    def fullness(option):
+        return max(ul / max_ul for ul, max_ul
+                   in zip(option.volumes_ul, max_volumes_ul))
+    kept = []
+    for option in sorted(options, key=lambda o: (o.interventions, fullness(o),
+                                                 sum(o.volumes_ul))):
+        if not any(k.interventions <= option.interventions
+                   and all(a <= b for a, b in zip(k.volumes_ul, option.volumes_ul))
+                   for k in kept):
+            kept.append(option)
+            if len(kept) == MAX_ROUTING_OPTIONS:
+                break
+    return kept
+
+
+def optimize_waste_plan(job: Job, waste_vessels: list[WasteVessel],
+                        volumes_ul: list[float] = None, start_step: int = 0,
+                        prime_waste_ul: float = 0, purge_waste_ul: float = 0,
+                        primed_chemicals: Iterable[str] = ()) -> WastePlan:
+    """Route every step's waste, and the waste from priming reservoir lines
+    and purging the pump line, across the whole job so that waste vessels
+    need emptying as few times as possible.
+
+    Rather than picking the emptiest compatible vessel one step at a time,
+    this keeps every way of routing the waste so far that is not outdone by
+    another (no fewer interventions and no emptier vessels) and picks the
+    best one once the whole job is routed. Waste that only one
+    vessel accepts never branches the search. Ties are broken by leaving the
+    fullest waste vessel as empty as possible.
+
+    :param waste_vessels: waste vessels to route to. They are not modified.
+    :param volumes_ul: per-vessel starting volumes. Defaults to the vessels'
+        current volumes.
+    :param start_step: first step to plan, i.e: when resuming a job.
+    :param prime_waste_ul: estimated waste from priming a reservoir line.
+    :param purge_waste_ul: estimated waste from purging the pump line after
+        each dispense.
+    :param primed_chemicals: chemicals whose reservoir lines are already
+        primed.
+    """
+    volumes_ul = tuple(volumes_ul if volumes_ul is not None
+                       else [wv.curr_volume_ul for wv in waste_vessels])
+    max_volumes_ul = [wv.max_volume_ul for wv in waste_vessels]
+    compatible_ids = {}
+    items = _get_waste_items(job, start_step, prime_waste_ul, purge_waste_ul,
+                             primed_chemicals)
+    options = [_RoutingOption(interventions=0, volumes_ul=volumes_ul)]
+    for _, _, components, waste_ul in items:
+        if components not in compatible_ids:
+            compatible_ids[components] = get_compatible_waste_vessel_ids(
+                set(components), waste_vessels)
+        ids = compatible_ids[components]
+        if not ids:
+            options = [_RoutingOption(o.interventions, o.volumes_ul, previous=o)
+                       for o in options]
+            continue
+        routed = []
+        for option in options:
+            for waste_vessel_id in ids:
+                volume_ul = option.volumes_ul[waste_vessel_id] + waste_ul
+                emptied = volume_ul > max_volumes_ul[waste_vessel_id]
+                if emptied:  # Empty the vessel first.
+                    volume_ul = waste_ul
+                new_volumes_ul = list(option.volumes_ul)
+                new_volumes_ul[waste_vessel_id] = volume_ul
+                routed.append(_RoutingOption(
+                    option.interventions + emptied, tuple(new_volumes_ul),
+                    waste_vessel_id, emptied, option))
+        # Routing to a single vessel keeps the options in the same order.
+        options = routed if len(ids) == 1 else _prune(routed, max_volumes_ul)
+    best = _prune(options, max_volumes_ul)[0]
+    # Walk back through the chosen option's routing decisions.
+    decisions = []
+    option = best
+    while option.previous is not None:
+        decisions.append(option)
+        option = option.previous
+    waste_vessel_ids = []
+    prime_waste_vessel_ids = {}
+    interventions = []
+    overflow_steps = {}
+    for (step, chemical, _, _), decision in zip(items, reversed(decisions)):
+        if chemical is not None:
+            prime_waste_vessel_ids[chemical] = decision.waste_vessel_id
+        else:
+            waste_vessel_ids.append(decision.waste_vessel_id)
+        if decision.emptied:
+            interventions.append((step, decision.waste_vessel_id))
+            overflow_steps.setdefault(decision.waste_vessel_id, step)
+    return WastePlan(waste_vessel_ids=waste_vessel_ids,
+                     volumes_ul=list(best.volumes_ul),
+                     headroom_ul=[max_ul - ul for max_ul, ul
+                                  in zip(max_volumes_ul, best.volumes_ul)],
+                     overflow_steps=overflow_steps,
+                     start_step=start_step,
+                     prime_waste_vessel_ids=prime_waste_vessel_ids,
+                     interventions=interventions)
@@ -0,0 +1,61 @@
+"""Jobs and job files shared by the tests."""
+
+import yaml
+
+from brainwasher.job import Job, WashStep
+from brainwasher.job_loader import load_yaml
+
+
+def make_dummy_job():
+    """return a simple job"""
+    my_model = Job(name="simple_wash",  # source_protocol=".",
+                   starting_solution={"pbs": 10000},
+                   protocol=[WashStep(mix_speed_rpm=1000, duration_s=1800,
+                                      solution={"thf": 1000, "di_water": 4000}),
+                             WashStep(mix_speed_rpm=1000, duration_s=1800,
+                                      solution={"dcm": 5000})])
+    return my_model
+
+
+def make_long_dummy_job():
+    """return another job with a few extra steps"""
+    my_model = Job(name="power_wash",  # source_protocol=".",
+                   starting_solution={"pbs": 10000},
+                   protocol=[WashStep(mix_speed_rpm=1000, duration_s=1800,
+                                      solution={"thf": 1000, "di_water": 4000}),
+                             WashStep(mix_speed_rpm=1000, duration_s=1800,
+                                      solution={"dcm": 5000}),
+                             WashStep(mix_speed_rpm=1000, duration_s=1800,
+                                      solution={"dcm": 8000}),
+                             WashStep(mix_speed_rpm=1000, duration_s=1800,
+                                      solution={"thf": 9000, "di_water": 1000})])
+    return my_model
+
+
+def make_job(*solutions: dict, name: str = "job") -> Job:
+    """Job with one step per solution and no starting solution."""
+    return Job(name=name, starting_solution={},
+               protocol=[WashStep(solution=solution) for solution in solutions])
+
+
+def save_job(path, job: Job):
+    """Write the job to a job file."""
+    with open(path, "w") as job_file:
+        yaml.dump(job.model_dump(exclude_none=True), job_file)
+    return path
+
+
+def write_job(path, name: str, volume_ul: float = 5000, steps: int = 2):
+    """Write a job file that fills with `volume_ul` of sbip every step."""
+    job = Job(name=name, starting_solution={"pbs": volume_ul},
+              protocol=[WashStep(duration_s=60, mix_speed_rpm=500,
+                                 solution={"sbip": volume_ul})] * steps)
+    return save_job(path, job)
+
+
+def pause_job_file(path, step: int, starting_solution: dict[str, float]):
+    """Save a resume state in the job file as if the job paused at `step`."""
+    with open(path) as job_file:
+        job = Job(**load_yaml(job_file))
+    job.save_resume_state(step, starting_solution=starting_solution)
+    return save_job(path, job)
@@ -3,7 +3,7 @@
 import pytest
 from brainwasher.protocol import Protocol
 from io import StringIO
-from pint import UnitRegistry
+from brainwasher.units import get_unit_registry
 
 csv_str = \
     ('"Mix Speed",Chemicals,Solution,Duration\n'
@@ -12,7 +12,7 @@ csv_str = \
 
 test_csv = StringIO(csv_str)
 protocol = Protocol(test_csv)
-ureg = UnitRegistry()
+ureg = get_unit_registry()
 
 
 def test_chemical_parsing():
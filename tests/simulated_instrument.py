@@ -0,0 +1,31 @@
+"""Simulated instrument shared by the tests."""
+
+from device_spinner.device_spinner import DeviceSpinner
+from device_spinner.config import Config
+from pathlib import Path
+
+
+import brainwasher.devices.instruments.brainwasher
+brainwasher.devices.instruments.brainwasher.SIMULATED = True
+
+
+def get_simulated_brainwasher(fast_forward: bool = False):
+    """Grab simulated instrument config, and use it to instantiate a brainwasher
+    instance.
+
+    :param fast_forward: if True, share a `VirtualClock` across the simulated
+        instrument so that waits complete immediately.
+    """
+    # This is kinda clunky and doesn't support dynamically changing fields or
+    # where or not the high-level brainwaser is considred SIMULATED.
+    pkg_dir = Path(__file__).parent.parent
+    cfg_file = pkg_dir / Path("bin") / Path("sim_instrument_config.yaml")
+    if not cfg_file.exists():
+        raise FileNotFoundError(f"Cannot find {cfg_file.name} from path: "
+                                f"{cfg_file.resolve()}")
+    cfg = Config(cfg_file)
+    device_specs = dict(cfg.cfg)["devices"]
+    if fast_forward:
+        device_specs["clock"]["class"] = "brainwasher.clock.VirtualClock"
+    devices = DeviceSpinner().create_devices_from_specs(device_specs)
+    return devices["brainwasher"]
@@ -0,0 +1,41 @@
+import asyncio
+
+from brainwasher.devices.instruments.async_brainwasher import AsyncBrainWasher
+from simulated_instrument import get_simulated_brainwasher
+from threading import Thread, Event
+
+
+def test_operations_run_in_the_order_awaited():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    async_bw = AsyncBrainWasher(bw)
+
+    async def fill():
+        await asyncio.gather(async_bw.dispense_to_vessel(3000, "thf"),
+                             async_bw.dispense_to_vessel(2000, "deionized_water"))
+        return async_bw.vessel_solution
+
+    assert asyncio.run(fill()) == {"thf": 3000, "deionized_water": 2000}
+    async_bw.close()
+
+
+def test_status_reads_do_not_wait_for_the_flowpath():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    async_bw = AsyncBrainWasher(bw)
+    locked, release = Event(), Event()
+
+    def hold_flowpath():
+        with bw.flowpath_lock:
+            bw._flowpath_depth += 1
+            locked.set()
+            release.wait()
+            bw._flowpath_depth -= 1
+    worker = Thread(target=hold_flowpath, daemon=True)
+    worker.start()
+    locked.wait()
+    status = async_bw.get_status()
+    release.set()
+    worker.join()
+    assert status["busy"]
+    assert status["job_step"] == -1
+    assert not status["job_running"]
+    async_bw.close()
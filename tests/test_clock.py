@@ -0,0 +1,66 @@
+from brainwasher.clock import VirtualClock
+from pathlib import Path
+from simulated_instrument import get_simulated_brainwasher
+from threading import Event, Thread
+from time import perf_counter, sleep
+import shutil
+
+
+def test_virtual_clock_sleep_advances_time():
+    clock = VirtualClock()
+    start_time_s = perf_counter()
+    clock.sleep(3600)
+    assert clock.now() == 3600
+    # An hour of virtual time should take (almost) no real time.
+    assert perf_counter() - start_time_s < 1.0
+
+
+def test_virtual_clock_wait_returns_early_if_event_is_set():
+    clock = VirtualClock()
+    event = Event()
+    assert clock.wait(event, 10) is False
+    assert clock.now() == 10
+    event.set()
+    assert clock.wait(event, 10) is True
+    assert clock.now() == 10
+
+
+def test_virtual_clock_wakes_background_workers():
+    clock = VirtualClock()
+    running = Event()
+    running.set()
+    tick_times = []
+
+    def worker():
+        while running.is_set():
+            tick_times.append(clock.now())
+            clock.sleep(1, background=True)
+
+    worker_thread = Thread(target=worker, daemon=True)
+    worker_thread.start()
+    while not tick_times:  # Wait for the worker to start (in real time).
+        sleep(0.01)
+    sleep(0.1)
+    clock.sleep(0.5)
+    clock.sleep(0.5)
+    clock.sleep(5)
+    running.clear()
+    # Background worker ticked once at start and once after each due deadline.
+    assert tick_times == [0, 1, 6]
+    clock.sleep(1)  # Let the worker exit.
+    worker_thread.join()
+
+
+def test_fast_forward_multi_day_job(tmp_path):
+    """A multi-day job should complete in seconds with a virtual clock."""
+    bw = get_simulated_brainwasher(fast_forward=True)
+    job_src = Path(__file__).parent.parent / Path("bin/jobs/6day_sbip_job.yaml")
+    job_path = tmp_path / job_src.name
+    shutil.copy(job_src, job_path)
+    start_time_s = perf_counter()
+    bw.run(job_path)
+    bw.job_worker.join()
+    assert perf_counter() - start_time_s < 60
+    job = bw._load_job(job_path)
+    assert job.history.events[-1].type == "end"
+    assert bw.clock.now() >= job.get_duration_s()
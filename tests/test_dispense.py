@@ -0,0 +1,62 @@
+from pytest import approx, raises
+from simulated_instrument import get_simulated_brainwasher
+
+
+def count_calls(obj, name: str) -> list:
+    """Wrap the named method to record each call's arguments."""
+    calls = []
+    func = getattr(obj, name)
+
+    def inner(*args, **kwds):
+        calls.append((args, kwds))
+        return func(*args, **kwds)
+    setattr(obj, name, inner)
+    return calls
+
+
+def test_mixed_solution_dispenses_in_one_stroke():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    purges = count_calls(bw, "purge_pump_line")
+    bw.dispense_solution_to_vessel(thf=3000, deionized_water=7000)
+    assert bw.rxn_vessel.solution == {"thf": 3000, "deionized_water": 7000}
+    assert len(purges) == 1
+    assert bw.pump.get_position_ul() == 0
+    assert bw.pump_is_primed_with is None
+
+
+def test_incompatible_solution_dispenses_each_chemical():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    purges = count_calls(bw, "purge_pump_line")
+    # No single waste vessel accepts both.
+    bw.dispense_solution_to_vessel(dcm=3000, deionized_water=5000)
+    assert bw.rxn_vessel.solution == {"dcm": 3000, "deionized_water": 5000}
+    assert len(purges) == 2
+
+
+def test_plan_strokes_splits_evenly():
+    bw = get_simulated_brainwasher()
+    assert bw.plan_strokes({"thf": 8000}, 20000) == [{"thf": 8000}]
+    strokes = bw.plan_strokes({"thf": 30000, "deionized_water": 15000}, 20000)
+    assert strokes == [{"thf": 10000, "deionized_water": 5000}] * 3
+
+
+def test_plan_strokes_only_shrinks_the_first_stroke():
+    bw = get_simulated_brainwasher()
+    strokes = bw.plan_strokes({"thf": 30000}, 20000, first_stroke_capacity_ul=500)
+    assert strokes == [{"thf": 500}, {"thf": 14750}, {"thf": 14750}]
+    # Room for an even split.
+    strokes = bw.plan_strokes({"thf": 30000}, 20000, first_stroke_capacity_ul=15000)
+    assert strokes == [{"thf": 15000}] * 2
+    for capacity_ul in [0, -100]:
+        with raises(ValueError):
+            bw.plan_strokes({"thf": 1000}, 20000, first_stroke_capacity_ul=capacity_ul)
+
+
+def test_large_volume_dispenses_in_multiple_strokes():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    bw.pump.syringe_volume_ul = 4000
+    purges = count_calls(bw, "purge_pump_line")
+    bw.dispense_solution_to_vessel(thf=3000, deionized_water=7000)
+    assert bw.rxn_vessel.solution == approx({"thf": 3000, "deionized_water": 7000})
+    assert len(purges) == 1
+    assert bw.pump.get_position_ul() == 0
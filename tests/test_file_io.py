@@ -0,0 +1,12 @@
+from brainwasher.file_io import atomic_write
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / "state.yaml"
+    atomic_write(path, "old")
+    atomic_write(path, "new")
+    assert path.read_text() == "new"
+    atomic_write(path, b"\x00\x01")
+    assert path.read_bytes() == b"\x00\x01"
+    # No temporary files are left behind.
+    assert list(tmp_path.iterdir()) == [path]
@@ -1,31 +1,6 @@
-from brainwasher.job import Job
+from brainwasher.job import Job, JobIndex
 from brainwasher.job import WashStep
-
-
-def make_dummy_job():
-    """return a simple job"""
-    my_model = Job(name="simple_wash",  # source_protocol=".",
-                   starting_solution={"pbs": 10000},
-                   protocol=[WashStep(mix_speed_rpm=1000, duration_s=1800,
-                                      solution={"thf": 1000, "di_water": 4000}),
-                             WashStep(mix_speed_rpm=1000, duration_s=1800,
-                                      solution={"dcm": 5000})])
-    return my_model
-
-
-def make_long_dummy_job():
-    """return another job with a few extra steps"""
-    my_model = Job(name="power_wash",  # source_protocol=".",
-                   starting_solution={"pbs": 10000},
-                   protocol=[WashStep(mix_speed_rpm=1000, duration_s=1800,
-                                      solution={"thf": 1000, "di_water": 4000}),
-                             WashStep(mix_speed_rpm=1000, duration_s=1800,
-                                      solution={"dcm": 5000}),
-                             WashStep(mix_speed_rpm=1000, duration_s=1800,
-                                      solution={"dcm": 8000}),
-                             WashStep(mix_speed_rpm=1000, duration_s=1800,
-                                      solution={"thf": 9000, "di_water": 1000})])
-    return my_model
+from job_factories import make_dummy_job, make_long_dummy_job
 
 
 def test_get_job_duration():
@@ -60,4 +35,30 @@ def test_stock_chemical_volumes():
     # Should not include starting solution.
     assert job.stock_chemical_volumes_ul == {"thf": 1000, "di_water": 4000, "dcm": 5000}
     job2 = make_long_dummy_job()
-    assert job2.stock_chemical_volumes_ul == {"thf": 10000, "di_water": 5000, "dcm": 13000}
\ No newline at end of file
+    assert job2.stock_chemical_volumes_ul == {"thf": 10000, "di_water": 5000, "dcm": 13000}
+
+
+def test_index_remaining_from_step():
+    job = make_long_dummy_job()
+    assert job.index.get_remaining_duration_s(2) == 3600
+    assert job.index.get_progress(1) == 0.25
+    assert job.index.get_remaining_volume_ul("dcm", 2) == 8000
+    assert job.index.get_remaining_volumes_ul(3) == {"thf": 9000, "di_water": 1000}
+    assert job.index.get_remaining_waste_ul(1) == {frozenset({"dcm"}): 13000,
+                                                   frozenset({"thf", "di_water"}): 10000}
+
+
+def test_index_tracks_step_edits():
+    job = make_long_dummy_job()
+    job.set_step(1, WashStep(duration_s=60, solution={"pbs": 2000}))
+    job.insert_step(-1, WashStep(duration_s=60, solution={"dcm": 1000}))
+    job.remove_step(0)
+    rebuilt = JobIndex(job.protocol)
+    for step in range(len(job.protocol) + 1):
+        assert job.index.get_remaining_duration_s(step) == rebuilt.get_remaining_duration_s(step)
+        assert job.index.get_remaining_volumes_ul(step) == rebuilt.get_remaining_volumes_ul(step)
+    assert job.stock_chemical_volumes_ul == {"pbs": 2000, "dcm": 9000,
+                                             "thf": 9000, "di_water": 1000}
+    # Replacing the protocol rebuilds the index.
+    job.protocol = job.protocol[2:]
+    assert job.get_duration_s() == 1860
@@ -0,0 +1,64 @@
+import pytest
+import yaml
+
+from brainwasher.job_journal import JobJournal
+from job_factories import make_dummy_job, save_job, write_job
+from pathlib import Path
+from simulated_instrument import get_simulated_brainwasher
+
+
+def test_journal_is_compacted_when_the_job_finishes(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    job_path = write_job(tmp_path / "job.yaml", "job")
+    bw.run(job_path)
+    bw.job_worker.join()
+    assert not JobJournal.get_path(job_path).exists()
+    with open(job_path) as job_file:
+        job_dict = yaml.safe_load(job_file)
+    assert "resume_state" not in job_dict
+    assert [e["type"] for e in job_dict["history"]["events"]] == ["start", "end"]
+
+
+def test_journal_replays_progress_after_a_crash(tmp_path):
+    job = make_dummy_job()
+    job_path = save_job(tmp_path / "job.yaml", job)
+    journal = JobJournal(job_path, job)
+    job.record_start()
+    journal.checkpoint(job)
+    job.save_resume_state(1, {"dcm": 5000}, duration_s=600)
+    journal.checkpoint(job)
+    journal.close()
+    # Power loss partway through writing the next record.
+    with open(journal.path, "a") as journal_file:
+        journal_file.write('{"events": [')
+    bw = get_simulated_brainwasher(fast_forward=True)
+    recovered = bw._load_job(job_path)
+    assert [e.type for e in recovered.history.events] == ["start"]
+    assert recovered.resume_state.step == 1
+    assert recovered.resume_state.overrides == {"duration_s": 600}
+
+
+def test_journal_is_not_replayed_after_compaction(tmp_path, monkeypatch):
+    job = make_dummy_job()
+    job_path = save_job(tmp_path / "job.yaml", job)
+    journal = JobJournal(job_path, job)
+    job.record_start()
+    journal.checkpoint(job)
+    job.save_resume_state(2, {"dcm": 5000})
+    journal.checkpoint(job)
+    job.clear_resume_state()
+    job.record_finish()
+
+    def power_loss(path, missing_ok=False):
+        raise RuntimeError("Power lost.")
+    # Power loss after the job file is replaced but before the journal is
+    # deleted.
+    monkeypatch.setattr(Path, "unlink", power_loss)
+    with pytest.raises(RuntimeError):
+        journal.compact(job)
+    monkeypatch.undo()
+    assert journal.path.exists()
+    bw = get_simulated_brainwasher(fast_forward=True)
+    recovered = bw._load_job(job_path)
+    assert [e.type for e in recovered.history.events] == ["start", "end"]
+    assert recovered.resume_state is None
@@ -0,0 +1,45 @@
+from brainwasher.job_loader import JobLoader
+from job_factories import make_dummy_job, make_long_dummy_job, save_job
+from unittest.mock import patch
+
+
+def test_cached_jobs_skip_parsing_and_validation(tmp_path):
+    job_path = save_job(tmp_path / "job.yaml", make_dummy_job())
+    loader = JobLoader(cache_dir=tmp_path / "cache")
+    first = loader.load(job_path)
+    # A fresh loader (i.e: after a restart) uses the on-disk cache.
+    with patch("brainwasher.job_loader.load_yaml") as load_yaml:
+        second = JobLoader(cache_dir=tmp_path / "cache").load(job_path)
+        load_yaml.assert_not_called()
+    assert second == first
+    assert second is not first
+    second.record_start()
+    assert not loader.load(job_path).history.events
+
+
+def test_changed_jobs_are_reloaded(tmp_path):
+    job_path = save_job(tmp_path / "job.yaml", make_dummy_job())
+    loader = JobLoader(cache_dir=tmp_path / "cache")
+    assert loader.load(job_path).name == "simple_wash"
+    save_job(job_path, make_long_dummy_job())
+    assert loader.load(job_path).name == "power_wash"
+
+
+def test_only_the_latest_version_of_each_job_is_cached(tmp_path):
+    cache_dir = tmp_path / "cache"
+    loader = JobLoader(cache_dir=cache_dir, max_cached_jobs=1)
+    job_path = save_job(tmp_path / "job.yaml", make_dummy_job())
+    loader.load(job_path)
+    job = make_dummy_job()
+    job.record_start()  # i.e: the job file is rewritten on pause.
+    save_job(job_path, job)
+    loader.load(job_path)
+    assert len(list(cache_dir.iterdir())) == 1
+    other_path = save_job(tmp_path / "other.yaml", make_long_dummy_job())
+    loader.load(other_path)
+    assert len(list(cache_dir.iterdir())) == 2
+    # Only the most recently loaded job file is kept in memory.
+    assert list(loader._cache) == [other_path.resolve()]
+    with patch("brainwasher.job_loader.load_yaml") as load_yaml:
+        assert loader.load(job_path).history.events
+        load_yaml.assert_not_called()
@@ -0,0 +1,81 @@
+import pytest
+
+from brainwasher.job_queue import JobQueue
+from job_factories import pause_job_file, write_job
+from simulated_instrument import get_simulated_brainwasher
+from time import monotonic, sleep
+
+
+def test_jobs_are_ordered_by_priority_and_persisted(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    queue = JobQueue(bw, tmp_path / "queue.yaml")
+    queue.add(write_job(tmp_path / "a.yaml", "a"))
+    queue.add(write_job(tmp_path / "b.yaml", "b"), priority=1)
+    queue.add(write_job(tmp_path / "c.yaml", "c"))
+    order = [j.path.name for j in queue.jobs]
+    assert order == ["b.yaml", "a.yaml", "c.yaml"]
+    reloaded = JobQueue(bw, tmp_path / "queue.yaml")
+    assert [j.path.name for j in reloaded.jobs] == order
+
+
+def test_queue_waste_capacity_is_checked_as_a_whole(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    queue = JobQueue(bw, tmp_path / "queue.yaml")
+    # Each job fits in the 250mL sbip-compatible waste vessel on its own.
+    for name in ["a", "b"]:
+        queue.add(write_job(tmp_path / f"{name}.yaml", name, 10000, 12))
+    with pytest.raises(ValueError):
+        queue.add(write_job(tmp_path / "c.yaml", "c", 10000, 12))
+    assert len(queue.jobs) == 2
+
+
+def test_paused_jobs_only_count_remaining_steps(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    queue = JobQueue(bw, tmp_path / "queue.yaml")
+    # The whole job would overflow the 250mL sbip-compatible waste vessel.
+    job_path = write_job(tmp_path / "a.yaml", "a", 10000, 30)
+    pause_job_file(job_path, 25, starting_solution={"sbip": 10000})
+    queue.add(job_path)
+    queue.validate_queue()
+    # Step numbers in errors are those of the whole job.
+    bw.waste_vessels[0].add_solution(sbip=230000)
+    with pytest.raises(ValueError) as error:
+        queue.validate_queue()
+    assert "at step 27" in str(error.value.__cause__)
+
+
+def test_next_job_starts_when_the_previous_finishes(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    queue = JobQueue(bw, tmp_path / "queue.yaml")
+    queue.add(write_job(tmp_path / "a.yaml", "a"))
+    queue.add(write_job(tmp_path / "b.yaml", "b"))
+    started = []
+    run = bw.run
+    bw.run = lambda job_path: (started.append(job_path.name), run(job_path))
+    queue.start()
+    deadline_s = monotonic() + 60
+    while queue.jobs and monotonic() < deadline_s:
+        sleep(0.01)
+    assert not queue.jobs
+    queue.stop()
+    queue.dispatcher.join(timeout=10)
+    assert not queue.dispatcher.is_alive()
+    assert started == ["a.yaml", "b.yaml"]
+    # b only runs if the vessel was refilled with its starting solution.
+    assert bw.rxn_vessel.solution == {"sbip": 5000}
+
+
+def test_queue_counts_refills_between_jobs(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    # Enough pbs to refill the vessel for one job but not two.
+    bw.refill_reservoir("pbs", 6000)
+    queue = JobQueue(bw, tmp_path / "queue.yaml")
+    queue.add(write_job(tmp_path / "a.yaml", "a"))
+    # Jobs end full of sbip, so b and c start with a pbs refill.
+    queue.add(write_job(tmp_path / "b.yaml", "b"))
+    with pytest.raises(ValueError):
+        queue.add(write_job(tmp_path / "c.yaml", "c"))
+    queue = JobQueue(bw, tmp_path / "no_refill_queue.yaml",
+                     refill_between_jobs=False)
+    for name in ["a", "b", "c"]:
+        queue.add(tmp_path / f"{name}.yaml")
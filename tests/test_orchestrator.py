@@ -0,0 +1,78 @@
+from brainwasher.devices.instruments.orchestrator import BrainWasherOrchestrator
+from simulated_instrument import get_simulated_brainwasher
+
+
+def test_instruments_group_by_shared_hardware():
+    a, b, c = [get_simulated_brainwasher() for _ in range(3)]
+    b.selector = a.selector
+    orchestrator = BrainWasherOrchestrator({"a": a, "b": b, "c": c})
+    assert sorted(map(sorted, orchestrator.hardware_groups)) == [["a", "b"], ["c"]]
+    assert orchestrator.schedulers["a"] is orchestrator.schedulers["b"]
+    assert a.shared_hardware_lock.scheduler is b.shared_hardware_lock.scheduler
+    assert "c" not in orchestrator.schedulers
+
+
+def make_shared_selector_pair():
+    a, b = get_simulated_brainwasher(fast_forward=True), \
+        get_simulated_brainwasher(fast_forward=True)
+    b.clock = a.clock
+    b.selector = a.selector
+    orchestrator = BrainWasherOrchestrator({"a": a, "b": b})
+    return a, b, orchestrator.schedulers["a"]
+
+
+def test_shared_hardware_is_lent_while_mixing():
+    a, b, _ = make_shared_selector_pair()
+    lent = []
+
+    def wait_for_wash_step(*args):
+        # b can change the flowpath while a is only idling.
+        b.deenergize_all_valves()
+        lent.append(a.flowpath_static_until_s)
+        return True
+    a._wait_for_wash_step = wait_for_wash_step
+    a.run_wash_step(duration_s=2, start_empty=False)
+    assert lent == [a.clock.now() + 2]
+
+
+def test_shared_hardware_is_only_lent_for_operations_that_fit():
+    a, b, scheduler = make_shared_selector_pair()
+    admitted = []
+
+    def wait_for_wash_step(*args):
+        scheduler.hold_estimates_s["b"] = 1
+        admitted.append(scheduler.admits("b"))
+        scheduler.hold_estimates_s["b"] = 3  # Would overrun a's mixing.
+        admitted.append(scheduler.admits("b"))
+        return True
+    a._wait_for_wash_step = wait_for_wash_step
+    a.run_wash_step(duration_s=2, start_empty=False)
+    assert admitted == [True, False]
+    # a is done mixing.
+    assert scheduler.admits("b")
+
+
+def test_instruments_sharing_a_pump_share_priming_state():
+    a, b = get_simulated_brainwasher(fast_forward=True), \
+        get_simulated_brainwasher(fast_forward=True)
+    b.clock = a.clock
+    b.selector, b.pump = a.selector, a.pump
+    b.selector_lds_map, b.pump_prime_lds = a.selector_lds_map, a.pump_prime_lds
+    BrainWasherOrchestrator({"a": a, "b": b})
+    assert a.prime_state is b.prime_state
+    primed = []
+    for instrument in [a, b]:
+        def prime_reservoir_line(chemical, prime=instrument.prime_reservoir_line):
+            primed.append(chemical)
+            prime(chemical)
+        instrument.prime_reservoir_line = prime_reservoir_line
+    # Alternate chemicals between instruments on the shared pump.
+    for instrument, chemical in [(a, "thf"), (b, "sbip"), (a, "sbip"), (b, "thf")]:
+        instrument.dispense_to_vessel(1000, chemical)
+        assert instrument.pump_is_primed_with is None
+        instrument.drain_vessel()
+    # Each reservoir line is only primed once, by whichever instrument
+    # used it first.
+    assert primed == ["thf", "sbip"]
+    b.unprime_reservoir_line("thf")
+    assert "thf" not in a.prime_volumes_ul
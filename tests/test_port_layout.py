@@ -0,0 +1,26 @@
+from brainwasher.port_layout import get_positions_rotated, optimize_port_layout
+from collections import Counter
+
+
+def test_positions_rotated_takes_shorter_arc():
+    port_map = {"ambient": 1, "outlet": 2, "thf": 10}
+    transitions = Counter({(("ambient", True), ("outlet", True)): 2,
+                           (("outlet", True), ("thf", True)): 1,
+                           (("thf", True), ("thf", False)): 1})
+    # 1 -> 3 twice, 3 -> 19 counterclockwise, 19 -> 20.
+    assert get_positions_rotated(transitions, port_map, port_count=10) == 9
+
+
+def test_optimizer_places_busy_ports_next_to_each_other():
+    port_map = {"ambient": 1, "outlet": 6, "thf": 3}
+    moves = [("thf", True), ("outlet", True), ("ambient", True),
+             ("outlet", True)] * 10
+    proposal = optimize_port_layout(moves, port_map, port_count=10,
+                                    position_time_s=0.1)
+    assert proposal.move_count == len(moves) - 1
+    # Every move is now to an adjacent port.
+    assert proposal.proposed_positions_rotated == 2 * proposal.move_count
+    assert proposal.positions_rotated > proposal.proposed_positions_rotated
+    assert proposal.time_saved_s > 0
+    assert sorted(proposal.proposed_port_map.values()) == \
+        sorted(set(proposal.proposed_port_map.values()))
@@ -0,0 +1,45 @@
+from simulated_instrument import get_simulated_brainwasher
+
+
+def test_pressure_sampling_speeds_up_during_flowpath_operations():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    assert bw.pressure_sample_period_s == bw.SLOW_PRESSURE_SAMPLE_PERIOD_S
+    periods = []
+    get_position_ul = bw.pump.get_position_ul
+
+    def record_period():
+        periods.append(bw.pressure_sample_period_s)
+        return get_position_ul()
+    bw.pump.get_position_ul = record_period
+    bw.dispense_to_vessel(1000, "thf")
+    assert set(periods) == {bw.FAST_PRESSURE_SAMPLE_PERIOD_S}
+    assert bw.pressure_sample_period_s == bw.SLOW_PRESSURE_SAMPLE_PERIOD_S
+
+
+def test_pressure_sampling_slows_down_while_mixing():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    periods = []
+    start_mixing = bw.mixer.start_mixing
+
+    def record_period():
+        periods.append(bw.pressure_sample_period_s)
+        return start_mixing()
+    bw.mixer.start_mixing = record_period
+    bw.run_wash_step(duration_s=60, mix_speed_rpm=500,
+                     intermittent_mixing_on_time_s=10,
+                     intermittent_mixing_off_time_s=10, start_empty=False)
+    # The first start is before the wait; later (intermittent) starts are within it.
+    assert periods[0] == bw.FAST_PRESSURE_SAMPLE_PERIOD_S
+    assert set(periods[1:]) == {bw.SLOW_PRESSURE_SAMPLE_PERIOD_S}
+    # Pressure samples are still taken as a heartbeat.
+    assert len(bw.pressure_samples)
+
+
+def test_pressure_history_covers_the_longest_window_at_the_fast_rate(caplog):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    assert ((bw.pressure_samples.capacity - 1) * bw.FAST_PRESSURE_SAMPLE_PERIOD_S
+            >= bw.PRESSURE_HISTORY_S >= bw.PRESSURE_POCKET_TIMEOUT_S)
+    bw.get_pressure_slope_psig_per_s(bw.PRESSURE_HISTORY_S)
+    assert "pressure samples" not in caplog.text
+    bw.get_pressure_slope_psig_per_s(bw.PRESSURE_HISTORY_S + 1)
+    assert "pressure samples" in caplog.text
@@ -0,0 +1,59 @@
+import pytest
+
+from brainwasher.job_loader import JobLoader
+from brainwasher.protocol import Protocol
+from io import StringIO
+from simulated_instrument import get_simulated_brainwasher
+
+csv_str = \
+    ('"Mix Speed",Chemicals,Solution,Duration\n'
+     '100%,"THF, DCM","30% THF, 70% DCM", 1hr\n'
+     '50,"SBiP","2.5mL SBiP", 2.5hr\n'
+     '100%,"THF, DCM","30% THF, 70% DCM", 90min')
+
+
+def test_protocol_compiles_to_job():
+    job = Protocol(StringIO(csv_str)).to_job("gradient", max_volume_ul=10000,
+                                             max_mix_speed_rpm=1200)
+    assert [step.solution for step in job.protocol] == \
+        [{"THF": 3000, "DCM": 7000}, {"SBiP": 2500}, {"THF": 3000, "DCM": 7000}]
+    assert [step.duration_s for step in job.protocol] == [3600, 9000, 5400]
+    assert [step.mix_speed_rpm for step in job.protocol] == [1200, 600, 1200]
+
+
+@pytest.mark.parametrize("row", ['100%,"THF","30% DCM", 1hr',
+                                 '100%,"THF","30 THF", 1hr',
+                                 'fast,"THF","30% THF", 1hr',
+                                 '100%,"THF","30% THF", 1'])
+def test_invalid_rows_are_reported(row):
+    protocol = Protocol(StringIO(csv_str + "\n" + row))
+    with pytest.raises(ValueError, match="Step 3"):
+        protocol.to_job("bad", max_volume_ul=10000, max_mix_speed_rpm=1200)
+
+
+def test_validate_reports_every_invalid_step():
+    protocol = Protocol(StringIO(csv_str + "\n"
+                                 + '100%,"THF","30 THF", 1\n'
+                                 + '100%,"THF, DCM","30% THF, 70% DCM", 1hr\n'
+                                 + 'fast,"THF","30% THF", 1hr'))
+    assert list(protocol.get_errors(max_volume_ul=10000)) == [3, 5]
+    assert len(protocol.get_errors(max_volume_ul=10000)[3]) == 2
+
+
+def test_chemical_names_must_match_exactly():
+    protocol = Protocol(StringIO('"Mix Speed",Chemicals,Solution,Duration\n'
+                                 '100%,"THF, 2-THF","20% 2-THF, 80% THF", 1hr'))
+    assert protocol.get_solution(0, max_volume_ul=10000) == {"2-THF": 2000,
+                                                            "THF": 8000}
+
+
+def test_create_job_from_csv(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    protocol_path = tmp_path / "protocol.csv"
+    protocol_path.write_text('"Mix Speed",Chemicals,Solution,Duration\n'
+                             '100%,"thf, deionized_water","30% thf, 70% deionized_water", 1hr\n')
+    bw.create_job(tmp_path / "job.yaml", source=protocol_path)
+    job = JobLoader().load(tmp_path / "job.yaml")
+    assert job.name == "job"
+    assert job.source_protocol.path == protocol_path.resolve()
+    bw.validate_job_against_instrument(job)
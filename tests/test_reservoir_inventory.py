@@ -0,0 +1,66 @@
+import pytest
+
+from brainwasher.job_queue import JobQueue
+from brainwasher.reservoir_inventory import ReservoirInventory
+from job_factories import make_job, pause_job_file, write_job
+from simulated_instrument import get_simulated_brainwasher
+
+
+def test_forecast_includes_priming():
+    inventory = ReservoirInventory()
+    inventory.refill("thf", 21000)
+    job = make_job({"pbs": 1000}, *[{"thf": 10000}] * 3)
+    assert inventory.forecast(job).shortfall_steps == {"thf": 3}
+    inventory.prime_reservoir_line("thf", 2000)  # Reservoir line volume.
+    inventory.prime_pump_line("thf", 500)
+    # The line is unprimed again before the job.
+    inventory.unprime_reservoir_line("thf", 2000)
+    assert inventory.get_volume_ul("thf") == 20500
+    forecast = inventory.forecast(job)
+    assert forecast.shortfall_steps == {"thf": 2}
+    assert forecast.volumes_ul == {"thf": 20500 - 2000 - 3 * 10500}
+    # Untracked reservoirs are never short.
+    assert "pbs" not in forecast.volumes_ul
+    assert inventory.forecast(job, primed_chemicals={"thf"},
+                              start_step=3).shortfall_steps == {}
+
+
+def test_levels_track_the_instrument_and_persist(tmp_path):
+    inventory_path = tmp_path / "reservoir_levels.yaml"
+    bw = get_simulated_brainwasher(fast_forward=True)
+    bw.reservoir_inventory = ReservoirInventory(inventory_path)
+    bw.refill_reservoir("sbip", 100000)
+    bw.dispense_to_vessel(5000, "sbip")
+    bw.drain_vessel()
+    # Dispensed volume plus the liquid drawn to prime both lines.
+    state = bw.reservoir_inventory.state
+    drawn_ul = (5000 - 10 + state.reservoir_line_volumes_ul["sbip"]
+                + state.pump_line_volumes_ul["sbip"])
+    assert bw.reservoir_inventory.get_volume_ul("sbip") == \
+        pytest.approx(100000 - drawn_ul)
+    reloaded = ReservoirInventory(inventory_path)
+    assert reloaded.state == state
+
+
+def test_preflight_reports_the_step_a_reservoir_runs_dry(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    bw.refill_reservoir("sbip", 45000)
+    with pytest.raises(ValueError, match="sbip at step 9"):
+        bw.run(write_job(tmp_path / "a.yaml", "a", volume_ul=5000, steps=10))
+    queue = JobQueue(bw, tmp_path / "queue.yaml")
+    queue.add(write_job(tmp_path / "b.yaml", "b", volume_ul=5000, steps=5))
+    # Only the remaining levels after the first job count.
+    with pytest.raises(ValueError):
+        queue.add(write_job(tmp_path / "c.yaml", "c", volume_ul=5000, steps=5))
+    assert len(queue.jobs) == 1
+
+
+def test_resumed_jobs_only_count_remaining_steps(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    job_path = write_job(tmp_path / "a.yaml", "a", volume_ul=5000, steps=10)
+    pause_job_file(job_path, 8, starting_solution={"sbip": 5000})
+    # Enough for the last two steps only.
+    bw.refill_reservoir("sbip", 10000)
+    bw.run(job_path)
+    bw.job_worker.join()
+    assert bw._load_job(job_path).history.events[-1].type == "end"
@@ -0,0 +1,59 @@
+from brainwasher.ring_buffer import TimestampedRingBuffer
+from pytest import approx
+from threading import Thread
+
+import math
+
+
+def test_window_statistics():
+    buffer = TimestampedRingBuffer(capacity=100)
+    assert buffer.latest() is None
+    assert math.isnan(buffer.mean(1))
+    for i in range(50):
+        buffer.append(i * 0.1, 2 * i * 0.1 + 1)  # 2 psig/s ramp.
+    assert buffer.latest() == approx((4.9, 10.8))
+    times_s, values = buffer.window(1.0)
+    assert len(times_s) == 11  # Inclusive of the start of the window.
+    assert buffer.mean(1.0) == approx(9.8)
+    assert buffer.slope(1.0) == approx(2.0)
+    assert buffer.variance(0) == 0
+    assert buffer.slope(0) == 0
+
+
+def test_window_is_limited_to_capacity():
+    buffer = TimestampedRingBuffer(capacity=10)
+    for i in range(25):
+        buffer.append(i, i)
+    assert len(buffer) == 10
+    times_s, values = buffer.window(100)
+    # The oldest slot is the next one written, so it is left out.
+    assert list(values) == list(range(16, 25))
+
+
+def test_window_skips_the_slot_being_written():
+    buffer = TimestampedRingBuffer(capacity=4)
+    for i in range(4):
+        buffer.append(i, i)
+    # Stage a half-finished append: slot 0 is written but not published.
+    buffer._times_s[0] = 4
+    buffer._values[0] = 4
+    times_s, values = buffer.window(100)
+    assert list(times_s) == [1, 2, 3]
+    assert list(values) == [1, 2, 3]
+
+
+def test_concurrent_reads_never_see_overwritten_samples():
+    buffer = TimestampedRingBuffer(capacity=64)
+    sample_count = 20000
+
+    def write():
+        for i in range(sample_count):
+            buffer.append(i, i)
+    writer = Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        times_s, values = buffer.window(1000)
+        # Samples are a contiguous, in-order run of what was written.
+        assert list(times_s) == list(values)
+        assert all(b - a == 1 for a, b in zip(values, values[1:]))
+    writer.join()
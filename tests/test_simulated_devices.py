@@ -0,0 +1,133 @@
+from brainwasher.clock import VirtualClock
+from brainwasher.devices.simulated_devices.fluid_model import SimFluidModel
+from brainwasher.devices.simulated_devices.liquid_presence_detection import SimBubbleDetectionSensor
+from brainwasher.devices.simulated_devices.selector import SimCloseableSelector
+from brainwasher.devices.simulated_devices.syringe_pump import SimSyringePump
+from brainwasher.devices.simulated_devices.valve import SimNCValve, SimValveBank
+from pytest import approx
+
+
+def make_flowpath(clock: VirtualClock):
+    """Return a simulated selector, fluid model, and pump sharing a clock."""
+    selector = SimCloseableSelector(port_count=10,
+                                    port_map={"ambient": 1, "outlet": 2, "thf": 6},
+                                    position_time_s=0.1, command_latency_s=0,
+                                    clock=clock)
+    fluid_model = SimFluidModel(selector, reservoir_line_volume_ul=2000,
+                                pump_line_volume_ul=500)
+    pump = SimSyringePump(syringe_volume_ul=20000, full_stroke_time_s=5.0,
+                          command_latency_s=0, fluid_model=fluid_model,
+                          clock=clock)
+    return selector, fluid_model, pump
+
+
+def test_pump_move_time_scales_with_speed():
+    clock = VirtualClock()
+    _, _, pump = make_flowpath(clock)
+    pump.set_speed_percent(50)
+    pump.move_absolute_in_percent(100)
+    assert clock.now() == approx(10.0)
+    # Non-blocking moves stay busy until the plunger arrives.
+    pump.move_absolute_in_percent(50, wait=False)
+    assert pump.is_busy()
+    clock.sleep(2.5)
+    assert pump.get_position_ul() == approx(15000)
+    clock.sleep(2.5)
+    assert not pump.is_busy()
+    assert pump.get_position_ul() == approx(10000)
+
+
+def test_selector_rotation_time():
+    clock = VirtualClock()
+    selector, _, _ = make_flowpath(clock)
+    selector.move_to_port("thf")  # Position 1 -> 11, clockwise.
+    assert clock.now() == approx(1.0)
+    selector.move_counterclockwise_to_port("ambient")  # 11 -> 1.
+    assert clock.now() == approx(2.0)
+
+
+def test_selector_takes_shorter_arc_and_skips_noop_moves():
+    clock = VirtualClock()
+    selector, _, _ = make_flowpath(clock)
+    selector.move_to_port("outlet")  # Position 1 -> 3, clockwise.
+    assert clock.now() == approx(0.2)
+    selector.move_to_port("ambient")  # 3 -> 1, counterclockwise.
+    assert clock.now() == approx(0.4)
+    selector.close()  # 1 -> 2.
+    selector.close()
+    selector.open()  # 2 -> 1.
+    selector.move_to_port("ambient")
+    assert clock.now() == approx(0.6)
+    assert selector.move_count == 4
+    assert selector.skipped_move_count == 2
+
+
+def test_forced_selector_moves_reread_the_current_port():
+    clock = VirtualClock()
+    selector, _, _ = make_flowpath(clock)
+    selector.hw_position = 5  # Turned by hand to port 3 (open).
+    selector.close(force=True)  # 5 -> 6, not 1 -> 2.
+    assert selector.hw_position == 6
+    assert selector.current_port.port == 3
+    selector.hw_position = 3  # Turned by hand to "outlet" (open).
+    selector.refresh_position()
+    assert selector.current_port.port == "outlet"
+    selector.hw_position = 11  # Turned by hand to "thf" (open).
+    selector.move_to_port("thf", force=True)
+    assert selector.skipped_move_count == 1
+    assert selector.current_port.open
+
+
+def test_bubble_sensors_trip_at_line_volumes():
+    clock = VirtualClock()
+    selector, fluid_model, pump = make_flowpath(clock)
+    reservoir_sensor = SimBubbleDetectionSensor(fluid_model, port="thf")
+    pump_line_sensor = SimBubbleDetectionSensor(fluid_model)
+    selector.move_to_port("thf")
+    pump.withdraw(1999)
+    assert reservoir_sensor.untripped()
+    pump.withdraw(2)
+    assert reservoir_sensor.tripped()
+    assert pump_line_sensor.untripped()
+    # Liquid reaches the pump after traversing the pump line.
+    pump.withdraw(500)
+    assert pump_line_sensor.tripped()
+    # Gas drawn behind the liquid pushes it into the syringe.
+    selector.move_to_port("ambient")
+    pump.withdraw(500)
+    assert pump_line_sensor.untripped()
+
+
+def test_valve_bank_switches_valves_in_one_write():
+    clock = VirtualClock()
+    valves = [SimNCValve(actuation_time_s=0.02, clock=clock) for _ in range(3)]
+    bank = SimValveBank(valves, actuation_time_s=0.02, clock=clock)
+    bank.set_states({valves[0]: True, valves[1]: True})
+    assert [v.energized for v in valves] == [True, True, None]
+    bank.energize_only(valves[2])
+    assert [v.energized for v in valves] == [False, False, True]
+    assert bank.write_count == 2
+    assert clock.now() == approx(0.04)
+    # Valve counters match those of switching each valve on its own.
+    assert [v.write_count for v in valves] == [2, 2, 1]
+    # Valves already in the requested state are skipped unless forced.
+    bank.energize_only(valves[2])
+    assert bank.write_count == 2
+    assert [v.skipped_write_count for v in valves] == [1, 1, 1]
+    bank.energize_only(valves[2], force=True)
+    assert bank.write_count == 3
+    assert [v.write_count for v in valves] == [3, 3, 2]
+
+
+def test_valve_skips_redundant_commands():
+    clock = VirtualClock()
+    valve = SimNCValve(actuation_time_s=0.02, clock=clock)
+    valve.energize()
+    valve.energize()
+    valve.open()
+    assert valve.write_count == 1
+    assert valve.skipped_write_count == 2
+    valve.energize(force=True)
+    valve.deenergize()
+    assert valve.write_count == 3
+    assert clock.now() == approx(0.06)
@@ -0,0 +1,50 @@
+import json
+import numpy as np
+
+from brainwasher.telemetry import PressureTelemetryRecorder, read_pressure_telemetry
+from time import time
+
+
+def test_recorder_rotates_and_bounds_files(tmp_path):
+    recorder = PressureTelemetryRecorder(tmp_path, file_capacity=10,
+                                         max_files=3)
+    for i in range(45):
+        recorder.record(time_s=i, pressure_psig=i / 10, step=i // 20)
+    recorder.close()
+    assert len(PressureTelemetryRecorder.get_files(tmp_path)) == 3
+    records = read_pressure_telemetry(tmp_path)
+    # Only the 3 most recent files (the last partially filled) remain.
+    assert list(records["time_s"]) == list(range(20, 45))
+
+
+def test_read_by_step_and_time(tmp_path):
+    recorder = PressureTelemetryRecorder(tmp_path, file_capacity=8)
+    for i in range(30):
+        recorder.record(time_s=i, pressure_psig=1.5, step=i // 10)
+    recorder.flush()
+    assert list(read_pressure_telemetry(tmp_path, step=1)["time_s"]) == \
+        list(range(10, 20))
+    records = read_pressure_telemetry(tmp_path, step=2, end_time_s=24)
+    assert list(records["time_s"]) == list(range(20, 25))
+    # A new recorder continues after the existing files.
+    PressureTelemetryRecorder(tmp_path, file_capacity=8).record(30, 1.5)
+    assert len(read_pressure_telemetry(tmp_path)) == 31
+
+
+def test_files_are_indexed_by_step_and_wall_clock_time(tmp_path):
+    recorder = PressureTelemetryRecorder(tmp_path, file_capacity=8)
+    for i in range(20):
+        recorder.record(time_s=i, pressure_psig=1.5, step=i // 5)
+    recorder.flush()
+    index_path = PressureTelemetryRecorder.get_index_path(
+        PressureTelemetryRecorder.get_files(tmp_path)[1])
+    with open(index_path) as index_file:
+        index = json.load(index_file)
+    assert index["step_runs"] == [[1, 0, 2], [2, 2, 7], [3, 7, 8]]
+    # The file's first sample (at 8s on the instrument clock) was just taken.
+    assert abs(index["wall_clock_offset_s"] + 8 - time()) < 5
+    records = read_pressure_telemetry(tmp_path, step=2, wall_clock=True)
+    assert np.allclose(records["time_s"] - np.arange(10, 15),
+                       index["wall_clock_offset_s"])
+    records = read_pressure_telemetry(tmp_path, start_time_s=7, end_time_s=9)
+    assert list(records["time_s"]) == [7, 8, 9]
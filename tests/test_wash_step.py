@@ -0,0 +1,66 @@
+from simulated_instrument import get_simulated_brainwasher
+from threading import Event, Thread
+from pytest import approx
+
+
+def record_mixer_transitions(bw) -> list:
+    """Record (time, mixing) for every mixer start and stop."""
+    transitions = []
+    start_mixing, stop_mixing = bw.mixer.start_mixing, bw.mixer.stop_mixing
+
+    def start():
+        transitions.append((bw.clock.now(), True))
+        start_mixing()
+
+    def stop():
+        transitions.append((bw.clock.now(), False))
+        stop_mixing()
+    bw.mixer.start_mixing, bw.mixer.stop_mixing = start, stop
+    return transitions
+
+
+def test_intermittent_mixing_schedule_is_drift_free():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    transitions = record_mixer_transitions(bw)
+    start_time_s = bw.clock.now()
+    bw.run_wash_step(duration_s=100, mix_speed_rpm=500,
+                     intermittent_mixing_on_time_s=10,
+                     intermittent_mixing_off_time_s=15, start_empty=False)
+    times_s = [t - start_time_s for t, _ in transitions]
+    assert times_s == approx([0, 10, 25, 35, 50, 60, 75, 85])
+    assert [mixing for _, mixing in transitions] == [True, False] * 4
+    # The step ends on time even though it ends mid-cycle.
+    assert bw.clock.now() - start_time_s == approx(100)
+
+
+def test_intermittent_mixing_ends_with_the_step():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    transitions = record_mixer_transitions(bw)
+    start_time_s = bw.clock.now()
+    bw.run_wash_step(duration_s=30, mix_speed_rpm=500,
+                     intermittent_mixing_on_time_s=20,
+                     intermittent_mixing_off_time_s=20, start_empty=False)
+    assert [(t - start_time_s, m) for t, m in transitions] == \
+        approx([(0, True), (20, False)])
+    assert bw.clock.now() - start_time_s == approx(30)
+
+
+def test_pause_interrupts_intermittent_mixing():
+    bw = get_simulated_brainwasher()
+    transitions = record_mixer_transitions(bw)
+    mixing = Event()
+    start_mixing = bw.mixer.start_mixing
+    bw.mixer.start_mixing = lambda: (start_mixing(), mixing.set())
+    # Pretend a job is running so that the pause request is honored.
+    bw.job_worker = Thread(target=bw.run_wash_step,
+                           kwargs=dict(duration_s=3600, mix_speed_rpm=500,
+                                       intermittent_mixing_on_time_s=600,
+                                       intermittent_mixing_off_time_s=600,
+                                       start_empty=False))
+    bw.job_worker.start()
+    assert mixing.wait(timeout=5)
+    bw.pause()
+    bw.job_worker.join(timeout=5)
+    assert not bw.job_worker.is_alive()
+    assert transitions[-1][1] is False  # Mixer stopped.
+    assert bw.resume_state_overrides["duration_s"] > 3500
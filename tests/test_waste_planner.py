@@ -0,0 +1,133 @@
+import pytest
+
+from brainwasher.devices.vessels import WasteVessel
+from brainwasher.waste_planner import optimize_waste_plan
+from itertools import product
+from job_factories import make_job, pause_job_file, write_job
+from simulated_instrument import get_simulated_brainwasher
+
+
+def test_routing_only_uses_compatible_vessels():
+    bw = get_simulated_brainwasher()
+    bw.waste_vessels[0].add_solution(thf=4000)
+    job = make_job({"pbs": 5000}, {"dcm": 5000}, {"thf": 3000},
+                   {}, {"sbip": 6000}, {"dcm": 1000})
+    plan = optimize_waste_plan(job, bw.waste_vessels)
+    expected_volumes_ul = [wv.curr_volume_ul for wv in bw.waste_vessels]
+    for step, waste_vessel_id in zip(job.protocol, plan.waste_vessel_ids):
+        assert step.components <= \
+            bw.waste_vessels[waste_vessel_id].compatible_chemicals
+        expected_volumes_ul[waste_vessel_id] += sum(step.solution.values())
+    assert plan.volumes_ul == expected_volumes_ul
+    assert not plan.overflow_steps
+
+
+def test_overflow_reports_the_first_overflowing_step():
+    bw = get_simulated_brainwasher()
+    # The thf waste vessel holds 250mL.
+    job = make_job(*[{"thf": 10000}] * 30)
+    plan = optimize_waste_plan(job, bw.waste_vessels)
+    assert plan.overflow_steps == {0: 25}
+    assert plan.interventions == [(25, 0)]
+    with pytest.raises(ValueError, match="at step 25"):
+        bw.validate_job_against_instrument(job)
+
+
+def test_validation_chains_waste_across_jobs():
+    bw = get_simulated_brainwasher()
+    job = make_job(*[{"thf": 10000}] * 20)
+    waste_volumes_ul = [0, 0]
+    bw.validate_job_against_instrument(job, waste_volumes_ul=waste_volumes_ul)
+    assert waste_volumes_ul == [200000, 0]
+    with pytest.raises(ValueError):
+        bw.validate_job_against_instrument(job, waste_volumes_ul=waste_volumes_ul)
+
+
+def make_shared_waste_vessels() -> list[WasteVessel]:
+    """Two waste vessels that both accept pbs."""
+    return [WasteVessel(name="thf_waste", max_volume_ul=100000,
+                        compatible_chemicals={"thf", "pbs"}),
+            WasteVessel(name="dcm_waste", max_volume_ul=100000,
+                        compatible_chemicals={"dcm", "pbs"})]
+
+
+def test_optimizer_avoids_filling_the_wrong_vessel_early():
+    waste_vessels = make_shared_waste_vessels()
+    job = make_job({"pbs": 50000}, {"pbs": 50000}, {"thf": 80000})
+    # Splitting the pbs (i.e: to the emptiest vessel each step) would leave
+    # no room for the thf.
+    plan = optimize_waste_plan(job, waste_vessels)
+    assert plan.waste_vessel_ids == [1, 1, 0]
+    assert plan.volumes_ul == [80000, 100000]
+    assert not plan.interventions
+
+
+def test_optimizer_minimizes_interventions():
+    waste_vessels = make_shared_waste_vessels()
+    solutions = [{"thf": 30000}, {"pbs": 45000}, {"dcm": 20000}, {"pbs": 35000},
+                 {"thf": 50000}, {"pbs": 25000}, {"dcm": 70000}, {"pbs": 40000}]
+    job = make_job(*solutions)
+
+    def count_interventions(waste_vessel_ids):
+        volumes_ul = [0, 0]
+        interventions = 0
+        for waste_vessel_id, solution in zip(waste_vessel_ids, solutions):
+            volumes_ul[waste_vessel_id] += sum(solution.values())
+            if volumes_ul[waste_vessel_id] > 100000:
+                interventions += 1
+                volumes_ul[waste_vessel_id] = sum(solution.values())
+        return interventions
+
+    # Try every way of routing the pbs.
+    fewest = min(count_interventions(routing) for routing in product(
+        *[[0, 1] if "pbs" in solution else [0] if "thf" in solution else [1]
+          for solution in solutions]))
+    plan = optimize_waste_plan(job, waste_vessels)
+    assert len(plan.interventions) == fewest
+    assert count_interventions(plan.waste_vessel_ids) == fewest
+    assert plan.overflow_steps == {waste_vessel_id: step for step, waste_vessel_id
+                                   in reversed(plan.interventions)}
+
+
+def test_optimizer_routes_prime_and_purge_waste():
+    waste_vessels = make_shared_waste_vessels()
+    job = make_job({"pbs": 1000}, {"thf": 1000}, {"pbs": 1000})
+    plan = optimize_waste_plan(job, waste_vessels, start_step=1,
+                               prime_waste_ul=500, purge_waste_ul=100,
+                               primed_chemicals={"pbs"})
+    assert plan.prime_waste_vessel_ids == {"thf": 0}
+    assert plan.get_waste_vessel_id(0) is None  # Not planned.
+    assert plan.get_waste_vessel_id(1) == 0
+    assert sum(plan.volumes_ul) == 500 + 2 * 1100
+
+
+def test_instrument_drains_to_planned_waste_vessel():
+    bw = get_simulated_brainwasher(fast_forward=True)
+    bw.waste_vessels[1].compatible_chemicals.add("pbs")
+    bw.waste_vessels[0].add_solution(thf=200000)
+    job = make_job({"pbs": 5000}, {"thf": 5000})
+    plan = bw.validate_job_against_instrument(job)
+    assert plan.waste_vessel_ids == [1, 0]
+    bw.waste_plan = plan
+    bw.job_step = 0
+    bw.run_wash_step(**job.protocol[0].solution)
+    opened_valves = []
+    set_states = bw.valve_bank.set_states
+    def record_set_states(states):
+        opened_valves.extend(valve for valve, state in states.items() if state)
+        set_states(states)
+    bw.valve_bank.set_states = record_set_states
+    bw.drain_vessel()
+    assert bw.waste_drain_valves[1] in opened_valves
+    assert bw.waste_drain_valves[0] not in opened_valves
+
+
+def test_resumed_jobs_only_count_remaining_waste(tmp_path):
+    bw = get_simulated_brainwasher(fast_forward=True)
+    job_path = write_job(tmp_path / "a.yaml", "a", volume_ul=10000, steps=30)
+    pause_job_file(job_path, 25, starting_solution={"sbip": 10000})
+    # Waste from the first 25 steps is already in the waste vessel.
+    bw.waste_vessels[0].add_solution(sbip=200000)
+    bw.run(job_path)
+    bw.job_worker.join()
+    assert bw._load_job(job_path).history.events[-1].type == "end"
@@ -1,29 +1,8 @@
 import pytest
 
 from brainwasher.devices.instruments.brainwasher import BrainWasher
-from device_spinner.device_spinner import DeviceSpinner
-from device_spinner.config import Config
 from brainwasher.devices.vessels import WasteVessel
-from pathlib import Path
-
-
-import brainwasher.devices.instruments.brainwasher
-brainwasher.devices.instruments.brainwasher.SIMULATED = True
-
-
-def get_simulated_brainwasher():
-    """Grab simulated instrument config, and use it to instantiate a brainwasher
-    instance."""
-    # This is kinda clunky and doesn't support dynamically changing fields or
-    # where or not the high-level brainwaser is considred SIMULATED.
-    pkg_dir = Path(__file__).parent.parent
-    cfg_file = pkg_dir / Path("bin") / Path("sim_instrument_config.yaml")
-    if not cfg_file.exists():
-        raise FileNotFoundError(f"Cannot find {cfg_file.name} from path: "
-                                f"{cfg_file.resolve()}")
-    cfg = Config(cfg_file)
-    devices = DeviceSpinner().create_devices_from_specs(dict(cfg.cfg)["devices"])
-    return devices["brainwasher"]
+from simulated_instrument import get_simulated_brainwasher
 
 
 def test_get_chemicals_for_waste_components():